@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'levelup.settings')
+# under ASGI the reads are served by the async views, see levelup/urls_async.py
+os.environ.setdefault('LEVELUP_ROOT_URLCONF', 'levelup.urls_async')
 
 application = get_asgi_application()
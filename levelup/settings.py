@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,9 @@ INSTALLED_APPS = [
 
 # updated
 MIDDLEWARE = [
+    # first, so its total covers the rest of the middleware
+    'levelupapi.middleware.ServerTimingMiddleware',
+    'levelupapi.middleware.ProfilerMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -56,7 +60,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'levelup.urls'
+# asgi.py switches this to levelup.urls_async, which answers the reads with async views
+ROOT_URLCONF = os.environ.get('LEVELUP_ROOT_URLCONF', 'levelup.urls')
 
 TEMPLATES = [
     {
@@ -80,12 +85,54 @@ WSGI_APPLICATION = 'levelup.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# LEVELUP_DB=postgresql switches to PostgreSQL (needs psycopg2, an optional install, see the
+# README), the connection comes from the LEVELUP_DB_* variables. Otherwise the SQLite file
+# is used.
+LEVELUP_DB = os.environ.get('LEVELUP_DB', 'sqlite')
+
+# LEVELUP_DB_PROFILE=production keeps connections open between requests and tunes SQLite
+# (LEVELUP_SQLITE_PRAGMAS below). Otherwise Django's defaults are left alone.
+LEVELUP_DB_PROFILE = os.environ.get('LEVELUP_DB_PROFILE', 'default')
+PRODUCTION_DB = LEVELUP_DB_PROFILE == 'production'
+
+# seconds a connection is kept open for the next request instead of reconnecting every time
+CONN_MAX_AGE = int(os.environ.get('LEVELUP_DB_CONN_MAX_AGE', 60 if PRODUCTION_DB else 0))
+
+if LEVELUP_DB == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('LEVELUP_DB_NAME', 'levelup'),
+            'USER': os.environ.get('LEVELUP_DB_USER', ''),
+            'PASSWORD': os.environ.get('LEVELUP_DB_PASSWORD', ''),
+            'HOST': os.environ.get('LEVELUP_DB_HOST', ''),
+            'PORT': os.environ.get('LEVELUP_DB_PORT', ''),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            # a kept connection that has gone away is replaced instead of failing a request
+            'CONN_HEALTH_CHECKS': PRODUCTION_DB,
+        }
     }
-}
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('LEVELUP_DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': PRODUCTION_DB,
+        }
+    }
+
+# applied to every new SQLite connection by levelupapi.signals.tune_sqlite, under the
+# production profile only.
+# WAL lets the readers carry on while a signup is being written, NORMAL only syncs at
+# checkpoints (safe with WAL), the file is read through a 256MB memory map and a writer
+# waits up to 5 seconds for the lock instead of failing with "database is locked"
+LEVELUP_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+} if PRODUCTION_DB else {}
 
 
 # Password validation
@@ -132,13 +179,86 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # THIS IS NEW
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'levelupapi.authentication.GamerTokenAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
+# the shared part of the /games and /events lists is cached here, point this at a shared
+# cache (ie redis or memcached) when running more than one process
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    }
+}
+LEVELUP_PAYLOAD_CACHE_TIMEOUT = 300
+
+# /events/calendar shows this many days from today unless it is sent a window, and a
+# window can be at most LEVELUP_CALENDAR_MAX_DAYS long
+LEVELUP_CALENDAR_DAYS = 31
+LEVELUP_CALENDAR_MAX_DAYS = 366
+
+# the report pages are served from a rendered snapshot, which is rebuilt on a background
+# thread once it is this many seconds old or a write changed the report. False rebuilds it
+# in the request that found it out of date instead (ie for the tests).
+LEVELUP_REPORT_SNAPSHOT_TTL = int(os.environ.get('LEVELUP_REPORT_SNAPSHOT_TTL', 300))
+LEVELUP_REPORT_REFRESH_IN_BACKGROUND = True
+
+# token -> gamer lookups are cached per process, a deleted token or gamer is dropped right
+# away, anything changed by another process is picked up once the entry is TTL seconds old
+LEVELUP_TOKEN_CACHE_SIZE = 1024
+LEVELUP_TOKEN_CACHE_TTL = 60
+
+# the share of requests that get a Server-Timing header and a levelupapi.timing log line
+# with their query count and db/serialize/render/total times, 0 turns it off
+LEVELUP_TIMING_SAMPLE_RATE = float(os.environ.get('LEVELUP_TIMING_SAMPLE_RATE', 0))
+
+# a request is run under the sampling profiler when it sends an X-Levelup-Profile header
+# matching the secret (empty turns the header off), or is picked by the sample rate. Its
+# stacks are sampled every interval seconds and saved to the directory as a .collapsed
+# file for flamegraph.pl/speedscope, named after the route, status and time taken
+LEVELUP_PROFILE_SECRET = os.environ.get('LEVELUP_PROFILE_SECRET', '')
+LEVELUP_PROFILE_SAMPLE_RATE = float(os.environ.get('LEVELUP_PROFILE_SAMPLE_RATE', 0))
+LEVELUP_PROFILE_INTERVAL = 0.005
+LEVELUP_PROFILE_DIR = os.environ.get('LEVELUP_PROFILE_DIR', BASE_DIR / 'profiles')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'levelupapi.timing': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
+
+# login checks passwords on a pool of this many threads, with at most LEVELUP_LOGIN_QUEUE
+# more logins waiting. Past that a login gets a 503 with Retry-After: LEVELUP_LOGIN_RETRY_AFTER
+LEVELUP_LOGIN_WORKERS = int(os.environ.get('LEVELUP_LOGIN_WORKERS', os.cpu_count() or 1))
+LEVELUP_LOGIN_QUEUE = int(os.environ.get('LEVELUP_LOGIN_QUEUE', 64))
+LEVELUP_LOGIN_RETRY_AFTER = 1
+
+# uploads to /gamers/import are imported on a background thread, with the passwords hashed
+# on a pool of LEVELUP_IMPORT_HASH_WORKERS threads. At most LEVELUP_IMPORT_MAX_RUNNING
+# imports run at once, past that an upload gets a 503 with Retry-After:
+# LEVELUP_IMPORT_RETRY_AFTER. False imports in the request instead (ie for the tests).
+LEVELUP_IMPORT_HASH_WORKERS = int(os.environ.get('LEVELUP_IMPORT_HASH_WORKERS', 2))
+LEVELUP_IMPORT_MAX_RUNNING = int(os.environ.get('LEVELUP_IMPORT_MAX_RUNNING', 1))
+LEVELUP_IMPORT_RETRY_AFTER = 30
+LEVELUP_IMPORT_IN_BACKGROUND = True
+
 # THIS IS NEW
 CORS_ORIGIN_WHITELIST = (
     'http://localhost:3000',
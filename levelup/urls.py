@@ -19,6 +19,7 @@ from django.urls import path
 from rest_framework import routers
 
 from levelupapi.views import register_user, login_user
+from levelupapi.views import import_gamers, import_progress
 from levelupapi.views import GameTypeView
 from levelupapi.views import EventView
 from levelupapi.views import GameView
@@ -37,6 +38,8 @@ router.register(r'games', GameView, 'game')
 
 urlpatterns = [
     path('register', register_user),
+    path('gamers/import', import_gamers),
+    path('gamers/import/<str:job_id>', import_progress),
     path('login', login_user),
     path('admin/', admin.site.urls),
     path('', include(router.urls)),
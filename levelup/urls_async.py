@@ -0,0 +1,46 @@
+"""levelup URL Configuration for ASGI
+
+The same urls as levelup.urls, but the reads of games, events, game types and the user
+reports are answered by async views and login hashes passwords off the event loop.
+Everything else (writes, bulk, register, admin) goes to the regular views.
+asgi.py points ROOT_URLCONF here.
+"""
+from django.contrib import admin
+from django.conf.urls import include
+from django.urls import path
+
+from levelup.urls import router
+from levelupapi.views import register_user
+from levelupapi.views import import_gamers, import_progress
+from levelupapi.views import GameTypeView
+from levelupapi.views import EventView
+from levelupapi.views import GameView
+from levelupapi.views import asynchronous
+from levelupreports.views import user_game_list, user_event_list
+
+# the viewset actions for the methods the async views do not answer
+game_types = GameTypeView.as_view({'get': 'list'})
+game_type = GameTypeView.as_view({'get': 'retrieve'})
+games = GameView.as_view({'post': 'create'})
+game = GameView.as_view({'put': 'update', 'delete': 'destroy'})
+events = EventView.as_view({'post': 'create'})
+event = EventView.as_view({'put': 'update', 'delete': 'destroy'})
+
+urlpatterns = [
+    path('register', register_user),
+    path('gamers/import', import_gamers),
+    path('gamers/import/<str:job_id>', import_progress),
+    path('login', asynchronous.login_user),
+    path('admin/', admin.site.urls),
+    path('gametypes', asynchronous.reads_async(asynchronous.game_type_list, game_types)),
+    path('gametypes/<int:pk>',
+         asynchronous.reads_async(asynchronous.game_type_detail, game_type)),
+    path('games', asynchronous.reads_async(asynchronous.game_list, games)),
+    path('games/<int:pk>', asynchronous.reads_async(asynchronous.game_detail, game)),
+    path('events', asynchronous.reads_async(asynchronous.event_list, events)),
+    path('events/<int:pk>', asynchronous.reads_async(asynchronous.event_detail, event)),
+    path('reports/usergames', user_game_list),
+    path('reports/userevents', user_event_list),
+    # the rest of the viewset routes, ie /games/bulk and /events/1/signup
+    path('', include(router.urls)),
+]
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class LevelupapiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'levelupapi'
+
+    def ready(self):
+        # connects the signal receivers
+        from levelupapi import signals  # pylint: disable=import-outside-toplevel,unused-import
@@ -0,0 +1,137 @@
+"""Token authentication that resolves the gamer along with the user"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+class TokenGamerCache:
+    """A bounded, per process LRU cache of token key -> (user, token, gamer).
+    Entries expire after ttl seconds so a token deleted by another process stops
+    working within that window, deletes in this process are dropped right away by the
+    receivers in levelupapi.signals.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns the cached (user, token, gamer) for the key, or None
+        """
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            # most recently used entries live at the end
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_user(self, user_id):
+        """Drops every entry belonging to the user
+        """
+        with self._lock:
+            for key, (_expires, (user, _token, _gamer)) in list(self._entries.items()):
+                if user.pk == user_id:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenGamerCache(
+    max_entries=getattr(settings, 'LEVELUP_TOKEN_CACHE_SIZE', 1024),
+    ttl=getattr(settings, 'LEVELUP_TOKEN_CACHE_TTL', 60)
+)
+
+
+class GamerTokenAuthentication(TokenAuthentication):
+    """DRF token authentication that also attaches the logged in gamer as request.gamer.
+    The token, user and gamer come back from a single joined query and are cached, so
+    the views no longer need their own Gamer.objects.get(user=request.auth.user).
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            request.gamer = self._gamer
+        return result
+
+    def authenticate_credentials(self, key):
+        user, token, gamer = resolve_token(key)
+        self._gamer = gamer
+        return (user, token)
+
+
+def resolve_token(key):
+    """Looks up the (user, token, gamer) for a token key, from the cache when it can
+
+    Raises:
+        AuthenticationFailed -- for an unknown key or an inactive user
+    """
+    cached = token_cache.get(key)
+    if cached is None:
+        try:
+            token = Token.objects.select_related('user__gamer').get(key=key)
+        except Token.DoesNotExist as ex:
+            raise exceptions.AuthenticationFailed(_('Invalid token.')) from ex
+        cached = _cache_entry(key, token)
+    return _check_active(cached)
+
+
+async def aresolve_token(key):
+    """resolve_token for the async views, the lookup uses the async ORM
+    """
+    cached = token_cache.get(key)
+    if cached is None:
+        try:
+            token = await Token.objects.select_related('user__gamer').aget(key=key)
+        except Token.DoesNotExist as ex:
+            raise exceptions.AuthenticationFailed(_('Invalid token.')) from ex
+        cached = _cache_entry(key, token)
+    return _check_active(cached)
+
+
+def _cache_entry(key, token):
+    try:
+        gamer = token.user.gamer
+    except ObjectDoesNotExist:
+        # staff accounts made with createsuperuser do not have a gamer
+        gamer = None
+
+    cached = (token.user, token, gamer)
+    token_cache.set(key, cached)
+    return cached
+
+
+def _check_active(cached):
+    user, _token, _gamer = cached
+    if not user.is_active:
+        raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+    return cached
@@ -0,0 +1,119 @@
+"""The denormalized counters, Game.event_count and Event.attendees_count.
+The lists used to count the events of every game and the attendees of every event with
+a subquery per row. Now each counter is a column that every write moves with an atomic
+UPDATE ... SET count = count + n, so reading it is free and the lists can sort on it.
+
+- events are counted by the receivers in levelupapi.signals (create, update, delete and
+  the bulk endpoints)
+- attendees are counted by levelupapi.rsvp in the same transaction as the signup, and by
+  the receivers for any other write to the join table (ie a deleted gamer)
+
+Writes that skip both (raw SQL, the seeder, a restored backup) leave the counters out of
+step. drift() finds those rows and reconcile() sets them back to the real counts, see
+the reconcile_counters command.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from levelupapi.models import Event, EventGamer, Game
+
+# counter column -> (model, the model it counts, its foreign key to the model)
+COUNTERS = {
+    'event_count': (Game, Event, 'game'),
+    'attendees_count': (Event, EventGamer, 'event'),
+}
+
+
+def add(model, field, deltas, using='default'):
+    """Moves the counter of each row by its delta
+
+    Args:
+        model: the model with the counter, ie Game
+        field (str): the counter column, ie event_count
+        deltas (dict): {primary key: how much to add}, a delta can be negative
+    """
+    for pk, delta in deltas.items():
+        if pk is not None and delta:
+            (model.objects.using(using).filter(pk=pk)
+             .update(**{field: F(field) + delta}))
+
+
+def add_events(game_ids, delta, using='default'):
+    """Adds delta to the event_count of the game of each event, a game appears once for
+    each of its events
+    """
+    add(Game, 'event_count',
+        {game_id: count * delta for game_id, count in Counter(game_ids).items()}, using)
+
+
+def move_events(instances, using='default'):
+    """Moves event_count from the game each event was read with to the game it was saved
+    with, for events that changed game
+    """
+    loaded = [(getattr(instance, 'loaded_game_id', None), instance.game_id)
+              for instance in instances]
+    moved = [(old, new) for old, new in loaded if old not in (None, new)]
+    if moved:
+        with transaction.atomic(using=using):
+            add_events([old for old, _new in moved], -1, using)
+            add_events([new for _old, new in moved], 1, using)
+    for instance in instances:
+        instance.loaded_game_id = instance.game_id
+
+
+def add_attendees(event_id, delta, using='default'):
+    add(Event, 'attendees_count', {event_id: delta}, using)
+
+
+def count_of(model, field):
+    """Counts the model's rows pointing at each row of the outer query, for annotate and
+    update. As a correlated subquery each count is one index lookup, Count('events')
+    would GROUP BY every selected column.
+
+    Args:
+        model: the model being counted, ie Event
+        field (str): its foreign key to the outer model, ie "game"
+    """
+    counts = (model.objects.filter(**{field: OuterRef('pk')})
+              .order_by().values(field).annotate(count=Count('*')).values('count'))
+    return Coalesce(Subquery(counts), 0)
+
+
+def recount(field, pks, using='default'):
+    """Sets the counter of the rows back to their real counts
+    """
+    model, counted, key = COUNTERS[field]
+    model.objects.using(using).filter(pk__in=list(pks)).update(
+        **{field: count_of(counted, key)}
+    )
+
+
+def drift(field, using='default'):
+    """The rows whose counter does not match the real count
+
+    Returns:
+        QuerySet -- (id, counter, real count) rows
+    """
+    model, counted, key = COUNTERS[field]
+    return (model.objects.using(using)
+            .annotate(actual=count_of(counted, key))
+            .exclude(**{field: F('actual')})
+            .values_list('id', field, 'actual'))
+
+
+def reconcile(using='default'):
+    """Repairs every counter that drifted
+
+    Returns:
+        dict -- {counter: the (id, counter, real count) rows that were repaired}
+    """
+    repaired = {}
+    for field in COUNTERS:
+        with transaction.atomic(using=using):
+            rows = list(drift(field, using))
+            recount(field, [pk for pk, _count, _actual in rows], using)
+        repaired[field] = rows
+    return repaired
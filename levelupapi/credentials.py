@@ -0,0 +1,148 @@
+"""Password checks for login, run on a small bounded pool of threads.
+Hashing a password with PBKDF2 takes tens of milliseconds of CPU. Done on the request
+threads, a burst of logins keeps every worker busy hashing and the reads queue up behind
+them. Here at most LEVELUP_LOGIN_WORKERS passwords are hashed at once (hashlib releases
+the GIL while it hashes, so the threads run on separate cores) and at most
+LEVELUP_LOGIN_QUEUE more wait for a thread. Anything past that is turned away straight
+away with a 503 instead of waiting.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import (check_password, get_hasher, identify_hasher,
+                                         make_password)
+from django.contrib.auth.models import User
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions, status
+
+
+class LoginBusy(exceptions.APIException):
+    """Every slot in the pool is taken. DRF's exception handler adds the Retry-After
+    header from wait.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many logins right now, try again shortly.')
+    default_code = 'login_busy'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+class CredentialPool:
+    """A thread pool that takes at most workers + queue_size jobs at a time, submit()
+    raises LoginBusy rather than queueing past that
+    """
+
+    def __init__(self, workers, queue_size, retry_after):
+        self.workers = workers
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        """Runs fn(*args) on the pool
+
+        Returns:
+            Future -- the result of fn
+
+        Raises:
+            LoginBusy -- when the pool and its queue are full
+        """
+        if not self._slots.acquire(blocking=False):
+            raise LoginBusy(self.retry_after)
+        try:
+            future = self.executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _future: self._slots.release())
+        return future
+
+    def executor(self):
+        # the threads are started on first use, not in every process that imports this
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='levelup-login')
+            return self._executor
+
+
+login_pool = CredentialPool(
+    workers=getattr(settings, 'LEVELUP_LOGIN_WORKERS', 4),
+    queue_size=getattr(settings, 'LEVELUP_LOGIN_QUEUE', 64),
+    retry_after=getattr(settings, 'LEVELUP_LOGIN_RETRY_AFTER', 1)
+)
+
+
+def users_with_tokens(username):
+    """The user for a username with their token joined in, so a successful login does
+    not need a second query for the token
+
+    Returns:
+        QuerySet -- the matching user, if there is one
+    """
+    return User.objects.select_related('auth_token').filter(username=username)
+
+
+def verify(user, password):
+    """Checks the password against the user's hash, meant to be run on login_pool. An
+    unknown username still hashes the password once, the same as ModelBackend, so the
+    response time does not tell whether the username exists.
+
+    Returns:
+        bool -- whether the user can log in with the password
+    """
+    if user is None:
+        make_password(password)
+        return False
+    return check_password(password, user.password) and user.is_active
+
+
+def log_in(username, password):
+    """Checks the username and password on login_pool
+
+    Returns:
+        Token -- the user's token, or None when the login is not valid
+
+    Raises:
+        LoginBusy -- when the pool is full
+    """
+    user = users_with_tokens(username).first()
+    if not login_pool.submit(verify, user, password).result():
+        return None
+    if needs_rehash(user.password):
+        rehash(user, password)
+    return user.auth_token
+
+
+async def alog_in(username, password):
+    """log_in for the async views, the event loop is not held up while the pool hashes
+    """
+    user = await users_with_tokens(username).afirst()
+    if not await asyncio.wrap_future(login_pool.submit(verify, user, password)):
+        return None
+    if needs_rehash(user.password):
+        await sync_to_async(rehash)(user, password)
+    return user.auth_token
+
+
+def needs_rehash(encoded):
+    """Whether the hash was made with an older hasher or fewer iterations than the
+    current settings, authenticate() would upgrade those on login
+    """
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = get_hasher('default')
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+def rehash(user, password):
+    user.set_password(password)
+    user.save(update_fields=['password'])
@@ -0,0 +1,135 @@
+"""Runs the imports uploaded to /gamers/import as background jobs.
+An import is sized for 100k rows, far longer than a request should take, so the upload is
+saved to a temporary file and imported on its own thread while the request returns a job
+id straight away. The job writes how far it got into the cache after every chunk, which
+GET /gamers/import/<id> reads back.
+
+The passwords are hashed on a small module-level thread pool (hashlib releases the GIL
+while it hashes) rather than on a process pool, forking a server process that already
+runs threads can deadlock. At most LEVELUP_IMPORT_MAX_RUNNING imports run at once in a
+process, another upload is turned away with a 503 until one finishes.
+"""
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions, status
+
+from levelupapi import importing
+
+# how long a finished job's report can still be read, in seconds
+JOB_TTL = 24 * 60 * 60
+
+
+class ImportBusy(exceptions.APIException):
+    """Every import slot is taken. DRF's exception handler adds the Retry-After header
+    from wait.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many imports are running, try again once one has finished.')
+    default_code = 'import_busy'
+
+    def __init__(self, wait):
+        super().__init__()
+        self.wait = wait
+
+
+class HashPool:
+    """The thread pool the endpoint's imports hash their passwords on, shared by every
+    import in the process so they cannot start more threads between them
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        # the threads are started on first use, not in every process that imports this
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='levelup-import')
+            return self._executor
+
+
+hash_pool = HashPool(workers=getattr(settings, 'LEVELUP_IMPORT_HASH_WORKERS', 2))
+running = threading.BoundedSemaphore(getattr(settings, 'LEVELUP_IMPORT_MAX_RUNNING', 1))
+
+
+def start(upload, file_format):
+    """Saves the upload and starts importing it
+
+    Returns:
+        str -- the job id, its progress is read with progress()
+
+    Raises:
+        ImportBusy -- when LEVELUP_IMPORT_MAX_RUNNING imports are already running
+    """
+    if not running.acquire(blocking=False):
+        raise ImportBusy(getattr(settings, 'LEVELUP_IMPORT_RETRY_AFTER', 30))
+    try:
+        # the upload is gone once the request finishes
+        with tempfile.NamedTemporaryFile('wb', suffix=f'.{file_format}',
+                                         delete=False) as saved:
+            shutil.copyfileobj(upload, saved)
+        job_id = uuid.uuid4().hex
+        report(job_id, 'queued', importing.ImportReport())
+        if not background():
+            run(job_id, saved.name, file_format)
+            return job_id
+        thread = threading.Thread(target=run, args=(job_id, saved.name, file_format),
+                                  name=f'levelup-import-{job_id}', daemon=True)
+        thread.start()
+    except BaseException:
+        running.release()
+        raise
+    return job_id
+
+
+def run(job_id, path, file_format):
+    # called holding a slot of running, which is let go here
+    try:
+        with open(path, encoding='utf-8', newline='') as lines:
+            result = importing.import_gamers(
+                lines, file_format, executor=hash_pool.executor(),
+                progress=lambda partial: report(job_id, 'running', partial)
+            )
+        report(job_id, 'done', result)
+    except Exception as ex:  # pylint: disable=broad-except
+        cache.set(job_key(job_id), {'state': 'failed', 'error': str(ex)}, JOB_TTL)
+    finally:
+        os.remove(path)
+        running.release()
+        if background():
+            # the thread's connection is not closed by a request finishing
+            connection.close()
+
+
+def report(job_id, state, import_report):
+    cache.set(job_key(job_id), {'state': state, **import_report.as_dict()}, JOB_TTL)
+
+
+def progress(job_id):
+    """How far the job got
+
+    Returns:
+        dict -- {"state": queued, running, done or failed, "created", "error_count",
+        "errors"}, or None for a job that is not known
+    """
+    return cache.get(job_key(job_id))
+
+
+def background():
+    return getattr(settings, 'LEVELUP_IMPORT_IN_BACKGROUND', True)
+
+
+def job_key(job_id):
+    return f'levelup:import:{job_id}'
@@ -0,0 +1,187 @@
+"""Imports gamers in bulk from CSV or NDJSON, for the import_gamers command and the
+/gamers/import endpoint.
+Each row is a user with username, password, first_name, last_name and bio. The file is
+read a chunk of rows at a time: the chunk is validated, its passwords are hashed across
+processes (or, for the endpoint, on the thread pool of levelupapi.import_jobs) and then
+its users, tokens and gamers are written with bulk_create inside one transaction. Only one chunk is in memory at a time, and a row that is not valid is
+reported with its line number instead of stopping the import.
+"""
+import csv
+import json
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from rest_framework.authtoken.models import Token
+
+from levelupapi import versioning
+from levelupapi.models import Gamer
+
+# rows validated, hashed and written together
+CHUNK_SIZE = 1000
+# the most row errors kept for the report, the rest are only counted
+MAX_ERRORS = 1000
+
+FORMATS = ('csv', 'ndjson')
+FIELDS = ('username', 'password', 'first_name', 'last_name', 'bio')
+MAX_LENGTHS = {
+    'username': User._meta.get_field('username').max_length,
+    'first_name': User._meta.get_field('first_name').max_length,
+    'last_name': User._meta.get_field('last_name').max_length,
+    'bio': Gamer._meta.get_field('bio').max_length,
+}
+
+
+def format_for(filename):
+    """Guesses the format from a file name, ie gamers.csv or gamers.ndjson
+    """
+    if filename.lower().endswith('.csv'):
+        return 'csv'
+    if filename.lower().endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return None
+
+
+def read_rows(lines, file_format):
+    """Parses the lines of a file one row at a time
+
+    Yields:
+        tuple -- (line number, row dictionary or None, error message or None)
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as ex:
+            yield line_number, None, f'Not valid JSON: {ex}'
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, 'Expected a JSON object.'
+            continue
+        yield line_number, row, None
+
+
+def validate(row):
+    """The errors for one row, an empty dictionary when it can be imported
+    """
+    errors = {}
+    for field in FIELDS:
+        value = row.get(field, None)
+        if value is None or value == '':
+            errors[field] = ['This field is required.']
+        elif not isinstance(value, str):
+            errors[field] = ['Not a valid string.']
+        elif field in MAX_LENGTHS and len(value) > MAX_LENGTHS[field]:
+            errors[field] = [f'Ensure this field has no more than {MAX_LENGTHS[field]} '
+                             'characters.']
+    return errors
+
+
+class ImportReport:
+    """How far an import got, and the rows that could not be imported
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {'created': self.created, 'error_count': self.error_count,
+                'errors': self.errors}
+
+
+def import_gamers(lines, file_format, chunk_size=CHUNK_SIZE, workers=None, progress=None,
+                  executor=None):
+    """Imports the gamers from the lines of a CSV or NDJSON file
+
+    Args:
+        lines: an iterable of text lines, ie an open file
+        workers (int): processes the passwords are hashed on, None for one per cpu
+        progress (function): called with the report after every chunk
+        executor: an executor to hash the passwords on instead of starting a process
+            pool, it is left running. A server process uses a thread pool, see
+            levelupapi.import_jobs.
+
+    Returns:
+        ImportReport -- the number of gamers created and the row errors
+    """
+    if executor is None:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return import_gamers(lines, file_format, chunk_size, progress=progress,
+                                 executor=pool)
+
+    report = ImportReport()
+    rows = read_rows(lines, file_format)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        import_chunk(chunk, executor, report)
+        if progress is not None:
+            progress(report)
+
+    if report.created:
+        versioning.bump(User, Gamer)
+    return report
+
+
+def import_chunk(chunk, executor, report):
+    valid = []
+    usernames = set()
+    for line, row, error in chunk:
+        if error is not None:
+            report.error(line, {'non_field_errors': [error]})
+            continue
+        errors = validate(row)
+        if not errors and row['username'] in usernames:
+            errors = {'username': ['Appears more than once in the file.']}
+        if errors:
+            report.error(line, errors)
+            continue
+        usernames.add(row['username'])
+        valid.append((line, row))
+
+    existing = set(User.objects.filter(username__in=usernames)
+                   .values_list('username', flat=True))
+    for line, row in valid:
+        if row['username'] in existing:
+            report.error(line, {'username': ['A user with that username already exists.']})
+    valid = [(line, row) for line, row in valid if row['username'] not in existing]
+    if not valid:
+        return
+
+    passwords = executor.map(make_password, [row['password'] for _line, row in valid],
+                             chunksize=max(1, len(valid) // 64))
+    users = [
+        User(username=row['username'], password=password,
+             first_name=row['first_name'], last_name=row['last_name'])
+        for (_line, row), password in zip(valid, passwords)
+    ]
+    try:
+        with transaction.atomic():
+            users = User.objects.bulk_create(users)
+            Token.objects.bulk_create([Token(key=Token.generate_key(), user=user)
+                                       for user in users])
+            Gamer.objects.bulk_create([Gamer(user=user, bio=row['bio'])
+                                       for user, (_line, row) in zip(users, valid)])
+    except IntegrityError as ex:
+        # ie a username registered while the chunk was being hashed
+        for line, _row in valid:
+            report.error(line, {'non_field_errors': [f'Not imported with its chunk: {ex}']})
+        return
+    report.created += len(users)
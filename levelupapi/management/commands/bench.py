@@ -0,0 +1,229 @@
+import json
+import random
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from levelupapi import seeding
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+from levelupreports import snapshots
+
+# name -> (method, url template), {game}, {event} and {game_type} are filled in with
+# random ids for every request
+ROUTES = {
+    'gametypes': ('get', '/gametypes'),
+    'gametype': ('get', '/gametypes/{game_type}'),
+    'games': ('get', '/games'),
+    'games_page': ('get', '/games?limit=25'),
+    'games_by_type': ('get', '/games?type={game_type}&limit=25'),
+    'games_search': ('get', '/games?q=super mario&limit=25'),
+    'game': ('get', '/games/{game}'),
+    'events': ('get', '/events'),
+    'events_page': ('get', '/events?limit=25'),
+    'events_by_game': ('get', '/events?game={game}'),
+    'event': ('get', '/events/{event}'),
+    'login': ('post', '/login'),
+    'report_games': ('get', '/reports/usergames'),
+    'report_events': ('get', '/reports/userevents'),
+}
+
+# the settings each --cache mode runs under. cold keeps no /games or /events payload and
+# no report snapshot, so every request reads the database, warm is as configured.
+CACHE_MODES = {
+    'cold': {'LEVELUP_PAYLOAD_CACHE_TIMEOUT': 0},
+    'warm': {},
+}
+
+
+class Command(BaseCommand):
+    help = ("Benchmarks every route with the test client against a throwaway database. "
+            "The database is seeded with the sizes given, then each route is requested "
+            "--requests times at each --concurrency level, with the caches cold, warm or "
+            "both (--cache). Prints (or writes to --output) "
+            "the p50/p95/p99 latency, throughput and queries per request as JSON, so runs "
+            "can be compared between commits. ie\n"
+            "  manage.py bench --gamers 10000 --games 100000 --events 100000 "
+            "--signups 1000000 --keepdb --output bench.json")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gamers', type=int, default=1000)
+        parser.add_argument('--games', type=int, default=10000)
+        parser.add_argument('--events', type=int, default=10000)
+        parser.add_argument('--signups', type=int, default=100000)
+        parser.add_argument('--concurrency', default='1,8,32',
+                            help='comma separated numbers of clients running at once')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='requests per route at each concurrency level')
+        parser.add_argument('--routes', default=','.join(ROUTES),
+                            help='comma separated route names to run')
+        parser.add_argument('--cache', choices=[*CACHE_MODES, 'both'], default='both',
+                            help='run with the payload cache and report snapshots cold, '
+                                 'warm or once each')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='keep the seeded benchmark database for the next run')
+        parser.add_argument('--output', help='file to write the JSON results to')
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['concurrency'].split(',')]
+        routes = options['routes'].split(',')
+        modes = list(CACHE_MODES) if options['cache'] == 'both' else [options['cache']]
+        for route in routes:
+            if route not in ROUTES:
+                raise CommandError(f'Unknown route {route}, pick from {", ".join(ROUTES)}')
+
+        # a separate database so the benchmark never writes to the real one
+        if connection.vendor == 'sqlite':
+            # a file rather than the in memory test database, so the threads share it the
+            # way processes would
+            connection.settings_dict['TEST']['NAME'] = settings.BASE_DIR / 'bench.sqlite3'
+        else:
+            bench_name = f"{connection.settings_dict['NAME']}_bench"
+            connection.settings_dict['TEST']['NAME'] = bench_name
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            if not Gamer.objects.exists():
+                self.stderr.write('Seeding the benchmark database')
+                seeding.seed(options['gamers'], options['games'], options['events'],
+                             options['signups'], stdout=self.stderr)
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                results = {
+                    'commit': self.commit(),
+                    'dataset': self.dataset(),
+                    'cache': modes,
+                    'results': [
+                        result
+                        for mode in modes
+                        for result in self.run_mode(mode, routes, levels, options['requests'])
+                    ],
+                }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0,
+                                                keepdb=options['keepdb'])
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output_file:
+                output_file.write(output)
+        else:
+            self.stdout.write(output)
+
+    def run_mode(self, mode, routes, levels, requests):
+        """Runs every route at every concurrency level under the cache mode's settings,
+        starting from an empty cache so one mode's entries are not read by the next
+        """
+        with override_settings(**CACHE_MODES[mode]):
+            try:
+                yield from self.run_routes(mode, routes, levels, requests)
+            finally:
+                cache.clear()
+
+    def run_routes(self, mode, routes, levels, requests):
+        for route in routes:
+            for level in levels:
+                cache.clear()
+                if mode == 'cold':
+                    # with the rebuild locks held no snapshot is ever built, and the report
+                    # pages are streamed from their tables
+                    for name in snapshots.REPORTS:
+                        cache.add(snapshots.lock_key(name), True, snapshots.BUILD_TIMEOUT)
+                yield {'cache': mode, **self.run(route, level, requests)}
+
+    def run(self, route, concurrency, requests):
+        """Sends the route's requests from concurrency threads, each with its own client
+        and database connection
+
+        Returns:
+            dict -- the latency percentiles in ms, requests per second and queries per request
+        """
+        self.stderr.write(f'{route} x{concurrency}')
+        method, url = ROUTES[route]
+        ids = {
+            'game': list(Game.objects.values_list('id', flat=True)[:1000]),
+            'event': list(Event.objects.values_list('id', flat=True)[:1000]),
+            'game_type': list(GameType.objects.values_list('id', flat=True)),
+        }
+        tokens = list(Token.objects.filter(user__gamer__isnull=False)
+                      .values_list('key', 'user__username')[:concurrency])
+
+        def worker(index):
+            rng = random.Random(index)
+            key, username = tokens[index % len(tokens)]
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Token {key}')
+            timings = []
+            queries = []
+            errors = 0
+            counter = QueryCounter()
+            with connections['default'].execute_wrapper(counter):
+                for _ in range(index, requests, concurrency):
+                    path = url.format(**{name: rng.choice(values or [0])
+                                         for name, values in ids.items()})
+                    counter.count = 0
+                    start = time.perf_counter()
+                    if method == 'post':
+                        response = client.post(path, {
+                            'username': username,
+                            'password': seeding.password_for(username)
+                        }, format='json')
+                    else:
+                        response = client.get(path)
+                    if response.streaming:
+                        b''.join(response.streaming_content)
+                    timings.append(time.perf_counter() - start)
+                    queries.append(counter.count)
+                    errors += response.status_code >= 400
+            connections['default'].close()
+            return timings, queries, errors
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(worker, range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        timings = [timing for outcome in outcomes for timing in outcome[0]]
+        queries = [count for outcome in outcomes for count in outcome[1]]
+        percentiles = statistics.quantiles(timings, n=100) if len(timings) > 1 else timings * 99
+        return {
+            'route': route,
+            'concurrency': concurrency,
+            'requests': len(timings),
+            'errors': sum(outcome[2] for outcome in outcomes),
+            'p50_ms': round(percentiles[49] * 1000, 2),
+            'p95_ms': round(percentiles[94] * 1000, 2),
+            'p99_ms': round(percentiles[98] * 1000, 2),
+            'throughput_rps': round(len(timings) / elapsed, 1),
+            'queries_per_request': round(statistics.mean(queries), 2),
+        }
+
+    def dataset(self):
+        return {model.__name__: model.objects.count()
+                for model in (Gamer, GameType, Game, Event, EventGamer)}
+
+    def commit(self):
+        try:
+            return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                  text=True, cwd=settings.BASE_DIR, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+
+class QueryCounter:
+    """Counts the queries run on a connection, see connection.execute_wrapper
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
@@ -0,0 +1,130 @@
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from levelupapi.models import Event, Game
+from levelupreports import materialized
+
+# a plan line that reads a whole table, a MATCH on an FTS table and subqueries don't count
+FULL_SCAN = re.compile(r'^SCAN (?!.*VIRTUAL TABLE)(?!\(|CONSTANT ROW)(\S+)')
+# a scan that walks an index in order, which a LIMIT stops after a page
+INDEX_SCAN = re.compile(r'^SCAN \S+ USING (COVERING INDEX|INDEX|INTEGER PRIMARY KEY)\b')
+# the lists and report pages that return every row, a whole table read is what they do
+UNCHECKED = ('/gametypes', '/games', '/events', '/reports/usergames', '/reports/userevents')
+
+
+class Command(BaseCommand):
+    help = ("Requests each read endpoint the way the client does (filtered, searched and "
+            "paged), runs EXPLAIN QUERY PLAN on every query it made and fails if any of them "
+            "scans a whole table. Also checks the per gamer report refresh queries and the "
+            "filtered report pages. The unpaged lists and the whole report pages return "
+            "every row, so they are not checked and are listed in the output instead. "
+            "SQLite only, run it against a database with data in it (ie the fixtures). "
+            "Use -v 2 to print every plan.")
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        if connection.vendor != 'sqlite':
+            raise CommandError('EXPLAIN QUERY PLAN is only available on SQLite')
+
+        token = Token.objects.filter(user__gamer__isnull=False).first()
+        game = Game.objects.order_by('id').first()
+        event = Event.objects.order_by('id').first()
+        if token is None or game is None or event is None:
+            raise CommandError('Needs a gamer with a token, a game and an event, '
+                               'load the fixtures first')
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        failures = []
+        # the payload cache would hide the queries of a url that was already requested
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        ):
+            for url in self.endpoints(client, game, event):
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.get(url)
+                if response.status_code != 200:
+                    raise CommandError(f'GET {url} returned {response.status_code}')
+                for query in queries.captured_queries:
+                    failures += self.check(url, query['sql'], [])
+
+        for sql, column in ((materialized.GAMES_BY_USER_SQL, 'g.gamer_id'),
+                            (materialized.EVENTS_BY_USER_SQL, 'e.organizer_id')):
+            where, params = materialized.gamer_filter(column, [event.organizer_id])
+            failures += self.check('report refresh', sql.format(where=where), params)
+
+        self.stdout.write(f"Not checked, they return every row: {', '.join(UNCHECKED)}")
+        if failures:
+            raise CommandError('Full table scans found:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('No full table scans'))
+
+    def endpoints(self, client, game, event):
+        """The urls to check, the second page of each list is followed from the first
+        """
+        urls = [
+            f'/gametypes/{game.game_type_id}',
+            f'/games?type={game.game_type_id}',
+            f'/games?search={game.title[:2]}',
+            f'/games?q={game.title.split()[0]}',
+            f'/games/{game.id}?expand=game_type,gamer',
+            f'/events?game={event.game_id}',
+            f'/events?q={event.description.split()[0]}',
+            f'/events/{event.id}?expand=game,organizer,attendees',
+            f'/events/calendar?from={event.date}&to={event.date}',
+            f'/reports/usergames?format=json&gamer={game.gamer_id}',
+            f'/reports/userevents?format=json&gamer={event.organizer_id}&from={event.date}',
+        ]
+        for url in ('/games?limit=1', '/events?limit=1',
+                    f'/events?from={event.date}&limit=1',
+                    '/games?order=popular&limit=1', '/events?order=popular&limit=1',
+                    '/reports/usergames?format=json&limit=1',
+                    '/reports/userevents?format=json&limit=1'):
+            urls.append(url)
+            next_page = client.get(url).json()['next']
+            if next_page is not None:
+                urls.append(next_page)
+        return urls
+
+    def check(self, label, sql, params):
+        """Runs EXPLAIN QUERY PLAN on one query
+
+        Returns:
+            list -- a line for each full table scan in the plan
+        """
+        if not sql.lstrip().upper().startswith('SELECT'):
+            return []
+        with connection.cursor() as db_cursor:
+            db_cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = [row[3] for row in db_cursor.fetchall()]
+
+        if self.verbosity > 1:
+            self.stdout.write(f"{label}: {' '.join(sql.split())[:100]}")
+            for line in plan:
+                self.stdout.write(f'    {line}')
+
+        limited = ' LIMIT ' in sql and not any('TEMP B-TREE' in line for line in plan)
+        return [
+            f'{label}: {line}' for line in plan
+            if FULL_SCAN.match(line) and not (limited and walks_in_order(line, sql))
+        ]
+
+
+def walks_in_order(line, sql):
+    """Whether a SCAN line reads the rows in the query's order, so the LIMIT stops it
+    after a page: along an index, or along the rowid. check() has already made sure
+    the plan does not sort the rows afterwards.
+    """
+    # without an ORDER BY the scan reads rows until enough of them match, however many
+    # that is
+    if ' ORDER BY ' not in sql:
+        return False
+    # SQLite shows a walk in rowid order (ie ORDER BY id) as a plain SCAN of the table
+    table = FULL_SCAN.match(line).group(1)
+    return INDEX_SCAN.match(line) is not None or line == f'SCAN {table}'
@@ -0,0 +1,53 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from levelupapi import importing
+
+
+class Command(BaseCommand):
+    help = ("Imports gamers from a CSV (with a header row) or NDJSON file with the columns "
+            "username, password, first_name, last_name and bio. Each gamer gets a user, a "
+            "gamer and a token. The file is read and written a chunk at a time with the "
+            "passwords hashed across processes, rows that are not valid are reported with "
+            "their line number and skipped.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='the file to import, - reads from stdin')
+        parser.add_argument('--format', choices=importing.FORMATS,
+                            help='defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=importing.CHUNK_SIZE,
+                            help='rows hashed and written per transaction')
+        parser.add_argument('--workers', type=int,
+                            help='processes hashing passwords, defaults to one per cpu')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or importing.format_for(options['path'])
+        if file_format is None:
+            raise CommandError('Pass --format, it could not be told from the file name')
+
+        start = time.perf_counter()
+
+        def progress(report):
+            self.stdout.write(f'{report.created} imported, {report.error_count} errors, '
+                              f'{time.perf_counter() - start:.0f}s')
+
+        if options['path'] == '-':
+            report = self.run(sys.stdin, file_format, options, progress)
+        else:
+            with open(options['path'], encoding='utf-8', newline='') as lines:
+                report = self.run(lines, file_format, options, progress)
+
+        for error in report.errors:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        if report.error_count > len(report.errors):
+            self.stderr.write(f'and {report.error_count - len(report.errors)} more errors')
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {report.created} gamers with {report.error_count} errors in '
+            f'{time.perf_counter() - start:.0f}s'
+        ))
+
+    def run(self, lines, file_format, options, progress):
+        return importing.import_gamers(lines, file_format, chunk_size=options['chunk_size'],
+                                       workers=options['workers'], progress=progress)
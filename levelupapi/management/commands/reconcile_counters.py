@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from levelupapi import counters, versioning
+from levelupapi.models import Event, Game
+
+
+class Command(BaseCommand):
+    help = ("Compares Game.event_count and Event.attendees_count with the real counts and "
+            "sets the ones that drifted back, ie after rows were written with raw SQL or "
+            "restored from a backup. Use --check to only report them, it then fails if any "
+            "counter is off.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='report the counters that drifted without repairing them')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            drifted = {field: list(counters.drift(field)) for field in counters.COUNTERS}
+        else:
+            drifted = counters.reconcile()
+            if any(drifted.values()):
+                # the cached lists were built from the old counts
+                versioning.bump(Game, Event)
+
+        for field, rows in drifted.items():
+            for pk, count, actual in rows:
+                self.stdout.write(f'{field} of {pk}: {count}, counted {actual}')
+
+        total = sum(len(rows) for rows in drifted.values())
+        if options['check']:
+            if total:
+                raise CommandError(f'{total} counters drifted')
+            self.stdout.write(self.style.SUCCESS('No counters drifted'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {total} counters'))
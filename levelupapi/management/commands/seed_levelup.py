@@ -0,0 +1,39 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from levelupapi import seeding
+
+
+class Command(BaseCommand):
+    help = ("Adds synthetic users (with tokens and gamers), game types, games, events and "
+            "signups for testing at production scale. Popularity is skewed: a few hot games "
+            "get most of the events, a few power organizers run most of them and attendance "
+            "has a long tail. Rows are written with chunked bulk_create so memory stays flat, "
+            "the search index, report tables and version stamps are rebuilt at the end. "
+            f"Seeded users log in as gamer<n> with the password {seeding.PASSWORD}<n % pool>.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gamers', type=int, default=10000)
+        parser.add_argument('--games', type=int, default=100000)
+        parser.add_argument('--events', type=int, default=200000)
+        parser.add_argument('--signups', type=int, default=1000000)
+        parser.add_argument('--batch-size', type=int, default=seeding.BATCH_SIZE,
+                            help='rows written per transaction')
+        parser.add_argument('--password-pool', type=int, default=seeding.PASSWORD_POOL,
+                            help='number of distinct passwords hashed and shared')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='random seed, the same seed gives the same data')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        counts = seeding.seed(
+            options['gamers'], options['games'], options['events'], options['signups'],
+            rng=random.Random(options['seed']), stdout=self.stdout,
+            batch_size=options['batch_size'], password_pool=options['password_pool']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            ', '.join(f'{count} {model}' for model, count in counts.items()) +
+            f' seeded in {time.perf_counter() - start:.0f}s'
+        ))
@@ -0,0 +1,163 @@
+"""Middleware for looking into how requests spend their time"""
+import hmac
+import json
+import logging
+import os
+import random
+import threading
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from levelupapi import profiling, timing
+
+logger = logging.getLogger('levelupapi.timing')
+
+
+class ServerTimingMiddleware:
+    """Records the query count, db, serialize, render and total time of a sample of the
+    requests (settings.LEVELUP_TIMING_SAMPLE_RATE, 0 turns it off and 1 records every
+    request). A sampled response gets a Server-Timing header and one JSON log line on the
+    levelupapi.timing logger.
+
+    A streamed response (ie the reports) is timed up to the point it starts streaming,
+    the queries run while it streams are not counted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not sampled():
+            return self.get_response(request)
+
+        timings = timing.RequestTimings()
+        token = timing.activate(timings)
+        timings.start('total')
+        try:
+            response = self.get_response(request)
+        finally:
+            timings.stop('total')
+            timing.deactivate(token)
+        return report(request, response, timings)
+
+    async def __acall__(self, request):
+        if not sampled():
+            return await self.get_response(request)
+
+        timings = timing.RequestTimings()
+        token = timing.activate(timings)
+        timings.start('total')
+        try:
+            response = await self.get_response(request)
+        finally:
+            timings.stop('total')
+            timing.deactivate(token)
+        return report(request, response, timings)
+
+    def process_template_response(self, request, response):
+        """DRF responses are rendered after the view returns, the render phase runs from
+        here until the post render callback
+        """
+        timings = timing.current()
+        if timings is not None:
+            timings.start('render')
+
+            def rendered(response):
+                timings.stop('render')
+            response.add_post_render_callback(rendered)
+        return response
+
+
+class ProfilerMiddleware:
+    """Runs a request under levelupapi.profiling's sampling profiler and saves its stacks
+    to settings.LEVELUP_PROFILE_DIR, when either
+    - the request sends an X-Levelup-Profile header matching settings.LEVELUP_PROFILE_SECRET
+    - or it is picked by settings.LEVELUP_PROFILE_SAMPLE_RATE
+
+    Every other request only pays for the header and sample rate check. A profiled
+    response gets an X-Levelup-Profile header with the name of its file.
+
+    An async view is profiled on the event loop's thread, so other requests being served
+    at the same time show up in its stacks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not profile_requested(request):
+            return self.get_response(request)
+
+        sampler = start_sampler()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        return save_profile(request, response, sampler)
+
+    async def __acall__(self, request):
+        if not profile_requested(request):
+            return await self.get_response(request)
+
+        sampler = start_sampler()
+        try:
+            response = await self.get_response(request)
+        finally:
+            sampler.stop()
+        return save_profile(request, response, sampler)
+
+
+def sampled(setting='LEVELUP_TIMING_SAMPLE_RATE'):
+    rate = getattr(settings, setting, 0)
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+def profile_requested(request):
+    secret = getattr(settings, 'LEVELUP_PROFILE_SECRET', '')
+    header = request.META.get('HTTP_X_LEVELUP_PROFILE', None)
+    if secret and header is not None and hmac.compare_digest(header.encode(), secret.encode()):
+        return True
+    return sampled('LEVELUP_PROFILE_SAMPLE_RATE')
+
+
+def start_sampler():
+    sampler = profiling.StackSampler(threading.get_ident(),
+                                     getattr(settings, 'LEVELUP_PROFILE_INTERVAL', 0.005))
+    sampler.start()
+    return sampler
+
+
+def save_profile(request, response, sampler):
+    match = request.resolver_match
+    route = match.route if match is not None else request.path
+    path = profiling.write(settings.LEVELUP_PROFILE_DIR, request.method, route,
+                           response.status_code, sampler)
+    response['X-Levelup-Profile'] = os.path.basename(path)
+    return response
+
+
+def report(request, response, timings):
+    """Adds the Server-Timing header and writes the log line for a sampled request
+    """
+    response['Server-Timing'] = timings.server_timing()
+    logger.info(json.dumps({
+        'method': request.method,
+        'path': request.path,
+        'status': response.status_code,
+        'queries': timings.queries,
+        **{f'{phase}_ms': ms for phase, ms in timings.milliseconds().items()},
+    }))
+    return response
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+# FTS5 tables for levelupapi.search, the rowid of each row is the id of the game/event
+SEARCH_TABLES = (
+    ('levelupapi_game_fts', 'levelupapi_game', ('title', 'maker')),
+    ('levelupapi_event_fts', 'levelupapi_event', ('description',)),
+)
+
+
+def create_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, source, columns in SEARCH_TABLES:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE {table} USING fts5({', '.join(columns)}, "
+            f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {table} (rowid, {', '.join(columns)}) "
+            f"SELECT id, {', '.join(columns)} FROM {source}"
+        )
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, _source, _columns in SEARCH_TABLES:
+        schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
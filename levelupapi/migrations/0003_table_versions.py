@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0002_search_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('table', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated', models.DateTimeField(null=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='game',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='levelupapi.game'),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='organizer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='event', to='levelupapi.gamer'),
+        ),
+        migrations.AlterField(
+            model_name='game',
+            name='game_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='games', to='levelupapi.gametype'),
+        ),
+        migrations.AlterField(
+            model_name='game',
+            name='gamer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='games', to='levelupapi.gamer'),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def drop_duplicate_attendees(apps, schema_editor):
+    """Keeps the first row for each (event, gamer) so the unique constraint can be added
+    """
+    EventGamer = apps.get_model('levelupapi', 'EventGamer')
+    attendees = EventGamer.objects.using(schema_editor.connection.alias)
+    keep = attendees.values('event', 'gamer').annotate(keep=Min('id')).values('keep')
+    attendees.exclude(id__in=list(keep)).delete()
+
+
+# /games?search= is a LIKE 'term%' on title or maker. SQLite's LIKE ignores case so its
+# index has to be NOCASE, PostgreSQL's is case sensitive and needs the pattern operators
+# to use an index outside of the C locale. Collations and operator classes are not
+# portable, so these are made here instead of in Game.Meta. A later migration that
+# remakes levelupapi_game on SQLite drops them, check_query_plans will catch that.
+SEARCH_INDEXES = {
+    'sqlite': '"{column}" COLLATE NOCASE',
+    'postgresql': '"{column}" varchar_pattern_ops',
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    column_sql = SEARCH_INDEXES.get(schema_editor.connection.vendor, '"{column}"')
+    for column in ('title', 'maker'):
+        schema_editor.execute(
+            f'CREATE INDEX "game_{column}_search_idx" ON "levelupapi_game" '
+            f'({column_sql.format(column=column)})'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    for column in ('title', 'maker'):
+        schema_editor.execute(
+            schema_editor.sql_delete_index % {
+                'table': '"levelupapi_game"',
+                'name': f'"game_{column}_search_idx"',
+            }
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0003_table_versions'),
+    ]
+
+    operations = [
+        # the composite indexes start with the foreign key, so they replace the single
+        # column indexes Django made for game_type, game, organizer, event and gamer
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['game', 'id'], name='event_game_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['organizer', 'game'], name='event_organizer_game_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='eventgamer',
+            index=models.Index(fields=['gamer', 'event'], name='event_gamer_gamer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['game_type', 'id'], name='game_type_id_idx'),
+        ),
+        migrations.RunPython(drop_duplicate_attendees, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='eventgamer',
+            constraint=models.UniqueConstraint(fields=('event', 'gamer'), name='event_gamer_unique'),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='game',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='levelupapi.game'),
+        ),
+        migrations.AlterField(
+            model_name='event',
+            name='organizer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='event', to='levelupapi.gamer'),
+        ),
+        migrations.AlterField(
+            model_name='eventgamer',
+            name='event',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='levelupapi.event'),
+        ),
+        migrations.AlterField(
+            model_name='eventgamer',
+            name='gamer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='levelupapi.gamer'),
+        ),
+        migrations.AlterField(
+            model_name='game',
+            name='game_type',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='games', to='levelupapi.gametype'),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
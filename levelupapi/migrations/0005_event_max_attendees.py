@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0004_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='max_attendees',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:26
+
+import datetime
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 5000
+
+
+def fill_starts_at(apps, schema_editor):
+    """Sets starts_at on the existing events with one UPDATE where the database can work
+    out the time zone, otherwise a batch of events at a time
+    """
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'UPDATE levelupapi_event SET starts_at = (date + time) AT TIME ZONE %s',
+            [settings.TIME_ZONE]
+        )
+        return
+    if connection.vendor == 'sqlite' and settings.TIME_ZONE == 'UTC':
+        # SQLite stores datetimes as 'YYYY-MM-DD HH:MM:SS' text in UTC
+        schema_editor.execute(
+            "UPDATE levelupapi_event SET starts_at = date || ' ' || time"
+        )
+        return
+
+    Event = apps.get_model('levelupapi', 'Event')
+    events = Event.objects.using(connection.alias)
+    batch = []
+    for event in events.only('id', 'date', 'time').iterator(chunk_size=BATCH_SIZE):
+        event.starts_at = timezone.make_aware(datetime.datetime.combine(event.date, event.time))
+        batch.append(event)
+        if len(batch) == BATCH_SIZE:
+            events.bulk_update(batch, ['starts_at'])
+            batch = []
+    events.bulk_update(batch, ['starts_at'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0005_event_max_attendees'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='starts_at',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(fill_starts_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['starts_at', 'id'], name='event_starts_at_idx'),
+        ),
+    ]
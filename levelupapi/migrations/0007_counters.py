@@ -0,0 +1,65 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:40
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, field):
+    counts = (model.objects.filter(**{field: OuterRef('pk')})
+              .order_by().values(field).annotate(count=Count('*')).values('count'))
+    return Coalesce(Subquery(counts), 0)
+
+
+def fill_counters(apps, schema_editor):
+    """Counts the events of every game and the attendees of every event, one UPDATE each
+    """
+    alias = schema_editor.connection.alias
+    Game = apps.get_model('levelupapi', 'Game')
+    Event = apps.get_model('levelupapi', 'Event')
+    EventGamer = apps.get_model('levelupapi', 'EventGamer')
+    Game.objects.using(alias).update(event_count=count_of(Event, 'game'))
+    Event.objects.using(alias).update(attendees_count=count_of(EventGamer, 'event'))
+
+
+def remake_search_indexes(apps, schema_editor):
+    """Adding event_count remakes levelupapi_game on SQLite, which drops the /games?search=
+    indexes made in 0004 outside of the model state
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for column in ('title', 'maker'):
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS "game_{column}_search_idx" ON "levelupapi_game" '
+            f'("{column}" COLLATE NOCASE)'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupapi', '0006_event_starts_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='event_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='attendees_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(remake_search_indexes, migrations.RunPython.noop),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['-event_count', '-id'], name='game_popular_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['-attendees_count', '-id'], name='event_popular_idx'),
+        ),
+    ]
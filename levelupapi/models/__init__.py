@@ -3,3 +3,4 @@ from .event_gamer import EventGamer
 from .event import Event
 from .game_type import GameType
 from .game import Game
+from .table_version import TableVersion
@@ -1,14 +1,61 @@
+import datetime
+
 from django.db import models
+from django.utils import timezone
 
 # for the many to many add the userIds to an array for attendees on the json file.
 
 class Event(models.Model):
-    game = models.ForeignKey("Game", on_delete=models.CASCADE, related_name="events")
+    # game and organizer are indexed by the composite indexes below
+    game = models.ForeignKey("Game", on_delete=models.CASCADE, related_name="events",
+                             db_index=False)
     description = models.TextField(max_length=150)
     date = models.DateField(auto_now=False, auto_now_add=False)
     time = models.TimeField(auto_now=False, auto_now_add=False)
-    organizer = models.ForeignKey("Gamer", on_delete=models.CASCADE, related_name="event")
+    organizer = models.ForeignKey("Gamer", on_delete=models.CASCADE, related_name="event",
+                                  db_index=False)
     attendees = models.ManyToManyField("Gamer", through="EventGamer", related_name="events")
+    # signups stop once this many gamers joined, no limit when it is null
+    max_attendees = models.PositiveIntegerField(null=True, blank=True)
+    # date and time together, for the window queries and the calendar. Kept in step by
+    # levelupapi.signals.set_starts_at, filled in for existing rows by migration 0006
+    starts_at = models.DateTimeField(null=True, editable=False)
+    # how many gamers signed up, kept by levelupapi.counters
+    attendees_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # derived column -> the fields it is worked out from, for bulk_update
+    DERIVED_FIELDS = {'starts_at': ('date', 'time')}
+
+    class Meta:
+        indexes = [
+            # /events?game= filters on the game and pages by id
+            models.Index(fields=['game', 'id'], name='event_game_id_idx'),
+            # user_event_count groups the organizer's events by game, the reports read an
+            # organizer's events in id order
+            models.Index(fields=['organizer', 'game'], name='event_organizer_game_idx'),
+            # ?from=/?to=/?upcoming= and the calendar read a range of start times in order
+            models.Index(fields=['starts_at', 'id'], name='event_starts_at_idx'),
+            # /events?order=popular pages from the most attendees down
+            models.Index(fields=['-attendees_count', '-id'], name='event_popular_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the game the event was read with, moving it to another game moves the event_count
+        instance.loaded_game_id = instance.__dict__.get('game_id', None)
+        return instance
+
+    @classmethod
+    def start_of(cls, date, time):
+        """The date and time as one aware datetime in the current time zone, they can be
+        strings when they were set straight from the request data
+        """
+        date = cls._meta.get_field('date').to_python(date)
+        time = cls._meta.get_field('time').to_python(time)
+        if date is None or time is None:
+            return None
+        return timezone.make_aware(datetime.datetime.combine(date, time))
 
     @property #the getter
     def joined(self):
@@ -3,5 +3,17 @@ from django.db import models
 # no need to use related name here since it is a many to many table
 
 class EventGamer(models.Model):
-    gamer = models.ForeignKey("Gamer", on_delete=models.CASCADE)
-    event = models.ForeignKey("Event", on_delete=models.CASCADE)
+    # both columns are indexed by the constraint/index below
+    gamer = models.ForeignKey("Gamer", on_delete=models.CASCADE, db_index=False)
+    event = models.ForeignKey("Event", on_delete=models.CASCADE, db_index=False)
+
+    class Meta:
+        constraints = [
+            # a gamer can only sign up for an event once, this is also the index the
+            # attendee counts join on
+            models.UniqueConstraint(fields=['event', 'gamer'], name='event_gamer_unique'),
+        ]
+        indexes = [
+            # joined reads the event ids for one gamer straight from the index
+            models.Index(fields=['gamer', 'event'], name='event_gamer_gamer_idx'),
+        ]
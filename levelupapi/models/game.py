@@ -2,9 +2,23 @@ from django.db import models
 
 
 class Game(models.Model):
-    game_type = models.ForeignKey("GameType", on_delete=models.CASCADE, related_name="games")
+    # indexed by game_type_id_idx below
+    game_type = models.ForeignKey("GameType", on_delete=models.CASCADE, related_name="games",
+                                  db_index=False)
     title = models.CharField(max_length=55)
     maker = models.CharField(max_length=55)
     gamer = models.ForeignKey("Gamer", on_delete=models.CASCADE, related_name="games")
     number_of_players = models.PositiveIntegerField(default=0)
     skill_level = models.PositiveIntegerField(default=0)
+    # how many events there are for the game, kept by levelupapi.counters
+    event_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            # /games?type= filters on the type and pages by id
+            models.Index(fields=['game_type', 'id'], name='game_type_id_idx'),
+            # /games?order=popular pages from the most events down
+            models.Index(fields=['-event_count', '-id'], name='game_popular_idx'),
+            # the title and maker indexes for /games?search= depend on the database, they
+            # are made in migration 0004
+        ]
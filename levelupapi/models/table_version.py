@@ -0,0 +1,9 @@
+from django.db import models
+
+# a counter per model that goes up on every write to that model's table, the views use it
+# to build ETags without querying the table itself, see levelupapi.versioning
+
+class TableVersion(models.Model):
+    table = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated = models.DateTimeField(null=True)
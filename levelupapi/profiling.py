@@ -0,0 +1,77 @@
+"""A low overhead sampling profiler for single requests, used by
+levelupapi.middleware.ProfilerMiddleware.
+A background thread looks at the request's thread every interval and counts the stack it
+is in. Nothing is hooked into the interpreter, so the request itself runs at full speed.
+The counts are written in the collapsed stack format (one "outer;inner;innermost count"
+line per stack) that flamegraph.pl, speedscope and inferno read.
+"""
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+
+class StackSampler:
+    """Samples the stack of one thread until it is stopped
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.elapsed = 0.0
+        self._started = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='levelup-profiler', daemon=True)
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self._started
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id, None)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+
+
+def collapse(frame):
+    """The frame's stack as module:function names, outermost first, joined with ;
+    """
+    names = []
+    while frame is not None:
+        module = frame.f_globals.get('__name__', '?')
+        names.append(f'{module}:{frame.f_code.co_name}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def write(directory, method, route, status_code, sampler):
+    """Writes the sampled stacks to a .collapsed file named after the time, the route,
+    the status and how long the request took
+
+    Returns:
+        str -- the path of the file written
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = '-'.join([
+        time.strftime('%Y%m%dT%H%M%S'),
+        method,
+        re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'root',
+        str(status_code),
+        f'{round(sampler.elapsed * 1000)}ms',
+        uuid.uuid4().hex[:8],
+    ])
+    path = os.path.join(directory, f'{name}.collapsed')
+    with open(path, 'w', encoding='utf-8') as profile:
+        for stack, count in sampler.stacks.most_common():
+            profile.write(f'{stack} {count}\n')
+    return path
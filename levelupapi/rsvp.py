@@ -0,0 +1,117 @@
+"""Signing gamers up for events and taking them off again.
+Each change is one conditional statement on the join table instead of loading the gamer
+and the event and going through attendees.add()/remove(). Both are idempotent: signing
+up twice or leaving an event the gamer is not in changes nothing. The event's
+attendees_count is moved in the same transaction, EventGamer's version stamp only once it
+has committed.
+
+An event with max_attendees only takes a signup while it has room. On SQLite the
+INSERT ... SELECT runs under the database's single write lock, so the attendees_count it
+checks cannot change underneath it. On PostgreSQL concurrent signups for the same capped event
+are queued on a transaction scoped advisory lock keyed on the event id, events without
+a cap and every other event are not held up.
+"""
+from django.db import connections, transaction
+
+from levelupapi import counters, versioning
+from levelupapi.models import Event, EventGamer
+
+# the outcome of a signup
+JOINED = 'joined'
+ALREADY_JOINED = 'already joined'
+FULL = 'full'
+NOT_FOUND = 'not found'
+# and of leaving
+LEFT = 'left'
+NOT_ATTENDING = 'not attending'
+
+SIGNUP_SQL = """
+    INSERT INTO levelupapi_eventgamer (event_id, gamer_id)
+    SELECT e.id, %s
+    FROM levelupapi_event e
+    WHERE e.id = %s
+      AND (e.max_attendees IS NULL OR e.max_attendees > e.attendees_count)
+    ON CONFLICT (event_id, gamer_id) DO NOTHING
+"""
+
+LEAVE_SQL = """
+    DELETE FROM levelupapi_eventgamer WHERE event_id = %s AND gamer_id = %s
+"""
+
+COUNT_SQL = """
+    SELECT attendees_count FROM levelupapi_event WHERE id = %s
+"""
+
+LOCK_CAPPED_EVENT_SQL = """
+    SELECT pg_advisory_xact_lock(id)
+    FROM levelupapi_event
+    WHERE id = %s AND max_attendees IS NOT NULL
+"""
+
+
+def signup(event_id, gamer_id, using='default'):
+    """Adds the gamer to the event's attendees if there is room
+
+    Returns:
+        tuple -- (JOINED, ALREADY_JOINED, FULL or NOT_FOUND, the attendee count or None
+        when the event does not exist)
+    """
+    if event_id is None:
+        return NOT_FOUND, None
+    connection = connections[using]
+    with transaction.atomic(using=using), connection.cursor() as db_cursor:
+        if connection.vendor == 'postgresql':
+            db_cursor.execute(LOCK_CAPPED_EVENT_SQL, [event_id])
+        db_cursor.execute(SIGNUP_SQL, [gamer_id, event_id])
+        added = db_cursor.rowcount > 0
+        if added:
+            counters.add_attendees(event_id, 1, using)
+            bump_after_commit(using)
+        count = attendee_count(db_cursor, event_id)
+
+    if added:
+        return JOINED, count
+
+    # nothing was inserted, only now work out why
+    if EventGamer.objects.using(using).filter(event_id=event_id, gamer_id=gamer_id).exists():
+        return ALREADY_JOINED, count
+    if not Event.objects.using(using).filter(pk=event_id).exists():
+        return NOT_FOUND, None
+    return FULL, count
+
+
+def leave(event_id, gamer_id, using='default'):
+    """Takes the gamer off the event's attendees
+
+    Returns:
+        tuple -- (LEFT, NOT_ATTENDING or NOT_FOUND, the attendee count or None when the
+        event does not exist)
+    """
+    if event_id is None:
+        return NOT_FOUND, None
+    with transaction.atomic(using=using), connections[using].cursor() as db_cursor:
+        db_cursor.execute(LEAVE_SQL, [event_id, gamer_id])
+        removed = db_cursor.rowcount > 0
+        if removed:
+            counters.add_attendees(event_id, -1, using)
+            bump_after_commit(using)
+        db_cursor.execute(COUNT_SQL, [event_id])
+        row = db_cursor.fetchone()
+
+    # the count is read from the event, so no row means there is no such event
+    if row is None:
+        return NOT_FOUND, None
+    return (LEFT if removed else NOT_ATTENDING), row[0]
+
+
+def bump_after_commit(using):
+    # every signup shares EventGamer's one version row, updated inside the transaction its
+    # row lock would queue the signups for every event behind each other
+    transaction.on_commit(lambda: versioning.bump(EventGamer, using=using), using=using)
+
+
+def attendee_count(db_cursor, event_id):
+    db_cursor.execute(COUNT_SQL, [event_id])
+    row = db_cursor.fetchone()
+    # the event can be deleted between the signup and the count
+    return row[0] if row is not None else 0
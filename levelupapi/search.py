@@ -0,0 +1,116 @@
+"""Full text search over games and events.
+On SQLite each searchable model has an FTS5 table (created in migration 0002) whose rowid
+is the model's id. The receivers in levelupapi.signals keep those tables in sync when a
+game or event is saved or deleted. Other engines fall back to a plain icontains filter.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+# model label -> (fts table, indexed columns)
+SEARCH_TABLES = {
+    'levelupapi.game': ('levelupapi_game_fts', ('title', 'maker')),
+    'levelupapi.event': ('levelupapi_event_fts', ('description',)),
+}
+
+
+def is_enabled(using='default'):
+    """FTS5 is only available on SQLite
+    """
+    return connections[using].vendor == 'sqlite'
+
+
+def build_match(q):
+    """Turns what the user typed into an FTS5 query, every word has to match and is
+    treated as a prefix, so "sup mar" finds "Super Mario RPG". Quoting each word keeps
+    FTS5 syntax characters in the input from being parsed as operators.
+
+    Returns:
+        str -- the MATCH expression, or None when there are no words to search for
+    """
+    words = re.findall(r'\w+', q)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def index(instances, using='default'):
+    """Adds or replaces the search rows for saved games or events
+    """
+    instances = list(instances)
+    if not instances or not is_enabled(using):
+        return
+    table, columns = SEARCH_TABLES[instances[0]._meta.label_lower]
+    unindex(type(instances[0]), [instance.pk for instance in instances], using)
+    with connections[using].cursor() as db_cursor:
+        db_cursor.executemany(
+            f"INSERT INTO {table} (rowid, {', '.join(columns)}) "
+            f"VALUES (%s, {', '.join(['%s'] * len(columns))})",
+            [
+                [instance.pk, *[getattr(instance, column) for column in columns]]
+                for instance in instances
+            ]
+        )
+
+
+def unindex(model, pks, using='default'):
+    """Removes the search rows for deleted games or events
+    """
+    pks = list(pks)
+    if not pks or not is_enabled(using):
+        return
+    table, _columns = SEARCH_TABLES[model._meta.label_lower]
+    with connections[using].cursor() as db_cursor:
+        db_cursor.execute(
+            f"DELETE FROM {table} WHERE rowid IN ({', '.join(['%s'] * len(pks))})",
+            pks
+        )
+
+
+def reindex(model, using='default'):
+    """Rebuilds the search rows for every game or event with one INSERT ... SELECT, for
+    after rows were written without signals (ie bulk loads)
+    """
+    if not is_enabled(using):
+        return
+    table, columns = SEARCH_TABLES[model._meta.label_lower]
+    with connections[using].cursor() as db_cursor:
+        db_cursor.execute(f"DELETE FROM {table}")
+        db_cursor.execute(
+            f"INSERT INTO {table} (rowid, {', '.join(columns)}) "
+            f"SELECT id, {', '.join(columns)} FROM {model._meta.db_table}"
+        )
+
+
+def rank(queryset, q):
+    """Filters the queryset down to the rows matching q, best match first. On SQLite the
+    FTS table drives the query (one index probe per word) and is joined back to the
+    model table by rowid, so the cost depends on the number of matches and not on the
+    size of the table.
+
+    Returns:
+        QuerySet -- the matching rows ordered by bm25 rank
+    """
+    model = queryset.model
+    table, columns = SEARCH_TABLES[model._meta.label_lower]
+    match = build_match(q)
+    if match is None:
+        return queryset.none()
+
+    if not is_enabled(queryset.db):
+        condition = Q()
+        for word in re.findall(r'\w+', q):
+            word_condition = Q()
+            for column in columns:
+                word_condition |= Q(**{f'{column}__icontains': word})
+            condition &= word_condition
+        return queryset.filter(condition)
+
+    return queryset.extra(
+        tables=[table],
+        where=[f'{table}.rowid = {model._meta.db_table}.id', f'{table} MATCH %s'],
+        params=[match],
+        select={'search_rank': f'{table}.rank'},
+        order_by=['search_rank']
+    )
@@ -0,0 +1,265 @@
+"""Generates synthetic gamers, games and events, for the bench and seed_levelup commands.
+The data is skewed the way real usage is: a few hot games get most of the events, a few
+power organizers run most of them and attendance per event has a long tail.
+
+Everything is written with chunked bulk_create, so only one batch of rows is in memory
+at a time and the signals that keep the search tables, report tables and version
+stamps up to date do not fire, finish() brings those up to date once at the end.
+"""
+import random
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models.functions import Length
+from rest_framework.authtoken.models import Token
+
+from levelupapi import counters, search, versioning
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+from levelupreports import materialized
+
+# rows written per transaction
+BATCH_SIZE = 10000
+# seeded users log in with PASSWORD followed by their number modulo the pool size, only
+# the pool is hashed and the hashes are shared
+PASSWORD = 'levelup'
+PASSWORD_POOL = 16
+# how steep the popularity curves are, the nth most popular game/organizer gets 1/n**s
+# of the top one's share
+ZIPF_EXPONENT = 1.1
+# attendance per event is pareto distributed with this shape, lower is a longer tail
+ATTENDANCE_SHAPE = 1.5
+
+GAME_TYPES = ('Board Game', 'Role-Playing Game', 'MMO Game', 'Card Game', 'Strategy Game')
+WORDS = ('Super', 'Mario', 'Quest', 'Legend', 'Dungeon', 'Castle', 'Space', 'Empire',
+         'Dragon', 'Kart', 'Party', 'Tactics', 'Ticket', 'Ride', 'Catan', 'Night')
+MAKERS = ('Nintendo', 'Hasbro', 'Milton Bradley', 'Days of Wonder', 'Blizzard', 'Sega')
+
+
+def seed(gamers, games, events, signups, rng=None, stdout=None,
+         batch_size=BATCH_SIZE, password_pool=PASSWORD_POOL):
+    """Adds about the given number of rows of each kind
+
+    Args:
+        signups (int): EventGamer rows, the most that will be written. There can be fewer
+            when there are not enough gamers to fill the events.
+        rng (random.Random): for repeatable data
+
+    Returns:
+        dict -- the number of rows written for each model
+    """
+    rng = rng or random.Random(0)
+    write = stdout.write if stdout is not None else lambda message: None
+
+    game_type_ids = seed_game_types()
+    write(f'{gamers} gamers')
+    gamer_ids = seed_gamers(gamers, batch_size, password_pool)
+    # the hot games and power organizers are picked at random
+    organizers = Popularity(gamer_ids, rng)
+
+    write(f'{games} games')
+    # the counters start at 0 and are counted by finish()
+    game_ids = load_new(Game, ('game_type', 'gamer', 'title', 'maker', 'number_of_players',
+                               'skill_level', 'event_count'), (
+        (rng.choice(game_type_ids), rng.choice(gamer_ids), ' '.join(rng.sample(WORDS, 3)),
+         rng.choice(MAKERS), rng.randint(1, 8), rng.randint(1, 5), 0)
+        for _ in range(games)
+    ), batch_size)
+    hot_games = Popularity(game_ids, rng)
+
+    write(f'{events} events')
+    event_ids = load_new(Event, ('game', 'organizer', 'description', 'date', 'time',
+                                 'starts_at', 'attendees_count'), (
+        with_start(hot_games.pick(), organizers.pick(), ' '.join(rng.choices(WORDS, k=6)),
+                   f'2023-{rng.randint(1, 12):02}-{rng.randint(1, 28):02}',
+                   f'{rng.randint(8, 22):02}:00')
+        for _ in range(events)
+    ), batch_size)
+
+    write(f'{signups} signups')
+    signup_count = load_rows(EventGamer, ('event', 'gamer'), islice(
+        attendees(event_ids, gamer_ids, signups, rng), signups
+    ), batch_size)
+
+    finish(stdout)
+    return {'Gamer': len(gamer_ids), 'Game': len(game_ids), 'Event': len(event_ids),
+            'EventGamer': signup_count}
+
+
+class Popularity:
+    """Picks ids on a zipf curve, the first id in the shuffled order is the most popular
+    """
+
+    def __init__(self, ids, rng):
+        self.ids = list(ids)
+        rng.shuffle(self.ids)
+        self.rng = rng
+        self.cum_weights = list(accumulate(
+            1 / rank ** ZIPF_EXPONENT for rank in range(1, len(self.ids) + 1)
+        ))
+
+    def pick(self):
+        return self.rng.choices(self.ids, cum_weights=self.cum_weights)[0]
+
+
+def attendees(event_ids, gamer_ids, signups, rng):
+    """Spreads the signups over the events with a long tail, each gamer signs up for an
+    event at most once
+
+    Yields:
+        tuple -- (event_id, gamer_id)
+    """
+    if not event_ids or not gamer_ids:
+        return
+    # the pareto distribution's mean is shape / (shape - 1), scaled to the signups needed
+    mean = signups / len(event_ids)
+    scale = mean * (ATTENDANCE_SHAPE - 1) / ATTENDANCE_SHAPE
+    for event_id in event_ids:
+        count = min(len(gamer_ids), round(rng.paretovariate(ATTENDANCE_SHAPE) * scale))
+        for gamer_id in rng.sample(gamer_ids, count):
+            yield (event_id, gamer_id)
+
+
+def seed_game_types():
+    existing = set(GameType.objects.values_list('label', flat=True))
+    GameType.objects.bulk_create([GameType(label=label) for label in GAME_TYPES
+                                  if label not in existing])
+    return list(GameType.objects.values_list('id', flat=True))
+
+
+def seed_gamers(count, batch_size=BATCH_SIZE, password_pool=PASSWORD_POOL):
+    """Adds users with a gamer and a token each
+
+    Returns:
+        list -- the ids of the new gamers
+    """
+    passwords = hash_passwords(password_pool)
+    start = next_gamer_number()
+    user_ids = insert(User, (
+        User(username=f'gamer{start + n}', password=passwords[(start + n) % password_pool],
+             first_name='Gamer', last_name=str(start + n))
+        for n in range(count)
+    ), batch_size)
+    load(Token, (Token(key=Token.generate_key(), user_id=user_id) for user_id in user_ids),
+         batch_size)
+    return insert(Gamer, (Gamer(user_id=user_id, bio='Seeded') for user_id in user_ids),
+                  batch_size)
+
+
+def next_gamer_number():
+    """The number after the highest seeded username (gamer<n>), counting the users would
+    reuse a name once any user was deleted or added by hand
+    """
+    # the longest name is the highest number, the seeder does not pad them with zeros
+    last = (User.objects.filter(username__regex=r'^gamer[0-9]+$')
+            .order_by(Length('username').desc(), '-username')
+            .values_list('username', flat=True).first())
+    return 0 if last is None else int(last.removeprefix('gamer')) + 1
+
+
+def password_for(username, password_pool=PASSWORD_POOL):
+    """The password seed_gamers gave a user, ie for logging in as them in the bench
+    """
+    return f'{PASSWORD}{int(username.removeprefix("gamer")) % password_pool}'
+
+
+def hash_passwords(pool):
+    """Hashes the pool of passwords across the cpus, each hash is deliberately slow
+
+    Returns:
+        list -- the hashed passwords, in the order of the pool
+    """
+    with ProcessPoolExecutor() as executor:
+        return list(executor.map(make_password, [f'{PASSWORD}{n}' for n in range(pool)]))
+
+
+def insert(model, rows, batch_size=BATCH_SIZE):
+    """bulk_creates the rows a batch at a time so only one batch is in memory
+
+    Returns:
+        list -- the primary keys of the rows written
+    """
+    pks = []
+    for batch in batches(model, rows, batch_size):
+        pks += [row.pk for row in batch]
+    return pks
+
+
+def load(model, rows, batch_size=BATCH_SIZE):
+    """insert() for rows nothing refers to, only the count is kept
+
+    Returns:
+        int -- the number of rows written
+    """
+    return sum(len(batch) for batch in batches(model, rows, batch_size))
+
+
+def load_rows(model, fields, rows, batch_size=BATCH_SIZE):
+    """Writes plain tuples of values with executemany, for the biggest tables. Building a
+    model instance and compiling the INSERT through the ORM costs more than the insert
+    itself at this volume.
+
+    Args:
+        fields: the model's field names, in the order of the values in each row
+
+    Returns:
+        int -- the number of rows written
+    """
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(model._meta.get_field(field).column) for field in fields)
+    sql = (f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+           f"VALUES ({', '.join(['%s'] * len(fields))})")
+    count = 0
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return count
+        with transaction.atomic(), connection.cursor() as db_cursor:
+            db_cursor.executemany(sql, batch)
+        count += len(batch)
+
+
+def with_start(*row):
+    """Adds starts_at and an attendees_count of 0 to an event row ending with its date and
+    time, load_rows() does not go through the signals that set them
+    """
+    date, time = row[-2:]
+    return (*row, connection.ops.adapt_datetimefield_value(Event.start_of(date, time)), 0)
+
+
+def load_new(model, fields, rows, batch_size=BATCH_SIZE):
+    """load_rows() for rows that are referred to later
+
+    Returns:
+        list -- the primary keys of the rows written
+    """
+    last = model.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    load_rows(model, fields, rows, batch_size)
+    return list(model.objects.filter(pk__gt=last).order_by('pk').values_list('pk', flat=True))
+
+
+def batches(model, rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        with transaction.atomic():
+            batch = model.objects.bulk_create(batch)
+        yield batch
+
+
+def finish(stdout=None):
+    """Brings the counters, search index, reports and version stamps up to date after
+    seeding
+    """
+    if stdout is not None:
+        stdout.write('counting, indexing and building reports')
+    counters.reconcile()
+    search.reindex(Game)
+    search.reindex(Event)
+    materialized.rebuild()
+    versioning.bump(User, Gamer, GameType, Game, Event, EventGamer)
@@ -0,0 +1,175 @@
+"""Signal receivers that keep the levelupapi caches in step with the database, and set up
+new database connections"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from rest_framework.authtoken.models import Token
+
+from levelupapi import counters, search, timing, versioning
+from levelupapi.authentication import token_cache
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+
+# sent by the bulk endpoints after a bulk_create/bulk_update, which skip post_save,
+# with the arguments: sender (the model), instances, created, using
+bulk_saved = Signal()
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """A deleted token has to stop authenticating right away
+    """
+    token_cache.discard(instance.key)
+
+
+@receiver(post_save, sender=Gamer)
+@receiver(post_delete, sender=Gamer)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user(sender, instance, **kwargs):
+    """Drops the cached token entries for a gamer or user that was changed or deleted,
+    so request.gamer and request.user are never stale (ie, a deactivated user)
+    """
+    user_id = instance.user_id if isinstance(instance, Gamer) else instance.pk
+    token_cache.discard_user(user_id)
+
+
+@receiver(pre_save, sender=Event)
+def set_starts_at(sender, instance, **kwargs):
+    """Keeps Event.starts_at in step with its date and time, this also runs for
+    fixtures. bulk_create/bulk_update skip it, the bulk serializer calls it itself.
+    """
+    instance.starts_at = Event.start_of(instance.date, instance.time)
+
+
+@receiver(post_save, sender=Event)
+def count_event(sender, instance, created, using, **kwargs):
+    """Keeps Game.event_count in step when an event is added or moved to another game
+    """
+    if created:
+        counters.add_events([instance.game_id], 1, using)
+        instance.loaded_game_id = instance.game_id
+    else:
+        counters.move_events([instance], using)
+
+
+@receiver(bulk_saved, sender=Event)
+def bulk_count_events(sender, instances, created, using, **kwargs):
+    if created:
+        counters.add_events([instance.game_id for instance in instances], 1, using)
+        for instance in instances:
+            instance.loaded_game_id = instance.game_id
+    else:
+        counters.move_events(instances, using)
+
+
+@receiver(post_delete, sender=Event)
+def uncount_event(sender, instance, using, origin=None, **kwargs):
+    # a deleted game takes its events, and its event_count, with it
+    if deleted_with(origin, Game):
+        return
+    counters.add_events([instance.game_id], -1, using)
+
+
+@receiver(post_save, sender=EventGamer)
+def count_attendee(sender, instance, created, using, **kwargs):
+    """levelupapi.rsvp counts its own signups and leaves, these cover every other write
+    to the join table, ie the rows deleted along with a gamer
+    """
+    if created:
+        counters.add_attendees(instance.event_id, 1, using)
+
+
+@receiver(post_delete, sender=EventGamer)
+def uncount_attendee(sender, instance, using, origin=None, **kwargs):
+    if deleted_with(origin, Event, Game):
+        return
+    counters.add_attendees(instance.event_id, -1, using)
+
+
+@receiver(m2m_changed, sender=Event.attendees.through)
+def recount_attendees(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """attendees.add() and set() (ie loading the fixtures) write the join table with
+    bulk_create, the events they added to are recounted. The rows they remove go through
+    uncount_attendee.
+    """
+    if action != 'post_add':
+        return
+    counters.recount('attendees_count', pk_set if reverse else [instance.pk], using)
+
+
+def deleted_with(origin, *models):
+    """Whether the delete was started on one of the models (an instance or a queryset),
+    ie the rows went in a cascade from it
+    """
+    model = getattr(origin, 'model', type(origin))
+    return model in models
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_save, sender=Event)
+def index_for_search(sender, instance, using, **kwargs):
+    """Keeps the full text search tables in step with the games and events
+    """
+    search.index([instance], using)
+
+
+@receiver(bulk_saved, sender=Game)
+@receiver(bulk_saved, sender=Event)
+def bulk_index_for_search(sender, instances, using, **kwargs):
+    search.index(instances, using)
+
+
+@receiver(post_delete, sender=Game)
+@receiver(post_delete, sender=Event)
+def unindex_for_search(sender, instance, using, **kwargs):
+    search.unindex(sender, [instance.pk], using)
+
+
+@receiver(post_save, sender=GameType)
+@receiver(post_save, sender=Game)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=EventGamer)
+@receiver(post_save, sender=Gamer)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=GameType)
+@receiver(post_delete, sender=Game)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=EventGamer)
+@receiver(post_delete, sender=Gamer)
+@receiver(post_delete, sender=User)
+@receiver(bulk_saved, sender=Game)
+@receiver(bulk_saved, sender=Event)
+def bump_version(sender, using, **kwargs):
+    """Any write moves the model's version forward, which changes the ETags of the
+    responses built from it
+    """
+    versioning.bump(sender, using=using)
+
+
+@receiver(m2m_changed, sender=Event.attendees.through)
+def bump_attendees_version(sender, action, using, **kwargs):
+    """attendees.add()/remove() write the join table without a post_save
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        versioning.bump(EventGamer, using=using)
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """Applies settings.LEVELUP_SQLITE_PRAGMAS to every new SQLite connection, PostgreSQL
+    connections are left alone
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in getattr(settings, 'LEVELUP_SQLITE_PRAGMAS', {}).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def record_queries(sender, connection, **kwargs):
+    """Counts and times the queries of the requests sampled by ServerTimingMiddleware
+    """
+    if timing.record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(timing.record_query)
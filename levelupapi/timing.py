@@ -0,0 +1,92 @@
+"""Per request query count and timings, reported by levelupapi.middleware.ServerTimingMiddleware.
+While a sampled request is running its RequestTimings is the current one, every query run
+on any connection (see levelupapi.signals.record_queries) and every timed() block adds to
+it. Outside of a sampled request recording is a single context variable lookup.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar('levelup_request_timings', default=None)
+
+
+class RequestTimings:
+    """The queries and the time spent in each phase of one request, in seconds
+    - db: running queries, including the ones a serializer triggers
+    - serialize: turning models into the response data
+    - render: turning the response data into JSON/HTML
+    - total: the whole request, as seen by the middleware
+    """
+    PHASES = ('db', 'serialize', 'render', 'total')
+
+    def __init__(self):
+        self.queries = 0
+        self.durations = dict.fromkeys(self.PHASES, 0.0)
+        self._started = {}
+
+    def add(self, phase, seconds):
+        self.durations[phase] += seconds
+
+    def start(self, phase):
+        self._started[phase] = time.perf_counter()
+
+    def stop(self, phase):
+        started = self._started.pop(phase, None)
+        if started is not None:
+            self.add(phase, time.perf_counter() - started)
+
+    def milliseconds(self):
+        return {phase: round(seconds * 1000, 3) for phase, seconds in self.durations.items()}
+
+    def server_timing(self):
+        """The value of the Server-Timing header, ie db;desc="3 queries";dur=1.234, ...
+        """
+        durations = self.milliseconds()
+        metrics = [f'db;desc="{self.queries} queries";dur={durations["db"]}']
+        metrics += [f'{phase};dur={durations[phase]}' for phase in self.PHASES[1:]]
+        return ', '.join(metrics)
+
+
+def current():
+    """The timings being recorded for this request, or None when it is not sampled
+    """
+    return _current.get()
+
+
+def activate(timings):
+    """Makes the timings the current ones, returns the token to pass to deactivate
+    """
+    return _current.set(timings)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    """Adds the time spent in the block to the phase of the current request
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(phase, time.perf_counter() - started)
+
+
+def record_query(execute, sql, params, many, context):
+    """A database execute wrapper that counts and times the query for the current request
+    """
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.add('db', time.perf_counter() - started)
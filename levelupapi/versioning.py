@@ -0,0 +1,70 @@
+"""Per model version stamps.
+Every write to a versioned model bumps its row in levelupapi_tableversion (see
+levelupapi.signals), so reading one row per model is enough to know whether anything a
+response was built from has changed since.
+"""
+from django.db.models import F
+from django.utils import timezone
+
+from levelupapi.models import TableVersion
+
+
+def label(model):
+    """The key a model is versioned under, ie "levelupapi.game"
+    """
+    return model._meta.label_lower
+
+
+def bump(*models, using='default'):
+    """Moves the version of each model forward after a write
+    """
+    now = timezone.now()
+    for model in models:
+        versions = TableVersion.objects.using(using).filter(table=label(model))
+        if not versions.update(version=F('version') + 1, updated=now):
+            # first write since the table started being versioned
+            TableVersion.objects.using(using).get_or_create(table=label(model))
+            versions.update(version=F('version') + 1, updated=now)
+
+
+def read(*models):
+    """Reads the versions of all of the models with one query
+
+    Returns:
+        tuple -- (versions in the order of the models, the latest update or None)
+    """
+    return _collect(models, _versions(models))
+
+
+async def aread(*models):
+    """read() for the async views
+    """
+    return _collect(models, [row async for row in _versions(models)])
+
+
+def _versions(models):
+    return TableVersion.objects.filter(table__in=[label(model) for model in models])
+
+
+def _collect(models, rows):
+    rows = {row.table: row for row in rows}
+    versions = []
+    updated = None
+    for model in models:
+        row = rows.get(label(model), None)
+        versions.append(row.version if row is not None else 0)
+        if row is not None and row.updated is not None:
+            updated = row.updated if updated is None else max(updated, row.updated)
+    return tuple(versions), updated
+
+
+def read_for_request(request, *models):
+    """read(), remembered on the request so the ETag check and the payload cache share
+    one version query
+    """
+    remembered = getattr(request, '_table_versions', None)
+    if remembered is None:
+        remembered = request._table_versions = {}
+    if models not in remembered:
+        remembered[models] = read(*models)
+    return remembered[models]
@@ -2,3 +2,4 @@ from .auth import login_user, register_user
 from .game_type import GameTypeView, GameTypeSerializer
 from .event import EventView, EventSerializer
 from .game import GameView, GameSerializer
+from .gamer_import import import_gamers, import_progress
@@ -0,0 +1,181 @@
+"""Async versions of the read endpoints, used when the app is served over ASGI
+(see levelup/urls_async.py). The database reads use the async ORM so a worker is not
+tied up while a slow client is waiting on its response. Writes still go to the
+regular viewsets, which are run in a thread.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from levelupapi.authentication import aresolve_token
+from levelupapi.credentials import LoginBusy, alog_in
+from levelupapi.models import Event, Game, GameType
+from levelupapi.timing import timed
+from levelupapi.views.conditional import aconditional
+from levelupapi.views.event import (EVENT_MODELS, EventSerializer, events_payload,
+                                    joined_event_ids, overlay_joined)
+from levelupapi.views.fieldsets import requested_fieldset
+from levelupapi.views.game import (GAME_LIST_MODELS, GAME_MODELS, GameSerializer,
+                                   games_payload, overlay_user_event_counts,
+                                   user_event_counts)
+from levelupapi.views.game_type import GameTypeSerializer
+from levelupapi.views.payload_cache import acached_payload
+
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    """Renders the data the same way the DRF views do
+    """
+    with timed('render'):
+        content = JSONRenderer().render(data)
+    return HttpResponse(content, status=status_code, content_type='application/json',
+                        headers=headers)
+
+
+def token_required(view):
+    """Async stand in for GamerTokenAuthentication + IsAuthenticated, sets request.user,
+    request.auth and request.gamer or answers with the same 401 DRF would
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        header = request.META.get('HTTP_AUTHORIZATION', '').split()
+        if not header or header[0].lower() != 'token':
+            return _unauthorized(exceptions.NotAuthenticated())
+        if len(header) != 2:
+            return _unauthorized(exceptions.AuthenticationFailed('Invalid token header.'))
+        try:
+            request.user, request.auth, request.gamer = await aresolve_token(header[1])
+        except exceptions.AuthenticationFailed as ex:
+            return _unauthorized(ex)
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def reads_async(async_view, sync_view):
+    """Sends GET/HEAD to the async view and everything else to the regular viewset in a
+    thread, so one url serves both
+    """
+    sync_view = sync_to_async(sync_view)
+
+    @csrf_exempt
+    async def view(request, *args, **kwargs):
+        if request.method in ('GET', 'HEAD'):
+            return await async_view(request, *args, **kwargs)
+        return await sync_view(request, *args, **kwargs)
+    return view
+
+
+@token_required
+@aconditional(GameType)
+async def game_type_list(request, versions):
+    game_types = [game_type async for game_type in GameType.objects.all()]
+    return json_response(GameTypeSerializer(game_types, many=True).data)
+
+
+@token_required
+@aconditional(GameType)
+async def game_type_detail(request, pk, versions):
+    try:
+        game_type = await GameType.objects.aget(pk=pk)
+    except GameType.DoesNotExist as ex:
+        return json_response({'message': ex.args[0]}, status.HTTP_404_NOT_FOUND)
+    return json_response(GameTypeSerializer(game_type).data)
+
+
+# user_event_count is different for every gamer
+@token_required
+@aconditional(*GAME_LIST_MODELS, per_gamer=True)
+async def game_list(request, versions):
+    """Same query params and response as GameView.list. On a cache miss the shared payload
+    is built by the regular serializers in a thread, the per gamer counts are always
+    read here
+    """
+    drf_request = Request(request)
+    # a query param that is not valid is answered here, outside of DRF's exception handling
+    try:
+        data = await acached_payload(request, *versions,
+                                     sync_to_async(lambda: games_payload(drf_request)))
+    except exceptions.ValidationError as ex:
+        return json_response(ex.detail, status.HTTP_400_BAD_REQUEST)
+    counts = {game_id: count async for game_id, count in user_event_counts(request.gamer)}
+    overlay_user_event_counts(data, counts)
+    return json_response(data)
+
+
+@token_required
+@aconditional(*GAME_MODELS)
+async def game_detail(request, pk, versions):
+    fields, expand = requested_fieldset(Request(request))
+    # eager_load joins/prefetches every relation the serializer reads, so serializing
+    # afterwards does not run any more queries
+    games = GameSerializer.eager_load(Game.objects.all(), fields, expand)
+    try:
+        game = await games.aget(pk=pk)
+    except Game.DoesNotExist as ex:
+        return json_response({'message': ex.args[0]}, status.HTTP_404_NOT_FOUND)
+    return json_response(GameSerializer(game, fields=fields, expand=expand).data)
+
+
+# joined is different for every gamer, and ?upcoming= is counted from today
+@token_required
+@aconditional(*EVENT_MODELS, per_gamer=True, per_day=True)
+async def event_list(request, versions):
+    """Same query params and response as EventView.list
+    """
+    drf_request = Request(request)
+    # a query param that is not valid is answered here, outside of DRF's exception handling
+    try:
+        data = await acached_payload(request, *versions,
+                                     sync_to_async(lambda: events_payload(drf_request)),
+                                     per_day=True)
+    except exceptions.ValidationError as ex:
+        return json_response(ex.detail, status.HTTP_400_BAD_REQUEST)
+    joined = {event_id async for event_id in joined_event_ids(request.gamer)}
+    overlay_joined(data, joined)
+    return json_response(data)
+
+
+@token_required
+@aconditional(*EVENT_MODELS)
+async def event_detail(request, pk, versions):
+    fields, expand = requested_fieldset(Request(request))
+    events = EventSerializer.eager_load(Event.objects.all(), fields, expand)
+    try:
+        event = await events.aget(pk=pk)
+    except Event.DoesNotExist as ex:
+        return json_response({'message': ex.args[0]}, status.HTTP_404_NOT_FOUND)
+    return json_response(EventSerializer(event, fields=fields, expand=expand).data)
+
+
+@csrf_exempt
+async def login_user(request):
+    '''Async login_user, the password is checked on the bounded login pool so it does
+    not hold up the event loop
+
+    Method arguments:
+      request -- The full HTTP request object
+    '''
+    if request.method != 'POST':
+        return json_response({'detail': f'Method "{request.method}" not allowed.'},
+                             status.HTTP_405_METHOD_NOT_ALLOWED)
+    parsers = [parser() for parser in api_settings.DEFAULT_PARSER_CLASSES]
+    data = Request(request, parsers=parsers).data
+    try:
+        token = await alog_in(data['username'], data['password'])
+    except LoginBusy as ex:
+        return json_response({'detail': ex.detail}, ex.status_code,
+                             headers={'Retry-After': str(ex.wait)})
+
+    if token is not None:
+        return json_response({'valid': True, 'token': token.key})
+    return json_response({'valid': False})
+
+
+def _unauthorized(ex):
+    return json_response({'detail': ex.detail}, ex.status_code,
+                         headers={'WWW-Authenticate': 'Token'})
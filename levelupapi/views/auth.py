@@ -1,10 +1,10 @@
-from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from rest_framework.authtoken.models import Token
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from levelupapi.credentials import log_in
 from levelupapi.models import Gamer
 
 @api_view(['POST'])
@@ -18,13 +18,13 @@ def login_user(request):
     username = request.data['username']
     password = request.data['password']
 
-    # Use the built-in authenticate method to verify
-    # authenticate returns the user object or None if no user is found
-    authenticated_user = authenticate(username=username, password=password)
+    # The password is checked on the bounded login pool, see levelupapi.credentials,
+    # the user comes back with their token. When the pool is full this raises
+    # LoginBusy, which answers 503 with a Retry-After header
+    token = log_in(username, password)
 
     # If authentication was successful, respond with their token
-    if authenticated_user is not None:
-        token = Token.objects.get(user=authenticated_user)
+    if token is not None:
         data = {
             'valid': True,
             'token': token.key
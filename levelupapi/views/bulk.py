@@ -0,0 +1,156 @@
+"""Batch create and update support for the create serializers"""
+from django.db import transaction
+from django.db.models.signals import pre_save
+from rest_framework import serializers
+
+from levelupapi.signals import bulk_saved
+
+# the most items one bulk request may hold
+BULK_MAX_ITEMS = 1000
+# rows per INSERT/UPDATE statement
+BULK_BATCH_SIZE = 500
+
+
+def to_pk(model, value):
+    """The value as the model's primary key type, or None when it is not a valid key
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return model._meta.pk.to_python(value)
+    except Exception:
+        return None
+
+
+def instances_for_update(queryset, data):
+    """Loads every object a bulk update refers to with one query
+
+    Returns:
+        dict -- {pk: instance} for the ids in the items that exist
+    """
+    if not isinstance(data, list):
+        return {}
+    pks = {to_pk(queryset.model, item.get('id', None)) for item in data if isinstance(item, dict)}
+    pks.discard(None)
+    return queryset.in_bulk(pks)
+
+
+def send_pre_save(model, instances):
+    """bulk_create/bulk_update do not send pre_save, the receivers that fill in derived
+    fields (ie levelupapi.signals.set_starts_at) are run here instead
+    """
+    for instance in instances:
+        pre_save.send(sender=model, instance=instance, raw=False, using=model.objects.db,
+                      update_fields=None)
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """A primary key field that looks its object up in the objects the bulk list serializer
+    loaded for the whole batch, instead of running a query for every item. Outside of a
+    bulk request it works the same as PrimaryKeyRelatedField.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get('preloaded', {}).get(self.get_queryset().model, None)
+        if preloaded is None:
+            return super().to_internal_value(data)
+        pk = to_pk(self.get_queryset().model, data)
+        if pk is None:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in preloaded:
+            self.fail('does_not_exist', pk_value=data)
+        return preloaded[pk]
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Validates a list of items with the child serializer, then writes them with one
+    bulk_create/bulk_update inside a single transaction. The validation errors come back
+    as a list lined up with the items that were sent, {} for the items that were valid.
+
+    For updates the serializer is given a dictionary of {pk: instance} (ie from in_bulk)
+    and every item has to carry its id.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('max_length', BULK_MAX_ITEMS)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) <= self.max_length:
+            self.preload_related(data)
+        try:
+            return super().to_internal_value(data)
+        except serializers.ValidationError as ex:
+            # newer DRF versions can report item errors as {index: errors}
+            if isinstance(ex.detail, dict) and all(isinstance(key, int) for key in ex.detail):
+                raise serializers.ValidationError(
+                    [ex.detail.get(index, {}) for index in range(len(data))]
+                ) from ex
+            raise
+
+    def preload_related(self, data):
+        """Loads every object the items point at with one query per related table
+        """
+        preloaded = self._context.setdefault('preloaded', {})
+        for name, field in self.child.fields.items():
+            if not isinstance(field, PreloadedPrimaryKeyRelatedField):
+                continue
+            queryset = field.get_queryset()
+            # missing or malformed ids are left for the field to report on that item
+            pks = {to_pk(queryset.model, item.get(name, None))
+                   for item in data if isinstance(item, dict)}
+            pks.discard(None)
+            preloaded[queryset.model] = queryset.in_bulk(pks)
+
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            instance = None
+            if isinstance(data, dict):
+                pk = to_pk(self.child.Meta.model, data.get('id', None))
+                instance = self.instance.get(pk, None)
+            if instance is None:
+                raise serializers.ValidationError({'id': ['No item with this id.']})
+            self.child.instance = instance
+            self.child.initial_data = data
+        return super().run_child_validation(data)
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        instances = [model(**attrs) for attrs in validated_data]
+        send_pre_save(model, instances)
+        with transaction.atomic():
+            instances = model.objects.bulk_create(instances, batch_size=BULK_BATCH_SIZE)
+            bulk_saved.send(sender=model, instances=instances, created=True,
+                            using=model.objects.db)
+        return instances
+
+    def update(self, instance, validated_data):
+        model = self.child.Meta.model
+        instances = []
+        fields = set()
+        for attrs in self.validated_data_with_ids(validated_data):
+            item = instance[attrs.pop('id')]
+            for attr, value in attrs.items():
+                setattr(item, attr, value)
+            fields.update(attrs)
+            instances.append(item)
+        send_pre_save(model, instances)
+        # columns the model works out from the fields that changed, ie Event.starts_at
+        for derived, inputs in getattr(model, 'DERIVED_FIELDS', {}).items():
+            if fields & set(inputs):
+                fields.add(derived)
+
+        with transaction.atomic():
+            if fields:
+                model.objects.bulk_update(instances, list(fields), batch_size=BULK_BATCH_SIZE)
+            bulk_saved.send(sender=model, instances=instances, created=False,
+                            using=model.objects.db)
+        return instances
+
+    def validated_data_with_ids(self, validated_data):
+        """The id is a read only field so it is not in validated_data, it is put back from
+        the items that were sent, which are in the same order
+        """
+        model = self.child.Meta.model
+        for attrs, item in zip(validated_data, self.initial_data):
+            yield {**attrs, 'id': to_pk(model, item['id'])}
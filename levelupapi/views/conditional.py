@@ -0,0 +1,98 @@
+"""ETag / Last-Modified support for the read endpoints"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response
+from django.utils import timezone
+from django.utils.http import http_date, quote_etag
+
+from levelupapi import versioning
+
+
+def conditional(*models, per_gamer=False, per_day=False):
+    """Decorates a viewset method so it answers If-None-Match / If-Modified-Since with a
+    304 when none of the models it reads from have been written to, before the view runs
+    any of its own queries.
+
+    Args:
+        models: every model the response is built from, including embedded ones
+        per_gamer (bool): the response has fields for the logged in gamer (ie joined),
+            so each gamer gets their own ETag
+        per_day (bool): the response depends on today's date (ie ?upcoming=), so the
+            ETag changes at midnight
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            versions, updated = versioning.read_for_request(request, *models)
+            validators = make_validators(request, versions, updated, per_gamer, per_day)
+
+            not_modified = not_modified_response(request, *validators)
+            if not_modified is not None:
+                return not_modified
+
+            response = method(self, request, *args, **kwargs)
+            return set_validators(response, *validators)
+        return wrapper
+    return decorator
+
+
+def aconditional(*models, per_gamer=False, per_day=False):
+    """conditional() for the async views, the versions are read with the async ORM and
+    passed on to the view as versions=(versions, updated) so it can key its payload cache
+    on them without reading them again
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            versions, updated = await versioning.aread(*models)
+            validators = make_validators(request, versions, updated, per_gamer, per_day)
+
+            not_modified = not_modified_response(request, *validators)
+            if not_modified is not None:
+                return not_modified
+
+            response = await view(request, *args, versions=(versions, updated), **kwargs)
+            return set_validators(response, *validators)
+        return wrapper
+    return decorator
+
+
+def make_validators(request, versions, updated, per_gamer=False, per_day=False):
+    """Builds the ETag and Last-Modified time for a response from the model versions
+
+    Returns:
+        tuple -- (etag, last modified timestamp or None)
+    """
+    parts = [
+        request.get_full_path(),
+        request.META.get('HTTP_ACCEPT', ''),
+        ','.join(str(version) for version in versions),
+        # a flushed database starts its versions over, the time of the last write does not
+        str(updated.timestamp() if updated is not None else ''),
+    ]
+    if per_gamer:
+        parts.append(str(request.gamer.pk if request.gamer is not None else ''))
+    if per_day:
+        parts.append(timezone.localdate().isoformat())
+    etag = quote_etag(hashlib.sha1('|'.join(parts).encode()).hexdigest())
+    last_modified = int(updated.timestamp()) if updated is not None else None
+    return etag, last_modified
+
+
+def not_modified_response(request, etag, last_modified):
+    """The 304 (or 412) response for the request's conditional headers, or None when the
+    view has to build the response
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None and response.status_code == 304:
+        response['ETag'] = etag
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code == 200:
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -1,19 +1,40 @@
 """View module for handling requests about events"""
+import datetime
+
+from django.conf import settings
 from django.http import HttpResponseServerError
-from django.db.models import Count
-from django.db.models import Q
+from django.db.models import Value
 from django.core.exceptions import ValidationError
+from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework import serializers, status
-from levelupapi.models import Event, Game, Gamer
+from levelupapi.models import Event, EventGamer, Game, Gamer, GameType
+from levelupapi.views.conditional import conditional
+from levelupapi.views.payload_cache import cached_payload, payload_items
+from levelupapi import rsvp
+from levelupapi import search as full_text
+from levelupapi.timing import timed
+from levelupapi.views.pagination import (CompositeKeysetPagination, KeysetPagination,
+                                         requested_order)
+from levelupapi.views.values_serializer import serialize_list
+from levelupapi.views.fieldsets import FieldsetSerializerMixin, requested_fieldset
+from levelupapi.views.bulk import (BulkListSerializer, PreloadedPrimaryKeyRelatedField,
+                                   instances_for_update, to_pk)
+
+
+# the models an event response is built from, a write to any of them changes its ETag
+EVENT_MODELS = (Event, EventGamer, Game, GameType, Gamer, User)
 
 
 class EventView(ViewSet):
     """Level up events view
     """
 
+    @conditional(*EVENT_MODELS)
     def retrieve(self, request, pk):
         """Handles the GET requests for a single event
 
@@ -21,50 +42,53 @@ class EventView(ViewSet):
             pk (int): the primary key for the event
 
         Returns:
-            Response -- JSON serialized game type
+            Response -- JSON serialized event, ?fields= and ?expand= work the same as the list
         """
         try:
-            event = Event.objects.get(pk=pk)
-            serializer = EventSerializer(event)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            fields, expand = requested_fieldset(request)
+            events = EventSerializer.eager_load(Event.objects.all(), fields, expand)
+            event = events.get(pk=pk)
+            with timed('serialize'):
+                data = EventSerializer(event, fields=fields, expand=expand).data
+            return Response(data, status=status.HTTP_200_OK)
         except Event.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
+    # joined is different for every gamer, and ?upcoming= is counted from today
+    @conditional(*EVENT_MODELS, per_gamer=True, per_day=True)
     def list(self, request):
         """Handles the GET requests for all events in the database
-        - using Q to query the event table, aggregating how many total attendees there are.
-        And determining if the current user has rsvped or not.
+        - the events are read once for every gamer and cached, attendees_count is a column
+        kept by levelupapi.counters. joined, whether the current gamer signed up, is filled
+        in afterwards from the gamer's own signups.
+        - ?game= only returns the events for that game.
+        - sending ?limit= and/or ?cursor= pages the results by id, the response is then
+        {"next": url, "prev": url, "results": [...]}
+        - ?fields=id,date,time,game picks the fields returned and ?expand=game picks which
+        relations are embedded, the rest come back as ids. Only the embedded relations
+        are joined.
+        - ?q= is a full text search over the description, every word is matched as a prefix
+        and the results come back best match first.
+        - ?from= and ?to= (a date or an ISO datetime) or ?upcoming=<days> only return the
+        events starting in that window, in start time order. A date for ?to= includes the
+        whole day. ?upcoming=<days> starts at midnight today, so it includes today's events
+        that already started, and ?upcoming=0 is all of today.
+        - ?order=popular returns the events with the most attendees first, read off the
+        attendees_count column and its index.
 
         Returns:
             Response -- JSON serialized list of events
         """
-        gamer = Gamer.objects.get(user=request.auth.user)
-        
-        # no longer needed since annotate was added.
-        # events = Event.objects.all()
-        
-        events = Event.objects.annotate(
-            attendees_count=Count('attendees'),
-            joined=Count(
-                'attendees',
-                filter=Q(attendees=gamer)
-            )
-        )
-
-        # adding query for game id to the events url
-        game = request.query_params.get('game', None)
-        if game is not None:
-            events = events.filter(game_id=game)
-
-        # no longer needed sine the joined property is being set using the annotate.
-        # # Set the 'joined' property on every event
-        # for event in events:
-        #     # check to see if the gamer is in the attendees list on the event, this will
-        #     # evaluate to true of false if the gamer is in the attendees list
-        #     event.joined = gamer in event.attendees.all()
-
-        serializer = EventSerializer(events, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # the events with their attendee counts are the same for every gamer, so they are
+        # cached, joined is filled in for the gamer afterwards
+        data = cached_payload(request, EVENT_MODELS, lambda: events_payload(request, self),
+                              per_day=True)
+
+        # the gamer is attached by GamerTokenAuthentication
+        gamer = request.gamer
+        overlay_joined(data, set(joined_event_ids(gamer)))
+
+        return Response(data, status=status.HTTP_200_OK)
 
     # def create(self, request):
     #     """Handles the POST operations
@@ -86,13 +110,82 @@ class EventView(ViewSet):
     #     serializer = EventSerializer(event)
     #     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(methods=['GET'], detail=False)
+    @conditional(*EVENT_MODELS, per_gamer=True, per_day=True)
+    def calendar(self, request):
+        """GET request for the events in a window grouped by the day they start on
+        - the window is ?from=/?to= or ?upcoming=<days> the same as the list, by default
+        the next LEVELUP_CALENDAR_DAYS days, and it can be at most LEVELUP_CALENDAR_MAX_DAYS
+        long. ?game=, ?fields= and ?expand= work the same as the list.
+        - the events are read in start time order off the starts_at index, days without
+        events are left out
+
+        Returns:
+            Response -- [{"date": "2023-05-01", "events": [...]}, ...]
+        """
+        window = event_window(request.query_params, default_days=getattr(
+            settings, 'LEVELUP_CALENDAR_DAYS', 31))
+        max_days = getattr(settings, 'LEVELUP_CALENDAR_MAX_DAYS', 366)
+        # a window open at either end has no length to check, the calendar needs both
+        if window[0] is None:
+            raise serializers.ValidationError(
+                {'from': ['The calendar needs ?from= when ?to= is sent.']})
+        if window[1] is None:
+            raise serializers.ValidationError(
+                {'to': ['The calendar needs ?to= when ?from= is sent.']})
+        if window[1] - window[0] > datetime.timedelta(days=max_days):
+            raise serializers.ValidationError(
+                {'to': [f'The calendar can be at most {max_days} days long.']})
+
+        fields, expand = requested_fieldset(request)
+        # the days are worked out from the date of each event
+        if fields is not None and 'date' not in fields:
+            fields = (*fields, 'date')
+        events = events_in(events_for(request), window).order_by(*StartsAtPagination.ordering)
+        data = cached_payload(request, EVENT_MODELS, lambda: serialize_list(
+            request, events, EventSerializer, fields, expand, view=self,
+            paginator_class=NotPaginated
+        ), per_day=True)
+        overlay_joined(data, set(joined_event_ids(request.gamer)))
+
+        days = {}
+        for event in data:
+            days.setdefault(event['date'], []).append(event)
+        return Response([{'date': date, 'events': events} for date, events in days.items()],
+                        status=status.HTTP_200_OK)
+
     def create(self, request):
-        organizer = Gamer.objects.get(user=request.auth.user)
+        # the gamer is attached by GamerTokenAuthentication
+        organizer = request.gamer
         serializer = CreateEventSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save(organizer=organizer)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(methods=['POST', 'PUT'], detail=False)
+    def bulk(self, request):
+        """Handles POST (create) and PUT (update) of a list of events in one request
+        - every item is validated with the create event serializer, the games for the
+        whole list are looked up with one query, and the events are written with one
+        bulk_create/bulk_update inside a transaction. If any item is invalid nothing is
+        written and the response is a list of errors lined up with the items sent.
+        - for PUT every item needs the id of the event it updates
+
+        Returns:
+            Response -- JSON serialized list of the events written
+        """
+        if request.method == 'PUT':
+            events = instances_for_update(Event.objects.all(), request.data)
+            serializer = CreateEventSerializer(events, data=request.data, many=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        serializer = CreateEventSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(organizer=request.gamer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     def update(self, request, pk):
         """Handles the PUT requests for an event
 
@@ -103,6 +196,7 @@ class EventView(ViewSet):
         event.description = request.data["description"]
         event.date = request.data["date"]
         event.time = request.data["time"]
+        event.max_attendees = request.data.get("max_attendees", event.max_attendees)
 
         game = Game.objects.get(pk=request.data["game"])
         event.game = game
@@ -125,39 +219,65 @@ class EventView(ViewSet):
     @action(methods=['POST'], detail=True)
     def signup(self, request, pk):
         """POST request for a user to sign up for an event
+        - the gamer is added with one conditional insert into the join table, see
+        levelupapi.rsvp. Signing up again is not an error, it answers 200 instead of 201.
+        - an event with max_attendees that is full answers 409
+
+        Returns:
+            Response -- a message and the event's attendees_count after the signup
         """
-        # getting the gamer who is logged in and event object by its primary key
-        gamer = Gamer.objects.get(user=request.auth.user)
-        event = Event.objects.get(pk=pk)
+        # the gamer who is logged in is attached by GamerTokenAuthentication
+        outcome, count = rsvp.signup(to_pk(Event, pk), request.gamer.pk)
 
-        # adding the gamer variable to the event as an attendee.  Since the many to many field,
-        # attendees, is on the event model. the add() method creates the relationship between
-        # the event and the gamer by adding the event_id and the gamer_id to the join table
-        # then a 201 response is sent back
-        event.attendees.add(gamer)
-        return Response({'message': 'Gamer added'}, status=status.HTTP_201_CREATED)
+        if outcome == rsvp.NOT_FOUND:
+            return Response({'message': 'Event matching query does not exist.'},
+                            status=status.HTTP_404_NOT_FOUND)
+        if outcome == rsvp.FULL:
+            return Response({'message': 'Event is full', 'attendees_count': count},
+                            status=status.HTTP_409_CONFLICT)
+        if outcome == rsvp.ALREADY_JOINED:
+            return Response({'message': 'Gamer already added', 'attendees_count': count},
+                            status=status.HTTP_200_OK)
+        return Response({'message': 'Gamer added', 'attendees_count': count},
+                        status=status.HTTP_201_CREATED)
 
     @action(methods=['DELETE'], detail=True)
     def leave(self, request, pk):
-        """DELETE request for a user to sign up for an event
+        """DELETE request for a user to leave an event, leaving an event the gamer is not
+        signed up for changes nothing. An event that does not exist answers 404, the same
+        as signup.
+
+        Returns:
+            Response -- a message and the event's attendees_count after leaving
         """
-        # getting the gamer who is logged in and event object by its primary key
-        gamer = Gamer.objects.get(user=request.auth.user)
-        event = Event.objects.get(pk=pk)
+        outcome, count = rsvp.leave(to_pk(Event, pk), request.gamer.pk)
 
-        event.attendees.remove(gamer)
-        return Response({'message': 'Gamer removed'}, status=status.HTTP_204_NO_CONTENT)
+        if outcome == rsvp.NOT_FOUND:
+            return Response({'message': 'Event matching query does not exist.'},
+                            status=status.HTTP_404_NOT_FOUND)
+        message = 'Gamer removed' if outcome == rsvp.LEFT else 'Gamer was not attending'
+        return Response({'message': message, 'attendees_count': count},
+                        status=status.HTTP_200_OK)
 
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     """JSON serializer for events.
     """
-    attendees_count = serializers.IntegerField(default=None)
+    # lookups needed to embed each relation at depth 2
+    expand_select = {
+        'game': ('game__game_type', 'game__gamer'),
+        'organizer': ('organizer__user',),
+    }
+    expand_prefetch = {
+        'organizer': ('organizer__user__groups', 'organizer__user__user_permissions'),
+        'attendees': ('attendees__user__groups', 'attendees__user__user_permissions'),
+    }
 
     class Meta:
         model = Event
         fields = ('id', 'game', 'description', 'date',
-                  'time', 'organizer', 'attendees', 'joined', 'attendees_count')
+                  'time', 'organizer', 'attendees', 'joined', 'attendees_count',
+                  'max_attendees')
         # depth added for embed details, depth =1, gives details on the foreign keys (game,
         # organizer, attendees) when changed to 2, it embedded details from the foreign
         # keys for the organizer and attendees and game (but not gamer, that would be a
@@ -168,8 +288,179 @@ class EventSerializer(serializers.ModelSerializer):
 class CreateEventSerializer(serializers.ModelSerializer):
     """ JSON serializer for event creation.
     """
+    game = PreloadedPrimaryKeyRelatedField(queryset=Game.objects.all())
 
     class Meta:
         model = Event
         fields = ('id', 'game', 'description', 'date',
-                  'time')
+                  'time', 'max_attendees')
+        # used when many=True, for the bulk endpoint
+        list_serializer_class = BulkListSerializer
+
+
+class StartsAtPagination(CompositeKeysetPagination):
+    """Pages a window of events in start time order, the position is the start time and
+    the id, events created together often start at the same time
+    """
+    ordering = ('starts_at', 'id')
+
+
+class PopularEventsPagination(CompositeKeysetPagination):
+    """Pages the events from the most attendees down
+    """
+    ordering = ('-attendees_count', '-id')
+
+
+# the ?order= values of the events list
+EVENT_ORDERS = {'popular': PopularEventsPagination}
+
+
+class NotPaginated(KeysetPagination):
+    """For the calendar, which always returns its whole window
+    """
+
+    def is_requested(self, request):
+        return False
+
+
+def event_window(query_params, default_days=None):
+    """Reads ?from=, ?to= and ?upcoming= into the window of start times they ask for
+
+    Args:
+        default_days (int): the window when none of them was sent, this many days from
+            the start of today. None leaves the events unfiltered.
+
+    Returns:
+        tuple -- (start or None, end or None), the end is not included. (None, None) when
+        there is no window.
+
+    Raises:
+        serializers.ValidationError -- for a value that is not a date, datetime or number
+        of days, or a window that ends before it starts
+    """
+    start = window_bound(query_params, 'from')
+    end = window_bound(query_params, 'to', end=True)
+    upcoming = query_params.get('upcoming', None)
+
+    if upcoming is not None:
+        if start is not None or end is not None:
+            raise serializers.ValidationError(
+                {'upcoming': ['Send either ?upcoming= or ?from= and ?to=, not both.']})
+        try:
+            days = int(upcoming)
+        except ValueError:
+            days = -1
+        if days < 0:
+            raise serializers.ValidationError(
+                {'upcoming': ['Expected a number of days, 0 or more.']})
+    elif start is None and end is None:
+        if default_days is None:
+            return None, None
+        days = default_days
+    else:
+        if start is not None and end is not None and end <= start:
+            raise serializers.ValidationError({'to': ['The window ends before it starts.']})
+        return start, end
+
+    start = day_start(timezone.localdate())
+    return start, start + datetime.timedelta(days=days + 1)
+
+
+def window_bound(query_params, param, end=False):
+    value = query_params.get(param, None)
+    if value is None:
+        return None
+    # parse_datetime() would also take a date, as midnight
+    try:
+        day = parse_date(value)
+        moment = parse_datetime(value) if day is None else None
+    except ValueError:
+        day = moment = None
+    if day is not None:
+        # a day on its own is included in the window, to the end of it for ?to=
+        return day_start(day + datetime.timedelta(days=1) if end else day)
+    if moment is not None:
+        return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
+    raise serializers.ValidationError(
+        {param: ['Expected a date (YYYY-MM-DD) or an ISO 8601 datetime.']})
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def events_for(request):
+    """The events shared by every gamer, filtered by ?game=
+    """
+    # adding query for game id to the events url
+    game = request.query_params.get('game', None)
+
+    # joined is annotated as 0 to keep its place in the fields, it is filled in for the
+    # gamer by overlay_joined. attendees_count is a column kept by levelupapi.counters.
+    events = Event.objects.annotate(joined=Value(0))
+
+    if game is not None:
+        events = events.filter(game_id=game)
+    return events
+
+
+def events_in(events, window):
+    """The events starting in the window, a range scan of the starts_at index
+    """
+    start, end = window
+    if start is not None:
+        events = events.filter(starts_at__gte=start)
+    if end is not None:
+        events = events.filter(starts_at__lt=end)
+    return events
+
+
+def events_payload(request, view=None):
+    """Builds the part of the events list that every gamer shares, see EventView.list for
+    the query params
+
+    Returns:
+        list or dict -- the serialized events, or a page of them
+    """
+    window = event_window(request.query_params)
+    events = events_in(events_for(request), window)
+    fields, expand = requested_fieldset(request)
+    paginator_class = requested_order(request, EVENT_ORDERS)
+
+    # ?q= is ranked by relevance rather than ordered by id, so the best matches are cut
+    # off at the limit instead of being paged
+    q = request.query_params.get('q', None)
+    if q is not None:
+        events = EventSerializer.eager_load(events, fields, expand)
+        events = full_text.rank(events, q)[:KeysetPagination().get_page_size(request)]
+        with timed('serialize'):
+            return EventSerializer(events, many=True, fields=fields, expand=expand).data
+
+    # a window comes back in start time order, unless ?order= asked for another
+    if paginator_class is None and window != (None, None):
+        paginator_class = StartsAtPagination
+    if paginator_class is not None:
+        return serialize_list(request, events.order_by(*paginator_class.ordering),
+                              EventSerializer, fields, expand, view=view,
+                              paginator_class=paginator_class)
+
+    # the rows are read with values_list() instead of through model instances, and
+    # ?limit= and ?cursor= return a keyset page instead of every event
+    return serialize_list(request, events, EventSerializer, fields, expand, view=view)
+
+
+def joined_event_ids(gamer):
+    """The events the gamer signed up for, read from their own rows in the join table
+
+    Returns:
+        QuerySet -- event ids
+    """
+    return EventGamer.objects.filter(gamer=gamer).values_list('event_id', flat=True)
+
+
+def overlay_joined(data, joined):
+    """Fills in joined on the shared events payload from the set of joined event ids
+    """
+    for event in payload_items(data):
+        if 'joined' in event:
+            event['joined'] = 1 if event['id'] in joined else 0
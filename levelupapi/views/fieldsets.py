@@ -0,0 +1,92 @@
+"""Sparse fieldsets (?fields=) and relation expansion (?expand=) for the serializers"""
+from rest_framework import serializers
+
+
+def requested_fieldset(request):
+    """Reads the comma separated ?fields= and ?expand= query params
+
+    Returns:
+        tuple -- (fields, expand), either one is None when the param was not sent
+    """
+    def split(param):
+        value = request.query_params.get(param, None)
+        if value is None:
+            return None
+        return tuple(name.strip() for name in value.split(',') if name.strip())
+
+    return split('fields'), split('expand')
+
+
+class FieldsetSerializerMixin:
+    """Lets the view choose which fields come back and which relations get embedded.
+    - fields: only these fields (and the id) are serialized, everything else is dropped
+    - expand: only these relations are embedded (at the serializer's depth), the other
+    relations come back as primary keys
+
+    The relations a serializer can embed are the keys of expand_select (lookups joined with
+    select_related) and expand_prefetch (lookups loaded with prefetch_related), the values
+    are the lookups that relation needs to render. A relation can be in both.
+    """
+    expand_select = {}
+    expand_prefetch = {}
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.requested_fields = fields
+        self.requested_expand = expand
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        if self.requested_fields is not None:
+            for name in list(fields):
+                # the id is always returned, the views match per gamer fields on it
+                if name != 'id' and name not in self.requested_fields:
+                    fields.pop(name)
+
+        if self.requested_expand is not None:
+            for name in self.expandable():
+                if name in fields and name not in self.requested_expand:
+                    many = isinstance(fields[name], serializers.ListSerializer)
+                    fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, many=many)
+
+        return fields
+
+    @classmethod
+    def expandable(cls):
+        """All of the relation names this serializer knows how to embed
+        """
+        return list(dict.fromkeys([*cls.expand_select, *cls.expand_prefetch]))
+
+    @classmethod
+    def eager_load(cls, queryset, fields=None, expand=None):
+        """Joins and selects only what the requested fieldset needs, instead of letting
+        every embedded relation run its own query per row.
+
+        Returns:
+            QuerySet -- the queryset with select_related/prefetch_related/only applied
+        """
+        def wanted(name):
+            return ((fields is None or name in fields) and
+                    (expand is None or name in expand))
+
+        model = cls.Meta.model
+        for name, lookups in cls.expand_select.items():
+            if wanted(name):
+                queryset = queryset.select_related(*lookups)
+        for name, lookups in cls.expand_prefetch.items():
+            if wanted(name):
+                queryset = queryset.prefetch_related(*lookups)
+            elif (fields is None or name in fields) and model._meta.get_field(name).many_to_many:
+                # not embedded, but the list of ids still needs one query for every row
+                queryset = queryset.prefetch_related(name)
+
+        if fields is not None:
+            # only load the columns that will be serialized, the pk is always needed
+            columns = {'id'}
+            for field in model._meta.concrete_fields:
+                if field.name in fields:
+                    columns.add(field.name)
+            queryset = queryset.only(*columns)
+
+        return queryset
@@ -5,15 +5,33 @@ from django.db.models import Q
 from django.core.exceptions import ValidationError
 from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
+from rest_framework.decorators import action
 from rest_framework import serializers, status
 
-from levelupapi.models import Game, Gamer, GameType
+from levelupapi.models import Event, Game, Gamer, GameType
+from levelupapi.views.conditional import conditional
+from levelupapi.views.payload_cache import cached_payload, payload_items
+from levelupapi import search as full_text
+from levelupapi.timing import timed
+from levelupapi.views.pagination import (CompositeKeysetPagination, KeysetPagination,
+                                         requested_order)
+from levelupapi.views.values_serializer import serialize_list
+from levelupapi.views.fieldsets import FieldsetSerializerMixin, requested_fieldset
+from levelupapi.views.bulk import (BulkListSerializer, PreloadedPrimaryKeyRelatedField,
+                                   instances_for_update)
+
+
+# the models a game response is built from, a write to any of them changes its ETag.
+# event_count is moved with an UPDATE that bumps no Game version, so Event is listed too
+GAME_MODELS = (Game, GameType, Gamer, Event)
+GAME_LIST_MODELS = GAME_MODELS
 
 
 class GameView(ViewSet):
     """Level up games view
     """
 
+    @conditional(*GAME_MODELS)
     def retrieve(self, request, pk):
         """Handles the GET request for a single game
 
@@ -28,49 +46,45 @@ class GameView(ViewSet):
             response -- JSON serializers game for the selected key
         """
         try:
-            game = Game.objects.get(pk=pk)
-            serializer = GameSerializer(game)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            fields, expand = requested_fieldset(request)
+            games = GameSerializer.eager_load(Game.objects.all(), fields, expand)
+            game = games.get(pk=pk)
+            with timed('serialize'):
+                data = GameSerializer(game, fields=fields, expand=expand).data
+            return Response(data, status=status.HTTP_200_OK)
         except Game.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
+    # user_event_count is different for every gamer
+    @conditional(*GAME_LIST_MODELS, per_gamer=True)
     def list(self, request):
         """Handles the GET request for all games in the database
-        - using Q to search for games that start with a search term, could also use contains
-        this only searches the title and maker columns.
+        - the games are read once for every gamer and cached, event_count is a column kept
+        by levelupapi.counters. user_event_count, how many events the current gamer
+        organized for the game, is filled in afterwards from the gamer's own events.
+        - ?type= only returns the games of that game type, and ?search= the games whose
+        title or maker starts with the term.
+        - sending ?limit= and/or ?cursor= pages the results by id, the response is then
+        {"next": url, "prev": url, "results": [...]}
+        - ?fields= picks the fields returned and ?expand= picks which of game_type and gamer
+        are embedded, the rest come back as ids.
+        - ?q= is a full text search over title and maker, every word is matched as a prefix
+        anywhere in either column and the results come back best match first.
+        - ?order=popular returns the games with the most events first, read off the
+        event_count column and its index.
 
         Returns:
             Response: JSON serialized list of games
         """
-        # no longer needed since using annotate below
-        # games = Game.objects.all()
-
-        # check to see if there is a query in the url for game_type, then filter to
-        # match the id in the query
-        game_type = request.query_params.get('type', None)
-
-        search = self.request.query_params.get('search', None)
-        gamer = Gamer.objects.get(user=request.auth.user)
-
-        # counting the events per game
-        games = Game.objects.annotate(
-            event_count=Count('events'),
-            user_event_count=Count(
-                'events',
-                filter=Q(events__organizer=gamer)
-            )
-        )
+        # the games with their event counts are the same for every gamer, so they are
+        # cached, user_event_count is filled in for the gamer afterwards
+        data = cached_payload(request, GAME_LIST_MODELS, lambda: games_payload(request, self))
 
-        if game_type is not None:
-            games = games.filter(game_type_id=game_type)
-        if search is not None:
-            games = games.filter(
-                Q(title__startswith=search) |
-                Q(maker__startswith=search)
-            )
+        # the gamer is attached by GamerTokenAuthentication
+        gamer = request.gamer
+        overlay_user_event_counts(data, dict(user_event_counts(gamer)))
 
-        serializer = GameSerializer(games, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(data, status=status.HTTP_200_OK)
 
     # def create(self, request):
     #     """Handle POST operations
@@ -117,12 +131,37 @@ class GameView(ViewSet):
             Response -- JSON serialized game instance
         """
 
-        gamer = Gamer.objects.get(user=request.auth.user)
+        # the gamer is attached by GamerTokenAuthentication
+        gamer = request.gamer
         serializer = CreateGameSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         serializer.save(gamer=gamer)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(methods=['POST', 'PUT'], detail=False)
+    def bulk(self, request):
+        """Handles POST (create) and PUT (update) of a list of games in one request
+        - every item is validated with the create game serializer, the game types for the
+        whole list are looked up with one query, and the games are written with one
+        bulk_create/bulk_update inside a transaction. If any item is invalid nothing is
+        written and the response is a list of errors lined up with the items sent.
+        - for PUT every item needs the id of the game it updates
+
+        Returns:
+            Response -- JSON serialized list of the games written
+        """
+        if request.method == 'PUT':
+            games = instances_for_update(Game.objects.all(), request.data)
+            serializer = CreateGameSerializer(games, data=request.data, many=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_200_OK)
+
+        serializer = CreateGameSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(gamer=request.gamer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
     def update(self, request, pk):
         """Handle PUT requests for a game
 
@@ -163,12 +202,17 @@ class GameView(ViewSet):
         return Response(None, status=status.HTTP_204_NO_CONTENT)
 
 
-class GameSerializer(serializers.ModelSerializer):
+class GameSerializer(FieldsetSerializerMixin, serializers.ModelSerializer):
     """JSON serializer for games
     """
+    # lookups needed to embed each relation at depth 1
+    expand_select = {
+        'game_type': ('game_type',),
+        'gamer': ('gamer',),
+    }
+
     # *** remember to add the new fields created with annotate, so that it can be used by
     # the serializer since they are not on the model. ***
-    event_count = serializers.IntegerField(default=None)
     user_event_count = serializers.IntegerField(default=None)
 
     class Meta:
@@ -184,7 +228,87 @@ class GameSerializer(serializers.ModelSerializer):
 class CreateGameSerializer(serializers.ModelSerializer):
     """ serializer for create game, to validate inputs on create game
     """
+    game_type = PreloadedPrimaryKeyRelatedField(queryset=GameType.objects.all())
+
     class Meta:
         model = Game
         fields = ['id', 'title', 'maker',
                   'number_of_players', 'skill_level', 'game_type']
+        # used when many=True, for the bulk endpoint
+        list_serializer_class = BulkListSerializer
+
+
+class PopularGamesPagination(CompositeKeysetPagination):
+    """Pages the games from the most events down
+    """
+    ordering = ('-event_count', '-id')
+
+
+# the ?order= values of the games list
+GAME_ORDERS = {'popular': PopularGamesPagination}
+
+
+def games_payload(request, view=None):
+    """Builds the part of the games list that every gamer shares, see GameView.list for
+    the query params
+
+    Returns:
+        list or dict -- the serialized games, or a page of them
+    """
+    # check to see if there is a query in the url for game_type, then filter to
+    # match the id in the query
+    game_type = request.query_params.get('type', None)
+    search = request.query_params.get('search', None)
+
+    # event_count is a column kept by levelupapi.counters, user_event_count is left as
+    # None here
+    games = Game.objects.all()
+
+    if game_type is not None:
+        games = games.filter(game_type_id=game_type)
+    if search is not None:
+        games = games.filter(
+            Q(title__startswith=search) |
+            Q(maker__startswith=search)
+        )
+
+    fields, expand = requested_fieldset(request)
+    paginator_class = requested_order(request, GAME_ORDERS)
+
+    # ?q= is ranked by relevance rather than ordered by id, so the best matches are cut
+    # off at the limit instead of being paged
+    q = request.query_params.get('q', None)
+    if q is not None:
+        games = GameSerializer.eager_load(games, fields, expand)
+        games = full_text.rank(games, q)[:KeysetPagination().get_page_size(request)]
+        with timed('serialize'):
+            return GameSerializer(games, many=True, fields=fields, expand=expand).data
+
+    if paginator_class is not None:
+        return serialize_list(request, games.order_by(*paginator_class.ordering),
+                              GameSerializer, fields, expand, view=view,
+                              paginator_class=paginator_class)
+
+    # the rows are read with values_list() instead of through model instances, and
+    # ?limit= and ?cursor= return a keyset page instead of every game
+    return serialize_list(request, games, GameSerializer, fields, expand, view=view)
+
+
+def user_event_counts(gamer):
+    """How many events the gamer organized for each game, this uses the organizer index
+    and only reads the gamer's own events
+
+    Returns:
+        QuerySet -- (game_id, count) pairs
+    """
+    return (Event.objects.filter(organizer=gamer)
+            .values_list('game_id')
+            .annotate(count=Count('id')))
+
+
+def overlay_user_event_counts(data, counts):
+    """Fills in user_event_count on the shared games payload from {game_id: count}
+    """
+    for game in payload_items(data):
+        if 'user_event_count' in game:
+            game['user_event_count'] = counts.get(game['id'], 0)
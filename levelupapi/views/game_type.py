@@ -4,11 +4,14 @@ from rest_framework.viewsets import ViewSet
 from rest_framework.response import Response
 from rest_framework import serializers, status
 from levelupapi.models import GameType
+from levelupapi.views.conditional import conditional
+from levelupapi.views.values_serializer import compile_for
 
 
 class GameTypeView(ViewSet):
     """Level up game types view"""
 
+    @conditional(GameType)
     def retrieve(self, request, pk):
         """Handle GET requests for single game type.
         Using the retrieve method gests a single object based on the primary key, the serializer
@@ -27,6 +30,7 @@ class GameTypeView(ViewSet):
         except GameType.DoesNotExist as ex:
             return Response({'message': ex.args[0]}, status=status.HTTP_404_NOT_FOUND)
 
+    @conditional(GameType)
     def list(self, request):
         """Handle GET requests to get all game types from the database. game_types is now a list
         of all of the GameType objects, passed to the serializer, many=True is added to let
@@ -36,8 +40,12 @@ class GameTypeView(ViewSet):
             Response -- JSON serialized list of game types
         """
         game_types = GameType.objects.all()
-        serializer = GameTypeSerializer(game_types, many=True)
-        return Response(serializer.data)
+        # read with values_list(), see levelupapi.views.values_serializer. The list is not
+        # paged, it is every game type as before
+        compiled = compile_for(GameTypeSerializer, game_types)
+        if compiled is None:
+            return Response(GameTypeSerializer(game_types, many=True).data)
+        return Response(compiled.serialize(game_types))
 
 class GameTypeSerializer(serializers.ModelSerializer):
     """JSON serializer for game types.
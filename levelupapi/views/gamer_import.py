@@ -0,0 +1,53 @@
+"""View module for importing gamers in bulk"""
+from rest_framework import status
+from rest_framework.decorators import api_view, parser_classes, permission_classes
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from levelupapi import import_jobs, importing
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+@parser_classes([MultiPartParser])
+def import_gamers(request):
+    '''Starts importing the gamers in an uploaded CSV or NDJSON file, see
+    levelupapi.importing for the columns. Staff only.
+
+    Method arguments:
+      request -- multipart with the file as "file", and "file_format" (csv or ndjson)
+      when it cannot be told from the file name
+
+    Returns 202 with the job's id and progress, the import runs in the background and
+    its progress is read from GET /gamers/import/<id>. 503 when too many imports are
+    already running.
+    '''
+    upload = request.FILES.get('file', None)
+    if upload is None:
+        return Response({'file': ['No file was submitted.']},
+                        status=status.HTTP_400_BAD_REQUEST)
+    file_format = request.data.get('file_format', None) or importing.format_for(upload.name)
+    if file_format not in importing.FORMATS:
+        return Response({'file_format': [f'Must be one of {", ".join(importing.FORMATS)}.']},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    job_id = import_jobs.start(upload, file_format)
+    return Response({'id': job_id, **import_jobs.progress(job_id)},
+                    status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def import_progress(request, job_id):
+    '''How far an import started with POST /gamers/import got. Staff only.
+
+    Returns:
+      {"state": queued, running, done or failed, "created", "error_count", "errors"}, the
+      errors are the rows not imported with their line number
+    '''
+    progress = import_jobs.progress(job_id)
+    if progress is None:
+        return Response({'message': 'No import with that id.'},
+                        status=status.HTTP_404_NOT_FOUND)
+    return Response({'id': job_id, **progress}, status=status.HTTP_200_OK)
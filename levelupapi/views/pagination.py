@@ -0,0 +1,196 @@
+"""Keyset (cursor) pagination shared by the list views"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import BooleanField, Expression, F, Value
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination ordered by the primary key.
+    Each page is fetched with `WHERE id > <position> ORDER BY id LIMIT <limit>`, so page 500
+    costs the same as page 1, unlike OFFSET which has to walk every skipped row. The cursor
+    handed back to the client is opaque (base64 encoded by DRF) and can only move forward
+    or backward from where it was issued.
+    """
+    ordering = ('id',)
+    cursor_query_param = 'cursor'
+    page_size = 25
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+    def is_requested(self, request):
+        """Pagination is opt in so existing clients still get a plain list back,
+        a request asks for a page by sending either a cursor or a limit.
+        """
+        return (self.cursor_query_param in request.query_params or
+                self.page_size_query_param in request.query_params)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'prev': self.get_previous_link(),
+            'results': data
+        })
+
+
+class CompositeKeysetPagination(KeysetPagination):
+    """Keyset pagination on several columns, ie ('-event_count', '-id'). The last column
+    has to be unique and every column sorted the same way.
+    DRF's CursorPagination keeps its position on the first column only and steps over the
+    rows sharing it with an offset, which stops at offset_cutoff: past 1000 equal counts the
+    pages repeat and never end, and inside a run of equal counts each page is an OFFSET
+    scan. Here the cursor holds every column of the row the page ended on and the next page
+    is `WHERE (event_count, id) < (<count>, <id>) ORDER BY event_count DESC, id DESC LIMIT
+    <limit>`, a range read of the (event_count, id) index.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.columns = [name.lstrip('-') for name in self.ordering]
+        fields = [queryset.model._meta.get_field(column) for column in self.columns]
+        descending = self.ordering[0].startswith('-')
+        position, reverse = self.decode_position(request, fields)
+
+        if position is not None:
+            # a previous page reads the rows before the position, in the opposite order
+            operator = '<' if descending != reverse else '>'
+            queryset = queryset.filter(RowCompare(self.columns, operator, position, fields))
+        ordering = [flipped(name) for name in self.ordering] if reverse else self.ordering
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else position is not None
+        self.has_previous = has_more if reverse else position is not None
+        self.next_position = self.position_of(rows[-1]) if rows else position
+        self.previous_position = self.position_of(rows[0]) if rows else position
+        return rows
+
+    def position_of(self, row):
+        # rows are dictionaries on the values_list path, model instances otherwise
+        if isinstance(row, dict):
+            return [row[column] for column in self.columns]
+        return [getattr(row, column) for column in self.columns]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.link(self.next_position, False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.link(self.previous_position, True)
+
+    def link(self, position, reverse):
+        cursor = json.dumps({'p': position, 'r': reverse}, default=encode_value)
+        encoded = base64.urlsafe_b64encode(cursor.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_position(self, request, fields):
+        """Reads the cursor sent back by the client
+
+        Returns:
+            tuple -- (the value of each column, or None for the first page, whether it
+            asks for the page before the position)
+        """
+        encoded = request.query_params.get(self.cursor_query_param, None)
+        if encoded is None:
+            return None, False
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            position = cursor['p']
+            if len(position) != len(fields):
+                raise ValueError(position)
+            values = [field.to_python(value) for field, value in zip(fields, position)]
+            return values, bool(cursor['r'])
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError) as ex:
+            raise NotFound(self.invalid_cursor_message) from ex
+
+
+class RowCompare(Expression):
+    """A row value comparison, ie `(event_count, id) < (%s, %s)`, so the database reads
+    the rows past a position as one range of the index on those columns
+    """
+    output_field = BooleanField()
+
+    def __init__(self, columns, operator, values, fields):
+        super().__init__()
+        self.columns = [F(column) for column in columns]
+        self.values = [Value(value, output_field=field) for value, field in zip(values, fields)]
+        self.operator = operator
+
+    def get_source_expressions(self):
+        return [*self.columns, *self.values]
+
+    def set_source_expressions(self, exprs):
+        self.columns, self.values = exprs[:len(self.columns)], exprs[len(self.columns):]
+
+    def as_sql(self, compiler, connection):
+        sides = []
+        params = []
+        for exprs in (self.columns, self.values):
+            parts = []
+            for expr in exprs:
+                sql, expr_params = compiler.compile(expr)
+                parts.append(sql)
+                params.extend(expr_params)
+            sides.append(', '.join(parts))
+        return f'({sides[0]}) {self.operator} ({sides[1]})', params
+
+
+def flipped(name):
+    return name[1:] if name.startswith('-') else f'-{name}'
+
+
+def encode_value(value):
+    # microseconds are kept, the position has to be the exact value of the column
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(value)
+
+
+def requested_order(request, orders):
+    """Reads ?order=, the other orders a list can be paged in besides by id
+
+    Args:
+        orders (dict): {name: the paginator class for that order}
+
+    Returns:
+        class -- the paginator class, or None when ?order= was not sent
+
+    Raises:
+        serializers.ValidationError -- for an order the list does not have
+    """
+    order = request.query_params.get('order', None)
+    if order is None:
+        return None
+    if order not in orders:
+        raise serializers.ValidationError(
+            {'order': [f"Expected one of: {', '.join(orders)}."]})
+    return orders[order]
+
+
+def paginate(request, queryset, view=None, paginator_class=KeysetPagination):
+    """Pages the queryset when the client asked for it.
+
+    Returns:
+        tuple -- (rows to serialize, paginator or None when the full list is returned)
+    """
+    paginator = paginator_class()
+    if not paginator.is_requested(request):
+        return queryset, None
+    return paginator.paginate_queryset(queryset, request, view=view), paginator
+
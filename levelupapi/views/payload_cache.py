@@ -0,0 +1,60 @@
+"""Cache for the parts of the list responses that are the same for every gamer.
+The lists are built without the per gamer fields (ie joined) and cached under the request
+url and the versions of the models they were built from, so any write to those models
+moves every later request onto a new key. The views then overlay the per gamer fields on
+their copy with one small indexed query.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from levelupapi import versioning
+
+
+def cached_payload(request, models, build, per_day=False):
+    """Returns the shared payload for this url, building and caching it on a miss
+
+    Args:
+        models: every model the payload is built from
+        build (function): builds the payload, a list or a page dictionary
+        per_day (bool): the payload depends on today's date, it is cached for each day
+
+    Returns:
+        list or dict -- a copy of the payload the caller is free to change
+    """
+    key = payload_key(request, *versioning.read_for_request(request, *models), per_day)
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload, getattr(settings, 'LEVELUP_PAYLOAD_CACHE_TIMEOUT', 300))
+    return payload
+
+
+async def acached_payload(request, versions, updated, build, per_day=False):
+    """cached_payload for the async views, the versions are read by the caller and build
+    is awaited on a miss
+    """
+    key = payload_key(request, versions, updated, per_day)
+    payload = await cache.aget(key)
+    if payload is None:
+        payload = await build()
+        await cache.aset(key, payload, getattr(settings, 'LEVELUP_PAYLOAD_CACHE_TIMEOUT', 300))
+    return payload
+
+
+def payload_key(request, versions, updated, per_day=False):
+    return 'levelup:payload:' + hashlib.sha1('|'.join([
+        request.build_absolute_uri(),
+        ','.join(str(version) for version in versions),
+        # a flushed database starts its versions over, the time of the last write does not
+        str(updated.timestamp() if updated is not None else ''),
+        timezone.localdate().isoformat() if per_day else '',
+    ]).encode()).hexdigest()
+
+
+def payload_items(payload):
+    """The list of items, whether the payload is a page or a plain list
+    """
+    return payload['results'] if isinstance(payload, dict) else payload
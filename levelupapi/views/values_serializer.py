@@ -0,0 +1,289 @@
+"""Read only fast path for the list serializers.
+A ModelSerializer builds a model instance for every row (and for every joined relation)
+and then walks its field objects for each one. For the lists, the serializer's fields
+are instead compiled once into the columns of a values_list() query and a plan that
+turns each row tuple into the same dictionary the serializer would have produced. The
+values still go through each field's to_representation, so dates, times and booleans
+come out exactly as before.
+
+- fields on the model and annotations on the queryset are read as columns
+- nested relations (depth) are read through joins in the same query
+- many to many relations are read with one more query per relation, the same query
+  prefetch_related would have run
+"""
+from collections import defaultdict
+from functools import lru_cache
+from operator import itemgetter
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+
+from levelupapi.timing import timed
+from levelupapi.views.fieldsets import FieldsetSerializerMixin
+from levelupapi.views.pagination import KeysetPagination, paginate
+
+# the most ids in the IN list of one many to many query
+IN_BATCH_SIZE = 500
+
+VALUE = 0
+CONSTANT = 1
+NESTED = 2
+MANY = 3
+
+# fields whose to_representation would not change what values_list returns, subclasses
+# (ie BigIntegerField, which can be set to return strings) still go through it
+PASSTHROUGH = (drf_fields.ReadOnlyField, drf_fields.IntegerField, drf_fields.CharField)
+
+
+class NotCompilable(Exception):
+    """The serializer has a field the fast path cannot read from a column, the caller
+    falls back to the serializer
+    """
+
+
+class Columns:
+    """The columns of one values_list() query, each lookup is selected once
+    """
+
+    def __init__(self):
+        self.lookups = []
+        self._index = {}
+
+    def add(self, lookup):
+        if lookup not in self._index:
+            self._index[lookup] = len(self.lookups)
+            self.lookups.append(lookup)
+        return self._index[lookup]
+
+
+class RowPlan:
+    """The compiled form of one (possibly nested) serializer, builds its dictionary from
+    a row tuple
+    """
+
+    def __init__(self, serializer, model, columns, prefix='', annotations=()):
+        self.model = model
+        self.pk_index = columns.add(prefix + model._meta.pk.name)
+        self.entries = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            source = field.source
+            if source == '*' or '.' in source:
+                raise NotCompilable(name)
+
+            if isinstance(field, (serializers.ListSerializer, relations.ManyRelatedField)):
+                self.entries.append((name, MANY, None, ManyRelation(model, source, field)))
+                continue
+
+            model_field = self.model_field(source)
+            if model_field is None:
+                if not prefix and source in annotations:
+                    self.entries.append((name, VALUE, columns.add(source), converter(field)))
+                elif field.default is not drf_fields.empty:
+                    self.entries.append((name, CONSTANT, field.default, None))
+                else:
+                    raise NotCompilable(name)
+            elif isinstance(field, serializers.BaseSerializer):
+                if not (model_field.many_to_one or model_field.one_to_one):
+                    raise NotCompilable(name)
+                nested = RowPlan(field, model_field.related_model, columns,
+                                 prefix=f'{prefix}{source}__')
+                self.entries.append((name, NESTED, None, nested))
+            elif isinstance(field, relations.PrimaryKeyRelatedField):
+                if model_field.many_to_many or field.pk_field is not None:
+                    raise NotCompilable(name)
+                # the column of a foreign key is its id
+                self.entries.append((name, VALUE, columns.add(prefix + source), None))
+            elif model_field.is_relation:
+                raise NotCompilable(name)
+            else:
+                self.entries.append((name, VALUE, columns.add(prefix + source),
+                                     converter(field)))
+
+    def model_field(self, source):
+        try:
+            return self.model._meta.get_field(source)
+        except FieldDoesNotExist:
+            return None
+
+    def build(self, row, pending):
+        """The serialized dictionary for the row, or None for a nested relation that is
+        null. The many to many lists are left empty and added to pending to be filled
+        in by ManyRelation.fill
+        """
+        pk = row[self.pk_index]
+        if pk is None:
+            return None
+        data = {}
+        for name, kind, index, extra in self.entries:
+            if kind == VALUE:
+                value = row[index]
+                data[name] = value if value is None or extra is None else extra(value)
+            elif kind == NESTED:
+                data[name] = extra.build(row, pending)
+            elif kind == MANY:
+                data[name] = []
+                pending[extra].append((pk, data[name]))
+            else:
+                data[name] = index
+        return data
+
+
+class ManyRelation:
+    """A many to many field on a plan, read with its own query
+    """
+
+    def __init__(self, model, source, field):
+        try:
+            m2m = model._meta.get_field(source)
+        except FieldDoesNotExist as ex:
+            raise NotCompilable(source) from ex
+        if not isinstance(m2m, models.ManyToManyField):
+            raise NotCompilable(source)
+
+        self.related_model = m2m.related_model
+        # the lookup from the related model back to the model, ie attendees -> events
+        self.back = m2m.related_query_name()
+        self.columns = Columns()
+        self.columns.add(self.back)
+        if isinstance(field, serializers.ListSerializer):
+            self.plan = RowPlan(field.child, self.related_model, self.columns)
+        else:
+            child = field.child_relation
+            if not isinstance(child, relations.PrimaryKeyRelatedField) or child.pk_field:
+                raise NotCompilable(source)
+            self.plan = None
+            self.columns.add(self.related_model._meta.pk.name)
+
+    def fill(self, targets, pending):
+        """Reads the related rows for every (pk, list) in targets and appends them to
+        the lists, the rows' own many to many lists are added to pending
+        """
+        lists = defaultdict(list)
+        for pk, items in targets:
+            lists[pk].append(items)
+        pks = list(lists)
+        # a related row shared by many parents (ie a gamer at many events) is built once
+        built = {}
+        for start in range(0, len(pks), IN_BATCH_SIZE):
+            rows = (self.related_model._default_manager
+                    .filter(**{f'{self.back}__in': pks[start:start + IN_BATCH_SIZE]})
+                    .values_list(*self.columns.lookups))
+            for row in rows:
+                if self.plan is None:
+                    item = row[1]
+                else:
+                    item = built.get(row[self.plan.pk_index], None)
+                    if item is None:
+                        item = built[row[self.plan.pk_index]] = self.plan.build(row, pending)
+                for items in lists[row[0]]:
+                    items.append(item)
+
+
+class CompiledSerializer:
+    """A serializer compiled for one shape of queryset, see compile_serializer
+    """
+
+    def __init__(self, serializer, model, annotations):
+        self.columns = Columns()
+        self.plan = RowPlan(serializer, model, self.columns, annotations=annotations)
+        lookups = self.columns.lookups
+        getter = itemgetter(*lookups)
+        self._from_dict = getter if len(lookups) > 1 else lambda row: (getter(row),)
+
+    def values(self, queryset, *ordering):
+        """The queryset's rows as dictionaries of the columns, for paginating. The
+        paginator's ordering columns are added when they are not already selected, it reads
+        its position from them
+        """
+        extra = [name.lstrip('-') for name in ordering]
+        return queryset.values(*dict.fromkeys([*self.columns.lookups, *extra]))
+
+    def serialize(self, queryset):
+        """Serializes every row of the queryset
+
+        Returns:
+            list -- the same dictionaries the serializer's .data would have
+        """
+        return self.serialize_rows(queryset.values_list(*self.columns.lookups))
+
+    def serialize_dicts(self, rows):
+        """Serializes rows read with values(), ie a page of them
+        """
+        return self.serialize_rows(map(self._from_dict, rows))
+
+    def serialize_rows(self, rows):
+        pending = defaultdict(list)
+        data = [self.plan.build(row, pending) for row in rows]
+        while pending:
+            relations_to_fill, pending = pending, defaultdict(list)
+            for relation, targets in relations_to_fill.items():
+                relation.fill(targets, pending)
+        return data
+
+
+def serialize_list(request, queryset, serializer_class, fields=None, expand=None, view=None,
+                   paginator_class=KeysetPagination):
+    """Serializes a list view's queryset, or the page of it the client asked for, with
+    the compiled serializer. A serializer that cannot be compiled is run as usual.
+
+    Returns:
+        list or dict -- the serialized rows, or the page dictionary
+    """
+    compiled = compile_for(serializer_class, queryset, fields, expand)
+    if compiled is None:
+        queryset = serializer_class.eager_load(queryset, fields, expand)
+        page, paginator = paginate(request, queryset, view=view,
+                                   paginator_class=paginator_class)
+        with timed('serialize'):
+            data = serializer_class(page, many=True, fields=fields, expand=expand).data
+    else:
+        page, paginator = paginate(request,
+                                   compiled.values(queryset, *paginator_class.ordering),
+                                   view=view, paginator_class=paginator_class)
+        with timed('serialize'):
+            if paginator is None:
+                data = compiled.serialize(queryset)
+            else:
+                data = compiled.serialize_dicts(page)
+
+    if paginator is not None:
+        return paginator.get_paginated_response(data).data
+    return data
+
+
+def compile_for(serializer_class, queryset, fields=None, expand=None):
+    """The compiled serializer for the queryset and fieldset
+
+    Returns:
+        CompiledSerializer -- or None when the serializer cannot be compiled
+    """
+    try:
+        return compile_serializer(serializer_class, queryset.model, fields, expand,
+                                  frozenset(queryset.query.annotations))
+    except NotCompilable:
+        return None
+
+
+@lru_cache(maxsize=256)
+def compile_serializer(serializer_class, model, fields, expand, annotations):
+    """Compiles the serializer's fields once for each fieldset and set of annotations
+    """
+    if issubclass(serializer_class, FieldsetSerializerMixin):
+        serializer = serializer_class(fields=fields, expand=expand)
+    else:
+        serializer = serializer_class()
+    return CompiledSerializer(serializer, model, annotations)
+
+
+def converter(field):
+    """The field's to_representation, or None when values_list already returns what it
+    would
+    """
+    if type(field) in PASSTHROUGH:
+        return None
+    return field.to_representation
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from levelupreports import materialized
+
+
+class Command(BaseCommand):
+    help = ("Rebuilds the user games and user events report tables from scratch. The tables "
+            "are kept up to date as games and events change, run this after loading "
+            "fixtures or if the tables are ever out of step.")
+
+    def handle(self, *args, **options):
+        games, events = materialized.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt reports for {games} gamers with games and {events} organizers with events'
+        ))
@@ -0,0 +1,170 @@
+"""Builds the pre-aggregated rows the user reports read from.
+The reports used to run their joins across auth_user, levelupapi_gamer, levelupapi_game
+and levelupapi_event on every page load, now the joins only run here: for a single
+gamer when one of their games/events changes (see levelupreports.signals), or for
+everyone when the tables are rebuilt.
+"""
+from django.db import transaction
+
+from levelupreports import snapshots
+from levelupreports.models import UserEventReport, UserGameReport
+from levelupreports.views.grouping import group_rows
+from levelupreports.views.helpers import streaming_cursor
+
+# rows written per bulk_create when rebuilding
+BATCH_SIZE = 500
+
+GAMES_BY_USER_SQL = """
+    SELECT
+        g.id,
+        g.title,
+        g.maker,
+        g.number_of_players,
+        g.skill_level,
+        g.game_type_id,
+        g.gamer_id,
+        u.first_name||' '||u.last_name AS full_name
+    FROM levelupapi_game g
+    JOIN levelupapi_gamer ga ON ga.id = g.gamer_id
+    JOIN auth_user u ON u.id = ga.user_id
+    {where}
+    ORDER BY g.gamer_id, g.id
+"""
+
+EVENTS_BY_USER_SQL = """
+    SELECT
+        e.id,
+        e.description,
+        e.date,
+        e.time,
+        e.game_id,
+        game.title AS game_name,
+        e.organizer_id,
+        u.first_name||' '||u.last_name AS full_name
+    FROM levelupapi_event e
+    JOIN levelupapi_gamer g ON g.id = e.organizer_id
+    JOIN auth_user u ON u.id = g.user_id
+    JOIN levelupapi_game game ON game.id = e.game_id
+    {where}
+    ORDER BY e.organizer_id, e.id
+"""
+
+
+def game_row(row):
+    return {
+        "id": row.id,
+        "title": row.title,
+        "maker": row.maker,
+        "skill_level": row.skill_level,
+        "number_of_players": row.number_of_players,
+        "game_type_id": row.game_type_id
+    }
+
+
+def event_row(row):
+    return {
+        "id": row.id,
+        "date": row.date,
+        "time": row.time,
+        "game_name": row.game_name,
+        "description": row.description
+    }
+
+
+def gamer_row(row):
+    return {"gamer_id": row.gamer_id, "full_name": row.full_name}
+
+
+def organizer_row(row):
+    return {"gamer_id": row.organizer_id, "full_name": row.full_name}
+
+
+def games_by_user(gamer_ids=None):
+    """Runs the games join, for every gamer or only the ones given
+
+    Yields:
+        UserGameReport -- unsaved, one per gamer that has games
+    """
+    where, params = gamer_filter('g.gamer_id', gamer_ids)
+    with streaming_cursor() as db_cursor:
+        db_cursor.execute(GAMES_BY_USER_SQL.format(where=where), params)
+        for group in group_rows(db_cursor, 'gamer_id', gamer_row, game_row, 'games'):
+            yield UserGameReport(gamer_id=group['gamer_id'], full_name=group['full_name'],
+                                 games=group['games'])
+
+
+def events_by_user(gamer_ids=None):
+    """Runs the events join, for every organizer or only the ones given
+
+    Yields:
+        UserEventReport -- unsaved, one per gamer that organized events
+    """
+    where, params = gamer_filter('e.organizer_id', gamer_ids)
+    with streaming_cursor() as db_cursor:
+        db_cursor.execute(EVENTS_BY_USER_SQL.format(where=where), params)
+        for group in group_rows(db_cursor, 'organizer_id', organizer_row, event_row, 'events'):
+            yield UserEventReport(gamer_id=group['gamer_id'], full_name=group['full_name'],
+                                  events=group['events'])
+
+
+def refresh_games(gamer_ids):
+    """Re-aggregates the games report for just these gamers. A gamer left with no games is
+    dropped from the report, the same as the join would leave them out.
+    """
+    _replace(UserGameReport, gamer_ids, games_by_user)
+
+
+def refresh_events(gamer_ids):
+    """Re-aggregates the events report for just these organizers
+    """
+    _replace(UserEventReport, gamer_ids, events_by_user)
+
+
+def rebuild():
+    """Throws away both report tables and rebuilds them from scratch, a batch of gamers at
+    a time
+
+    Returns:
+        tuple -- the number of (game report, event report) rows written
+    """
+    counts = []
+    with transaction.atomic():
+        for model, rows in ((UserGameReport, games_by_user()),
+                            (UserEventReport, events_by_user())):
+            model.objects.all().delete()
+            written = 0
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) == BATCH_SIZE:
+                    model.objects.bulk_create(batch)
+                    written += len(batch)
+                    batch = []
+            model.objects.bulk_create(batch)
+            counts.append(written + len(batch))
+    snapshots.mark_dirty(UserGameReport, UserEventReport)
+    return tuple(counts)
+
+
+def _replace(model, gamer_ids, rows_for):
+    gamer_ids = set(gamer_ids)
+    if not gamer_ids:
+        return
+    with transaction.atomic():
+        rows = list(rows_for(gamer_ids))
+        model.objects.filter(gamer_id__in=gamer_ids).delete()
+        model.objects.bulk_create(rows)
+    snapshots.mark_dirty(model)
+
+
+def gamer_filter(column, gamer_ids):
+    """The WHERE clause for the report joins that keeps only these gamers, or no clause for
+    every gamer when gamer_ids is None
+
+    Returns:
+        tuple -- (sql, params)
+    """
+    if gamer_ids is None:
+        return '', []
+    gamer_ids = list(gamer_ids)
+    return f"WHERE {column} IN ({', '.join(['%s'] * len(gamer_ids))})", gamer_ids
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:45
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('levelupapi', '0002_search_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserEventReport',
+            fields=[
+                ('gamer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='event_report', serialize=False, to='levelupapi.gamer')),
+                ('full_name', models.CharField(max_length=301)),
+                ('events', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserGameReport',
+            fields=[
+                ('gamer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='game_report', serialize=False, to='levelupapi.gamer')),
+                ('full_name', models.CharField(max_length=301)),
+                ('games', models.JSONField(default=list, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+            ],
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:52
+
+from itertools import groupby
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+# the joins from levelupreports.materialized as they were when the tables were added, a
+# migration does not follow later changes to them
+GAMES_SQL = """
+    SELECT g.gamer_id, u.first_name||' '||u.last_name, g.id, g.title, g.maker,
+           g.skill_level, g.number_of_players, g.game_type_id
+    FROM levelupapi_game g
+    JOIN levelupapi_gamer ga ON ga.id = g.gamer_id
+    JOIN auth_user u ON u.id = ga.user_id
+    ORDER BY g.gamer_id, g.id
+"""
+
+EVENTS_SQL = """
+    SELECT e.organizer_id, u.first_name||' '||u.last_name, e.id, e.date, e.time,
+           game.title, e.description
+    FROM levelupapi_event e
+    JOIN levelupapi_gamer g ON g.id = e.organizer_id
+    JOIN auth_user u ON u.id = g.user_id
+    JOIN levelupapi_game game ON game.id = e.game_id
+    ORDER BY e.organizer_id, e.id
+"""
+
+GAME_KEYS = ('id', 'title', 'maker', 'skill_level', 'number_of_players', 'game_type_id')
+EVENT_KEYS = ('id', 'date', 'time', 'game_name', 'description')
+
+
+def fill_reports(apps, schema_editor):
+    """Builds the report rows for the games and events already in the database, the
+    report signals only follow writes made after this
+    """
+    alias = schema_editor.connection.alias
+    for model_name, sql, items_key, keys in (
+            ('UserGameReport', GAMES_SQL, 'games', GAME_KEYS),
+            ('UserEventReport', EVENTS_SQL, 'events', EVENT_KEYS)):
+        model = apps.get_model('levelupreports', model_name)
+        reports = model.objects.using(alias)
+        batch = []
+        for report in report_rows(schema_editor.connection, sql, items_key, keys, model):
+            batch.append(report)
+            if len(batch) == BATCH_SIZE:
+                reports.bulk_create(batch)
+                batch = []
+        reports.bulk_create(batch)
+
+
+def report_rows(connection, sql, items_key, keys, model):
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql)
+        rows = iter(lambda: db_cursor.fetchmany(BATCH_SIZE), [])
+        flat = (row for chunk in rows for row in chunk)
+        for (gamer_id, full_name), group in groupby(flat, key=lambda row: row[:2]):
+            items = [dict(zip(keys, row[2:])) for row in group]
+            yield model(gamer_id=gamer_id, full_name=full_name, **{items_key: items})
+
+
+def empty_reports(apps, schema_editor):
+    alias = schema_editor.connection.alias
+    for model_name in ('UserGameReport', 'UserEventReport'):
+        apps.get_model('levelupreports', model_name).objects.using(alias).all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('levelupreports', '0001_report_tables'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_reports, empty_reports),
+    ]
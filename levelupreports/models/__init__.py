@@ -0,0 +1,2 @@
+from .user_game_report import UserGameReport
+from .user_event_report import UserEventReport
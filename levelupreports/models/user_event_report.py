@@ -0,0 +1,25 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.dateparse import parse_date, parse_time
+
+# one row per organizer with all of their events, kept up to date by levelupreports.signals
+# and rebuilt from scratch with `python manage.py rebuild_reports`
+
+class UserEventReport(models.Model):
+    gamer = models.OneToOneField("levelupapi.Gamer", on_delete=models.CASCADE,
+                                 primary_key=True, related_name="event_report")
+    full_name = models.CharField(max_length=301)
+    events = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+
+    def as_group(self):
+        """The organizer in the shape the userevents report template expects, the dates
+        and times are stored as iso strings in the json so they are parsed back here
+        """
+        return {
+            "organizer_id": self.gamer_id,
+            "full_name": self.full_name,
+            "events": [
+                {**event, "date": parse_date(event['date']), "time": parse_time(event['time'])}
+                for event in self.events
+            ]
+        }
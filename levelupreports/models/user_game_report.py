@@ -0,0 +1,20 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+# one row per gamer with all of their games, kept up to date by levelupreports.signals
+# and rebuilt from scratch with `python manage.py rebuild_reports`
+
+class UserGameReport(models.Model):
+    gamer = models.OneToOneField("levelupapi.Gamer", on_delete=models.CASCADE,
+                                 primary_key=True, related_name="game_report")
+    full_name = models.CharField(max_length=301)
+    games = models.JSONField(default=list, encoder=DjangoJSONEncoder)
+
+    def as_group(self):
+        """The gamer in the shape the usergames report template expects
+        """
+        return {
+            "gamer_id": self.gamer_id,
+            "full_name": self.full_name,
+            "games": self.games
+        }
@@ -0,0 +1,171 @@
+"""Filtered pages of the user reports, read with the report joins instead of the report
+tables.
+The report tables hold every gamer's whole list, so a slice of it (one game type, a range
+of dates) cannot be read from them. A filtered page runs two queries, with the filters in
+the WHERE clause of both:
+- the page of gamer ids, `SELECT DISTINCT gamer_id ... WHERE gamer_id > <cursor> ORDER BY
+  gamer_id LIMIT <limit>`, which reads the gamer/organizer index in order
+- the join from levelupreports.materialized for only the gamers on that page
+
+Query params:
+- gamer: only this gamer (the games report) or organizer (the events report)
+- type: only games of this game type, or events for games of this type
+- from, to, upcoming: only events starting in this window, see
+  levelupapi.views.event.event_window
+- limit: how many gamers are on a page, cursor: the gamer id the page starts after
+"""
+from django.db import connection
+from rest_framework import serializers
+
+from levelupapi.views.event import event_window
+from levelupreports import materialized
+from levelupreports.views.grouping import group_rows
+from levelupreports.views.helpers import streaming_cursor
+
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+# the params that ask for a filtered page instead of the whole report
+FILTER_PARAMS = ('gamer', 'type', 'from', 'to', 'upcoming', 'limit', 'cursor')
+
+GAMER_PAGE_SQL = """
+    SELECT DISTINCT g.gamer_id
+    FROM levelupapi_game g
+    {where}
+    ORDER BY g.gamer_id
+    LIMIT %s
+"""
+
+ORGANIZER_PAGE_SQL = """
+    SELECT DISTINCT e.organizer_id
+    FROM levelupapi_event e
+    JOIN levelupapi_game game ON game.id = e.game_id
+    {where}
+    ORDER BY e.organizer_id
+    LIMIT %s
+"""
+
+
+class InvalidFilter(Exception):
+    """A query param that could not be read, errors is {param: [messages]}
+    """
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class ReportFilters:
+    """The filters and page read from a report request's query params
+    """
+
+    def __init__(self, params, dated=False):
+        """
+        Args:
+            params: the query params
+            dated (bool): whether the report has dates, only the events report does
+
+        Raises:
+            InvalidFilter -- for a param that is not valid
+        """
+        errors = {}
+        self.gamer = positive_int(params, 'gamer', errors)
+        self.game_type = positive_int(params, 'type', errors)
+        self.cursor = positive_int(params, 'cursor', errors) or 0
+        self.limit = min(positive_int(params, 'limit', errors) or PAGE_SIZE, MAX_PAGE_SIZE)
+        self.start = self.end = None
+        if dated:
+            try:
+                self.start, self.end = event_window(params)
+            except serializers.ValidationError as ex:
+                errors.update(ex.detail)
+        if errors:
+            raise InvalidFilter(errors)
+
+    def conditions(self, gamer_column, game_type_column, starts_at_column=None):
+        """The WHERE clause for the filters
+
+        Returns:
+            tuple -- (sql, params)
+        """
+        where = [f'{gamer_column} > %s']
+        params = [self.cursor]
+        if self.gamer is not None:
+            where.append(f'{gamer_column} = %s')
+            params.append(self.gamer)
+        if self.game_type is not None:
+            where.append(f'{game_type_column} = %s')
+            params.append(self.game_type)
+        # the raw cursor does not convert datetimes the way the ORM does
+        adapt = connection.ops.adapt_datetimefield_value
+        if starts_at_column is not None and self.start is not None:
+            where.append(f'{starts_at_column} >= %s')
+            params.append(adapt(self.start))
+        if starts_at_column is not None and self.end is not None:
+            where.append(f'{starts_at_column} < %s')
+            params.append(adapt(self.end))
+        return 'WHERE ' + ' AND '.join(where), params
+
+
+def requested(params):
+    """Whether the request asks for a filtered page rather than the whole report
+    """
+    return any(param in params for param in FILTER_PARAMS)
+
+
+def games_page(filters):
+    """A page of the games report
+
+    Returns:
+        tuple -- (the gamer groups, the cursor for the next page or None)
+    """
+    where, params = filters.conditions('g.gamer_id', 'g.game_type_id')
+    return page(GAMER_PAGE_SQL, materialized.GAMES_BY_USER_SQL, where, params, filters,
+                'g.gamer_id', 'gamer_id', materialized.gamer_row, materialized.game_row,
+                'games')
+
+
+def events_page(filters):
+    """A page of the events report
+
+    Returns:
+        tuple -- (the organizer groups, the cursor for the next page or None)
+    """
+    where, params = filters.conditions('e.organizer_id', 'game.game_type_id', 'e.starts_at')
+    return page(ORGANIZER_PAGE_SQL, materialized.EVENTS_BY_USER_SQL, where, params,
+                filters, 'e.organizer_id', 'organizer_id', materialized.organizer_row,
+                materialized.event_row, 'events')
+
+
+def page(page_sql, report_sql, where, params, filters, column, key, make_group, make_item,
+         items_key):
+    with connection.cursor() as db_cursor:
+        # one more than the limit, to tell whether there is a next page
+        db_cursor.execute(page_sql.format(where=where), [*params, filters.limit + 1])
+        gamer_ids = [row[0] for row in db_cursor.fetchall()]
+    if not gamer_ids:
+        return [], None
+    next_cursor = gamer_ids[filters.limit - 1] if len(gamer_ids) > filters.limit else None
+    gamer_ids = gamer_ids[:filters.limit]
+
+    in_page = f"{column} IN ({', '.join(['%s'] * len(gamer_ids))})"
+    # a page of gamers can still have any number of games or events
+    with streaming_cursor() as db_cursor:
+        db_cursor.execute(report_sql.format(where=f'{where} AND {in_page}'),
+                          [*params, *gamer_ids])
+        groups = list(group_rows(db_cursor, key, make_group, make_item, items_key))
+    return groups, next_cursor
+
+
+def positive_int(params, param, errors):
+    value = params.get(param, None)
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        errors[param] = ['A valid integer is required.']
+        return None
+    return number
@@ -0,0 +1,64 @@
+"""Signal receivers that keep the report tables in step with levelupapi"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from levelupapi.models import Event, Game
+from levelupapi.signals import bulk_saved
+from levelupreports import materialized, snapshots
+from levelupreports.models import UserEventReport, UserGameReport
+
+# saves made while loading fixtures (raw=True) are skipped, the database is not consistent
+# yet at that point, run `python manage.py rebuild_reports` after loaddata
+
+
+@receiver(post_save, sender=Game)
+@receiver(post_delete, sender=Game)
+def refresh_game_owner(sender, instance, raw=False, **kwargs):
+    """Re-aggregates the gamer who owns the game, and the organizers of events for the
+    game since the event report shows the game's title
+    """
+    if raw:
+        return
+    materialized.refresh_games([instance.gamer_id])
+    if kwargs.get('created') is False:
+        materialized.refresh_events(
+            Event.objects.filter(game=instance).values_list('organizer_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def refresh_event_organizer(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    materialized.refresh_events([instance.organizer_id])
+
+
+@receiver(post_save, sender=User)
+def rename_gamer(sender, instance, raw=False, **kwargs):
+    """Keeps the denormalized full name in step with the user
+    """
+    if raw:
+        return
+    full_name = f'{instance.first_name} {instance.last_name}'
+    for model in (UserGameReport, UserEventReport):
+        renamed = model.objects.filter(gamer__user=instance).exclude(full_name=full_name).update(
+            full_name=full_name
+        )
+        if renamed:
+            snapshots.mark_dirty(model)
+
+
+@receiver(bulk_saved, sender=Game)
+def refresh_bulk_game_owners(sender, instances, created, **kwargs):
+    materialized.refresh_games({game.gamer_id for game in instances})
+    if not created:
+        materialized.refresh_events(
+            Event.objects.filter(game__in=instances).values_list('organizer_id', flat=True)
+        )
+
+
+@receiver(bulk_saved, sender=Event)
+def refresh_bulk_event_organizers(sender, instances, **kwargs):
+    materialized.refresh_events({event.organizer_id for event in instances})
@@ -0,0 +1,156 @@
+"""Rendered snapshots of the report pages, served stale while they are rebuilt.
+Rendering a report walks every row of its report table and renders a template for each
+gamer. Instead each page is rendered once into the cache with the time it was started,
+and every request is answered straight from that copy. A snapshot is rebuilt on a
+background thread once it is older than settings.LEVELUP_REPORT_SNAPSHOT_TTL, or once
+levelupreports.materialized marks it dirty after a write. Until the rebuild finishes the
+old snapshot keeps being served.
+
+Only one rebuild of a report runs at a time: the rebuild takes a lock with cache.add(),
+which is atomic, so with a shared cache that holds across processes too. A request that
+finds no snapshot at all streams the page from the report table, as before, and starts
+the first rebuild.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.utils.http import http_date
+
+from levelupreports.models import UserEventReport, UserGameReport
+from levelupreports.views.grouping import render_groups
+from levelupreports.views.helpers import CHUNK_SIZE
+
+# name -> (page title, report table, template for each gamer)
+REPORTS = {
+    'usergames': ('User Games', UserGameReport, 'users/user_games.html'),
+    'userevents': ('User Events', UserEventReport, 'users/user_events.html'),
+}
+# a rebuild that has not let go of its lock after this many seconds (ie its process died)
+# is given up on and the next request starts another
+BUILD_TIMEOUT = 300
+
+
+def render(name):
+    """Renders the report page from its report table, a piece at a time
+
+    Yields:
+        str -- the html for the report
+    """
+    title, model, template = REPORTS[name]
+    reports = model.objects.order_by('gamer_id').iterator(chunk_size=CHUNK_SIZE)
+    return render_groups(title, (report.as_group() for report in reports), template)
+
+
+def serve(name):
+    """The report's snapshot, starting a rebuild when it is stale or dirty
+
+    Returns:
+        dict -- {"html": the page, "generated": when its rebuild started} or None when
+        there is no snapshot yet
+    """
+    snapshot = cache.get(snapshot_key(name))
+    dirty_at = cache.get(dirty_key(name))
+    if needs_rebuild(snapshot, dirty_at):
+        refresh_later(name)
+        if not background():
+            snapshot = cache.get(snapshot_key(name))
+    return snapshot
+
+
+async def aserve(name):
+    """serve() for the async report views
+    """
+    snapshot = await cache.aget(snapshot_key(name))
+    dirty_at = await cache.aget(dirty_key(name))
+    if needs_rebuild(snapshot, dirty_at):
+        if not background():
+            # only the sync ORM is used for a rebuild
+            return None
+        refresh_later(name)
+    return snapshot
+
+
+def needs_rebuild(snapshot, dirty_at):
+    if snapshot is None:
+        return True
+    if dirty_at is not None and dirty_at >= snapshot['generated']:
+        return True
+    ttl = getattr(settings, 'LEVELUP_REPORT_SNAPSHOT_TTL', 300)
+    return time.time() - snapshot['generated'] > ttl
+
+
+def refresh_later(name):
+    """Starts a rebuild of the snapshot on its own thread, unless one is already running
+
+    Returns:
+        bool -- whether a rebuild was started
+    """
+    if not cache.add(lock_key(name), True, BUILD_TIMEOUT):
+        return False
+    if not background():
+        build(name)
+        return True
+    thread = threading.Thread(target=build, args=(name,), name=f'levelup-report-{name}',
+                              daemon=True)
+    try:
+        thread.start()
+    except BaseException:
+        cache.delete(lock_key(name))
+        raise
+    return True
+
+
+def build(name):
+    # called holding the lock. The start time is recorded rather than the end, so a write
+    # that lands while the page renders leaves the new snapshot dirty.
+    try:
+        generated = time.time()
+        html = ''.join(render(name))
+        cache.set(snapshot_key(name), {'html': html, 'generated': generated}, None)
+    finally:
+        cache.delete(lock_key(name))
+        if background():
+            # the thread's connection is not closed by a request finishing
+            connection.close()
+
+
+def response(snapshot):
+    """The page for a snapshot, Last-Modified says how old it is
+    """
+    page = HttpResponse(snapshot['html'])
+    page['Last-Modified'] = http_date(snapshot['generated'])
+    return page
+
+
+def mark_dirty(*models):
+    """Marks the snapshots built from these report tables as out of date once the write
+    commits, the next request for them starts a rebuild. Marked any earlier, a rebuild
+    could start before the write is visible and still count as up to date.
+    """
+    names = [name for name, (_title, model, _template) in REPORTS.items() if model in models]
+
+    def mark():
+        now = time.time()
+        for name in names:
+            cache.set(dirty_key(name), now, None)
+    transaction.on_commit(mark)
+
+
+def background():
+    return getattr(settings, 'LEVELUP_REPORT_REFRESH_IN_BACKGROUND', True)
+
+
+def snapshot_key(name):
+    return f'levelup:report:{name}'
+
+
+def dirty_key(name):
+    return f'levelup:report:{name}:dirty'
+
+
+def lock_key(name):
+    return f'levelup:report:{name}:building'
@@ -1,3 +1,4 @@
-from .helpers import dict_fetch_all
+from .helpers import fetch_chunks, iter_rows, streaming_cursor
 from .users.gamesbyuser import UserGameList
 from .users.eventsbyusers import UserEventList
+from .users.asynchronous import user_game_list, user_event_list
@@ -0,0 +1,56 @@
+"""The filtered and JSON versions of the user reports, see levelupreports.queries"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+
+from levelupreports import queries
+from levelupreports.views.grouping import render_groups
+
+# name -> (page title, the function reading a page, template for each gamer, whether the
+# report has dates)
+REPORTS = {
+    'usergames': ('User Games', queries.games_page, 'users/user_games.html', False),
+    'userevents': ('User Events', queries.events_page, 'users/user_events.html', True),
+}
+
+
+def wants_filtered(request):
+    """Whether the request asks for JSON or a filtered page rather than the whole page
+    """
+    return wants_json(request) or queries.requested(request.GET)
+
+
+def wants_json(request):
+    return request.GET.get('format', None) == 'json'
+
+
+def filtered_report(request, name):
+    """Answers a report request with a filtered page, as JSON for ?format=json:
+    {"next": url or null, "results": [the gamer groups]}
+
+    Returns:
+        HttpResponse -- the page, or a 400 with the params that are not valid
+    """
+    title, read_page, template, dated = REPORTS[name]
+    try:
+        filters = queries.ReportFilters(request.GET, dated=dated)
+    except queries.InvalidFilter as ex:
+        return JsonResponse(ex.errors, status=400)
+
+    groups, next_cursor = read_page(filters)
+    if wants_json(request):
+        return JsonResponse({'next': next_url(request, next_cursor), 'results': groups})
+    return StreamingHttpResponse(render_groups(title, groups, template))
+
+
+async def afiltered_report(request, name):
+    """filtered_report for the async report views, the raw queries run in a thread
+    """
+    return await sync_to_async(filtered_report)(request, name)
+
+
+def next_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return request.build_absolute_uri(f'{request.path}?{params.urlencode()}')
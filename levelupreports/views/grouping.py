@@ -0,0 +1,69 @@
+"""Single pass grouping of report rows, shared by the user reports"""
+from operator import attrgetter
+
+from django.template.loader import get_template
+
+from levelupreports.views.helpers import CHUNK_SIZE, iter_rows
+
+
+def group_rows(db_cursor, key, make_group, make_item, items_key, chunk_size=CHUNK_SIZE):
+    """Groups the rows of an executed cursor in one pass.
+    The query has to be ORDER BY the key column so each group's rows come back next to
+    each other, then a group is finished as soon as the key changes. Only one chunk of
+    rows and the group being built are held in memory at a time, use a streaming_cursor
+    for the database not to hold the rest either.
+
+    Args:
+        db_cursor: a cursor the report query was executed on
+        key (str): the column the rows are grouped by, ie gamer_id
+        make_group (function): builds the group dictionary from its first row
+        make_item (function): builds the dictionary added to the group for each row
+        items_key (str): the key on the group the items are added to, ie "games"
+
+    Both functions are given the row as a namedtuple, ie row.title
+
+    Yields:
+        dict -- one group at a time, in the order of the query
+    """
+    key_of = attrgetter(key)
+    group = None
+    group_key = None
+
+    for row in iter_rows(db_cursor, named=True, chunk_size=chunk_size):
+        if group is None or key_of(row) != group_key:
+            if group is not None:
+                yield group
+            group_key = key_of(row)
+            group = make_group(row)
+            group[items_key] = []
+        group[items_key].append(make_item(row))
+
+    if group is not None:
+        yield group
+
+
+def render_groups(title, groups, group_template):
+    """Renders a report page piece by piece so it can be sent with a StreamingHttpResponse,
+    the page header first, then each group as it comes off the cursor, then the footer.
+
+    Yields:
+        str -- the html for the report
+    """
+    yield get_template('users/report_header.html').render({'title': title})
+    template = get_template(group_template)
+    for group in groups:
+        yield template.render({'user': group})
+    yield get_template('users/report_footer.html').render({})
+
+
+async def arender_groups(title, groups, group_template):
+    """render_groups for the async report views, groups is an async iterator
+
+    Yields:
+        str -- the html for the report
+    """
+    yield get_template('users/report_header.html').render({'title': title})
+    template = get_template(group_template)
+    async for group in groups:
+        yield template.render({'user': group})
+    yield get_template('users/report_footer.html').render({})
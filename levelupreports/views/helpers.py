@@ -1,10 +1,83 @@
+"""Reading the rows of a raw query a chunk at a time.
+fetchall() holds every row of the result at once, and building a dictionary for each row
+holds them all a second time. These helpers walk the cursor with fetchmany() instead, so
+only one chunk is in memory, and name the columns once from the cursor's description
+rather than for every row.
 
-def dict_fetch_all(cursor):
-    """Return all rows from a cursor as a list of dictionaries
+streaming_cursor() opens a server-side cursor where the engine has them (PostgreSQL, the
+same cursor QuerySet.iterator() uses), so the database sends the rows a chunk at a time
+too. Other engines get a plain cursor: SQLite steps through the result as it is fetched
+anyway, MySQL's client still reads the whole result but the rows are not copied again.
+"""
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.db import connections
+
+# rows pulled from the database cursor at a time
+CHUNK_SIZE = 500
+
+
+@contextmanager
+def streaming_cursor(using='default'):
+    """A cursor for reading a large result, server-side where the engine supports it.
+    Only one query is run on it, ie a named PostgreSQL cursor cannot be reused.
+    """
+    with connections[using].chunked_cursor() as db_cursor:
+        yield db_cursor
+
+
+def fetch_chunks(db_cursor, chunk_size=CHUNK_SIZE):
+    """Fetches the rows of an executed cursor chunk_size at a time
+
+    Yields:
+        list -- the next chunk of row tuples
     """
+    while True:
+        rows = db_cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+
+def iter_rows(db_cursor, named=False, chunk_size=CHUNK_SIZE):
+    """Yields the rows of an executed cursor one at a time, fetched a chunk at a time
 
-    columns= [col[0] for col in cursor.description]
-    return [
-        dict(zip(columns, row))
-        for row in cursor.fetchall()
-    ]
+    Args:
+        db_cursor: a cursor the query was executed on
+        named (bool): yield namedtuples with a field for each column instead of tuples,
+            the namedtuple class is built once for the query
+
+    Yields:
+        tuple -- one row
+    """
+    chunks = fetch_chunks(db_cursor, chunk_size)
+    # a server-side cursor only has its description after the first fetch
+    first = next(chunks, [])
+    if not named:
+        yield from first
+        for rows in chunks:
+            yield from rows
+        return
+
+    if not first:
+        return
+    make = row_type(db_cursor)._make
+    for row in first:
+        yield make(row)
+    for rows in chunks:
+        for row in rows:
+            yield make(row)
+
+
+def columns_of(db_cursor):
+    """The names of the cursor's columns, in order
+    """
+    return [col[0] for col in db_cursor.description]
+
+
+def row_type(db_cursor):
+    """A namedtuple class with a field for each of the cursor's columns, a column name
+    that is not a valid field name (ie "count(*)") is renamed to its position, ie _0
+    """
+    return namedtuple('Row', columns_of(db_cursor), rename=True)
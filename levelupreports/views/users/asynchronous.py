@@ -0,0 +1,39 @@
+""" Async versions of the user reports, used when served over ASGI """
+
+from django.http import StreamingHttpResponse
+
+from levelupreports import snapshots
+from levelupreports.models import UserEventReport, UserGameReport
+from levelupreports.views.filtered import afiltered_report, wants_filtered
+from levelupreports.views.grouping import arender_groups
+from levelupreports.views.helpers import CHUNK_SIZE
+
+
+async def user_game_list(request):
+    # the same snapshot as UserGameList, or the rows read with the async ORM until it is built
+    if wants_filtered(request):
+        return await afiltered_report(request, 'usergames')
+    snapshot = await snapshots.aserve('usergames')
+    if snapshot is not None:
+        return snapshots.response(snapshot)
+    return StreamingHttpResponse(arender_groups(
+        'User Games', _groups(UserGameReport), 'users/user_games.html'
+    ))
+
+
+async def user_event_list(request):
+    # the same snapshot as UserEventList, or the rows read with the async ORM until it is
+    # built
+    if wants_filtered(request):
+        return await afiltered_report(request, 'userevents')
+    snapshot = await snapshots.aserve('userevents')
+    if snapshot is not None:
+        return snapshots.response(snapshot)
+    return StreamingHttpResponse(arender_groups(
+        'User Events', _groups(UserEventReport), 'users/user_events.html'
+    ))
+
+
+async def _groups(model):
+    async for report in model.objects.order_by('gamer_id').aiterator(chunk_size=CHUNK_SIZE):
+        yield report.as_group()
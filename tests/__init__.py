@@ -1 +1,13 @@
 from .test_game_view import GameTests
+from .test_event_view import EventTests
+from .test_authentication import AuthenticationTests
+from .test_reports import ReportTests
+from .test_async_views import AsyncViewTests
+from .test_query_plans import QueryPlanTests
+from .test_seeding import SeedingTests
+from .test_server_timing import ServerTimingTests
+from .test_profiling import ProfilingTests
+from .test_gamer_import import GamerImportTests
+from .test_values_serializer import ValuesSerializerTests
+from .test_counters import CounterTests
+from .test_sqlite_pragmas import SqlitePragmaTests
@@ -0,0 +1,79 @@
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import resolve
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from django.core.management import call_command
+from levelup import urls, urls_async
+from levelupapi.models import Gamer
+from levelupapi.views import import_progress
+
+@override_settings(ROOT_URLCONF='levelup.urls_async', LEVELUP_REPORT_REFRESH_IN_BACKGROUND=False)
+class AsyncViewTests(APITestCase):
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+
+    def setUp(self):
+        self.gamer = Gamer.objects.first()
+        self.token = Token.objects.get(user=self.gamer.user)
+        self.headers = {'AUTHORIZATION': f"Token {self.token.key}"}
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        call_command('rebuild_reports')
+        cache.clear()
+
+    async def test_async_reads_match_sync_views(self):
+        """Test that the async views answer with the same json as the viewsets
+        """
+        for url in ['/gametypes', '/gametypes/1', '/games', '/games/1?expand=game_type',
+                    '/events', '/events?limit=1', '/events/1?expand=organizer,attendees']:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url, headers=self.headers)
+                with override_settings(ROOT_URLCONF='levelup.urls'):
+                    expected = await self.async_client.get(url, headers=self.headers)
+
+                self.assertEqual(status.HTTP_200_OK, response.status_code)
+                self.assertEqual(expected.json(), response.json())
+
+    async def test_async_reads_need_a_token(self):
+        """Test that a missing or unknown token gets the same 401 as the viewsets
+        """
+        response = await self.async_client.get('/games')
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+        self.assertEqual('Token', response['WWW-Authenticate'])
+
+        response = await self.async_client.get('/games', headers={'AUTHORIZATION': 'Token nope'})
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    def test_async_reports_stream(self):
+        """Test that the async report views stream the same page as the sync ones
+        """
+        for url in ['/reports/usergames', '/reports/userevents']:
+            with self.subTest(url=url):
+                body = async_to_sync(self.read_stream)(url)
+                with override_settings(ROOT_URLCONF='levelup.urls'):
+                    expected = self.client.get(url).getvalue()
+                self.assertIn(b'<li>', body)
+                self.assertEqual(expected, body)
+
+    async def read_stream(self, url):
+        response = await self.async_client.get(url)
+        if not response.streaming:
+            return response.content
+        return b''.join([chunk async for chunk in response.streaming_content])
+
+    def test_writes_go_to_the_viewsets(self):
+        """Test that a write on a url the async views answer still reaches the viewset
+        """
+        response = self.client.delete('/games/2')
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+
+    def test_every_url_is_routed(self):
+        """Test that the async urlconf has every route of levelup.urls, ie the import
+        progress of a job
+        """
+        self.assertEqual(import_progress,
+                         resolve('/gamers/import/0123abcd', 'levelup.urls_async').func)
+        routes = {str(pattern.pattern) for pattern in urls_async.urlpatterns}
+        for pattern in urls.urlpatterns:
+            self.assertIn(str(pattern.pattern), routes)
@@ -0,0 +1,69 @@
+import threading
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi.authentication import token_cache
+from levelupapi.credentials import CredentialPool, LoginBusy
+from levelupapi.models import Gamer
+
+class AuthenticationTests(APITestCase):
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+
+    def setUp(self):
+        token_cache.clear()
+        self.gamer = Gamer.objects.first()
+        self.token = Token.objects.get(user=self.gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_cached_token_skips_lookup(self):
+        """Test that a second request resolves the token and gamer from the cache
+        """
+        self.client.get('/gametypes')
+        self.assertEqual(self.gamer.id, token_cache.get(self.token.key)[2].id)
+
+        # only the version read and the game types query are left once the token is cached
+        with self.assertNumQueries(2):
+            response = self.client.get('/gametypes')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+    def test_deleted_token_is_rejected(self):
+        """Test that deleting a token drops it from the cache
+        """
+        self.client.get('/gametypes')
+        self.token.delete()
+
+        response = self.client.get('/gametypes')
+        self.assertEqual(status.HTTP_401_UNAUTHORIZED, response.status_code)
+
+    def test_login_reads_user_and_token_together(self):
+        """Test that a login is one query and comes back with the gamer's token
+        """
+        user = self.gamer.user
+        user.set_password('hunter2')
+        user.save()
+        self.client.credentials()
+
+        with self.assertNumQueries(1):
+            response = self.client.post('/login', {'username': user.username,
+                                                   'password': 'hunter2'}, format='json')
+        self.assertEqual({'valid': True, 'token': self.token.key}, response.data)
+
+        response = self.client.post('/login', {'username': user.username,
+                                               'password': 'wrong'}, format='json')
+        self.assertEqual({'valid': False}, response.data)
+
+    def test_full_login_pool_turns_logins_away(self):
+        """Test that the pool raises LoginBusy once its threads and queue are taken
+        """
+        pool = CredentialPool(workers=1, queue_size=1, retry_after=2)
+        release = threading.Event()
+        running = [pool.submit(release.wait), pool.submit(release.wait)]
+
+        with self.assertRaises(LoginBusy) as busy:
+            pool.submit(release.wait)
+        self.assertEqual(status.HTTP_503_SERVICE_UNAVAILABLE, busy.exception.status_code)
+        self.assertEqual(2, busy.exception.wait)
+
+        release.set()
+        for future in running:
+            future.result()
@@ -0,0 +1,112 @@
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi.models import Event, EventGamer, Game, Gamer
+
+class CounterTests(APITestCase):
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+
+    def setUp(self):
+        self.gamer = Gamer.objects.first()
+        token = Token.objects.get(user=self.gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    def assertCounted(self):
+        for game in Game.objects.all():
+            self.assertEqual(game.events.count(), game.event_count)
+        for event in Event.objects.all():
+            self.assertEqual(event.attendees.count(), event.attendees_count)
+
+    def test_writes_keep_counters(self):
+        """Test that creating, moving and deleting events and attendees keeps the counts
+        """
+        self.assertCounted()
+        event = {"game": 1, "description": "Game night", "date": "2022-09-01", "time": "19:00"}
+        created = self.client.post('/events', event, format='json').data
+        self.client.post('/events/bulk', [event, {**event, "game": 2}], format='json')
+        self.assertCounted()
+
+        self.client.put(f"/events/{created['id']}", {**event, "game": 2}, format='json')
+        self.client.put('/events/bulk', [{**event, "id": created['id']}], format='json')
+        self.assertCounted()
+
+        self.client.post(f"/events/{created['id']}/signup")
+        self.assertCounted()
+        self.client.delete(f"/events/{created['id']}/leave")
+        self.assertCounted()
+
+        Event.objects.get(pk=created['id']).attendees.add(self.gamer)
+        Gamer.objects.exclude(pk=self.gamer.pk).first().user.delete()
+        self.assertCounted()
+        self.client.delete(f"/events/{created['id']}")
+        self.assertCounted()
+
+    def test_popular_order(self):
+        """Test paging the games and events from the most counted down
+        """
+        EventGamer.objects.filter(event_id=1).delete()
+
+        response = self.client.get('/events', {'order': 'popular', 'fields': 'id'})
+        self.assertEqual([2, 1], [event['id'] for event in response.data])
+        response = self.client.get('/events', {'order': 'popular', 'limit': 1})
+        self.assertEqual([2], [event['id'] for event in response.data['results']])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([1], [event['id'] for event in response.data['results']])
+
+        response = self.client.get('/games', {'order': 'newest'})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_popular_order_equal_counts(self):
+        """Test that paging through more games with the same count than DRF's offset cutoff
+        lists each game once and ends
+        """
+        game = Game.objects.first()
+        Game.objects.bulk_create([
+            Game(title=f'Game {n}', maker='Maker', number_of_players=2, skill_level=1,
+                 game_type_id=game.game_type_id, gamer_id=game.gamer_id)
+            for n in range(1100)
+        ])
+
+        ids = []
+        url = '/games?order=popular&limit=100&fields=id'
+        while url is not None:
+            page = self.client.get(url).data
+            ids += [game['id'] for game in page['results']]
+            url = page['next']
+        self.assertEqual(Game.objects.count(), len(ids))
+        self.assertEqual(len(ids), len(set(ids)))
+
+        # and back again from the last page
+        start = len(ids) - len(page['results'])
+        previous = self.client.get(page['prev']).data
+        self.assertEqual(ids[start - 100:start], [game['id'] for game in previous['results']])
+
+    def test_game_etag_follows_event_count(self):
+        """Test that a new event changes the ETag of its game, whose event_count moved
+        """
+        response = self.client.get('/games/1')
+        count = response.data['event_count']
+        event = {"game": 1, "description": "Game night", "date": "2022-09-01", "time": "19:00"}
+        self.client.post('/events', event, format='json')
+
+        response = self.client.get('/games/1', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(count + 1, response.data['event_count'])
+
+    def test_reconcile_counters(self):
+        """Test that the command finds and repairs counters that drifted
+        """
+        Game.objects.filter(pk=1).update(event_count=7)
+        Event.objects.filter(pk=2).update(attendees_count=0)
+
+        with self.assertRaises(CommandError):
+            call_command('reconcile_counters', check=True, stdout=StringIO())
+
+        out = StringIO()
+        call_command('reconcile_counters', stdout=out)
+        self.assertIn('Repaired 2 counters', out.getvalue())
+        self.assertCounted()
+        call_command('reconcile_counters', check=True, stdout=StringIO())
@@ -0,0 +1,206 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi.models import Event, Gamer
+
+class EventTests(APITestCase):
+    # Add any fixtures you want to run to build the test database
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+
+    def setUp(self):
+        # Grab the first Gamer object from the database and their tokens to the headers
+        self.gamer = Gamer.objects.first()
+        token = Token.objects.get(user=self.gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    def test_list_events_sparse_fieldset(self):
+        """Test asking for only some of the fields and one embedded relation
+        """
+        response = self.client.get('/events', {'fields': 'id,date,time,game', 'expand': 'game'})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        event = response.data[0]
+        self.assertEqual(['id', 'game', 'date', 'time'], list(event.keys()))
+        # the expanded game is embedded, with its own relations at the serializer's depth
+        self.assertEqual('Life', event['game']['title'])
+        self.assertEqual('Board Game', event['game']['game_type']['label'])
+
+    def test_list_events_unexpanded_relations_are_ids(self):
+        """Test that relations left out of expand come back as primary keys
+        """
+        response = self.client.get('/events', {'expand': ''})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        event = Event.objects.get(pk=response.data[0]['id'])
+        self.assertEqual(event.game_id, response.data[0]['game'])
+        self.assertEqual(event.organizer_id, response.data[0]['organizer'])
+        self.assertEqual(
+            sorted(event.attendees.values_list('id', flat=True)),
+            sorted(response.data[0]['attendees'])
+        )
+
+    def test_search_events(self):
+        """Test the full text search over event descriptions
+        """
+        response = self.client.get('/events', {'q': 'retire mans'})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([1], [event['id'] for event in response.data])
+
+    def test_bulk_create_events(self):
+        """Test creating a list of events in one request, organized by the current gamer
+        """
+        events = [
+            {"game": 1, "description": "Game night", "date": "2022-09-01", "time": "19:00"},
+            {"game": 2, "description": "Speed run", "date": "2022-09-02", "time": "12:00"},
+        ]
+
+        response = self.client.post('/events/bulk', events, format='json')
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        created = Event.objects.filter(pk__in=[event['id'] for event in response.data])
+        self.assertEqual(2, created.count())
+        self.assertTrue(all(event.organizer_id == self.gamer.id for event in created))
+
+    def test_list_events_joined_per_gamer(self):
+        """Test that gamers sharing the cached list each get their own joined value
+        """
+        response = self.client.get('/events')
+        self.assertTrue(all(event['joined'] == 1 for event in response.data))
+
+        # a gamer who has not joined any event gets the same list from the cache
+        other = Gamer.objects.exclude(events__isnull=False).first()
+        token = Token.objects.create(user=other.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        response = self.client.get('/events')
+        self.assertEqual(Event.objects.count(), len(response.data))
+        self.assertTrue(all(event['joined'] == 0 for event in response.data))
+
+    def test_signup_and_leave(self):
+        """Test that signing up and leaving are idempotent and return the attendee count
+        """
+        event = Event.objects.filter(attendees=self.gamer).first()
+        count = event.attendees.count()
+
+        response = self.client.delete(f'/events/{event.id}/leave')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(count - 1, response.data['attendees_count'])
+        self.assertFalse(event.attendees.filter(pk=self.gamer.pk).exists())
+
+        response = self.client.delete(f'/events/{event.id}/leave')
+        self.assertEqual(count - 1, response.data['attendees_count'])
+
+        response = self.client.post(f'/events/{event.id}/signup')
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(count, response.data['attendees_count'])
+
+        response = self.client.post(f'/events/{event.id}/signup')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(count, event.attendees.count())
+
+    def test_leave_missing_event(self):
+        """Test that leaving an event that does not exist is a 404, the same as signing up
+        """
+        response = self.client.delete('/events/9999/leave')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        response = self.client.post('/events/9999/signup')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_signup_full_event(self):
+        """Test that an event with max_attendees stops taking signups once it is full
+        """
+        event = Event.objects.filter(attendees=self.gamer).first()
+        self.client.delete(f'/events/{event.id}/leave')
+        event.max_attendees = event.attendees.count()
+        event.save()
+
+        response = self.client.post(f'/events/{event.id}/signup')
+
+        self.assertEqual(status.HTTP_409_CONFLICT, response.status_code)
+        self.assertFalse(event.attendees.filter(pk=self.gamer.pk).exists())
+        self.assertEqual(status.HTTP_404_NOT_FOUND,
+                         self.client.post('/events/999/signup').status_code)
+
+    def test_list_events_in_window(self):
+        """Test ?from= and ?to= filtering and ordering by start time, including bulk writes
+        """
+        events = [
+            {"game": 1, "description": "Early", "date": "2022-08-07", "time": "09:00"},
+            {"game": 2, "description": "Late", "date": "2022-08-07", "time": "21:00"},
+        ]
+        created = self.client.post('/events/bulk', events, format='json').data
+        early = Event.objects.get(pk=created[0]['id'])
+        self.assertEqual(Event.start_of('2022-08-07', '09:00'), early.starts_at)
+
+        response = self.client.get('/events', {'from': '2022-08-06', 'to': '2022-08-07'})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual([2, created[0]['id'], created[1]['id']],
+                         [event['id'] for event in response.data])
+
+        # a page is cut from the same start time order
+        response = self.client.get('/events', {'from': '2022-08-07T12:00:00', 'limit': 1})
+        self.assertEqual([created[1]['id']], [event['id'] for event in response.data['results']])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([1], [event['id'] for event in response.data['results']])
+
+        # moving an event moves its start time
+        early_update = {**events[0], "id": early.id, "date": "2022-09-01"}
+        self.client.put('/events/bulk', [early_update], format='json')
+        early.refresh_from_db()
+        self.assertEqual(Event.start_of('2022-09-01', '09:00'), early.starts_at)
+
+        response = self.client.get('/events', {'from': 'soon'})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        response = self.client.get('/events', {'upcoming': '7', 'to': '2022-08-07'})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_calendar(self):
+        """Test the events grouped by the day they start on
+        """
+        response = self.client.get('/events/calendar',
+                                   {'from': '2022-08-01', 'to': '2022-08-31', 'fields': 'id,joined'})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(['2022-08-06', '2022-08-08'], [day['date'] for day in response.data])
+        self.assertEqual([2], [event['id'] for event in response.data[0]['events']])
+        self.assertEqual(1, response.data[1]['events'][0]['joined'])
+
+        # by default the calendar starts today, after the fixtures' events
+        response = self.client.get('/events/calendar')
+        self.assertEqual([], response.data)
+        response = self.client.get('/events/calendar', {'from': '2020-01-01', 'to': '2030-01-01'})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn('to', response.data)
+
+    def test_calendar_needs_both_ends(self):
+        """Test that a calendar window missing one end is a 400 naming that end
+        """
+        response = self.client.get('/events/calendar', {'to': '2030-01-01'})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(['from'], list(response.data))
+
+        response = self.client.get('/events/calendar', {'from': '2020-01-01'})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertIn('needs ?to=', response.data['to'][0])
+
+    def test_window_pages_equal_start_times(self):
+        """Test that paging a window through events that start at the same time lists each
+        of them once
+        """
+        event = Event.objects.first()
+        Event.objects.bulk_create([
+            Event(description=f'Night {n}', date='2022-08-20', time='19:00',
+                  starts_at=Event.start_of('2022-08-20', '19:00'),
+                  game_id=event.game_id, organizer_id=event.organizer_id)
+            for n in range(30)
+        ])
+
+        ids = []
+        url = '/events?from=2022-08-20&to=2022-08-20&limit=7&fields=id'
+        while url is not None:
+            page = self.client.get(url).data
+            ids += [event['id'] for event in page['results']]
+            url = page['next']
+        self.assertEqual(30, len(set(ids)))
+        self.assertEqual(sorted(ids), ids)
@@ -1,4 +1,3 @@
-from django.db.models import Count
 from rest_framework import status
 from rest_framework.test import APITestCase
 from rest_framework.authtoken.models import Token
@@ -75,10 +74,9 @@ class GameTests(APITestCase):
 
         response = self.client.get(url)
 
-        # get all games in the database and serialize them to get the expected output
-        # all_games = Game.objects.all(), would be the line if the count was not there
-        # since the gameview has the .annotate for the count, it also needed to be on the test
-        all_games = Game.objects.annotate(event_count=Count('events'))
+        # get all games in the database and serialize them to get the expected output,
+        # event_count is a column on the game now so it does not need to be annotated
+        all_games = Game.objects.all()
         expected = GameSerializer(all_games, many=True)
 
         self.assertEqual(status.HTTP_200_OK, response.status_code)
@@ -124,3 +122,116 @@ class GameTests(APITestCase):
         # the response should return a 404
         response = self.client.get(url)
         self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_list_games_keyset_pages(self):
+        """Test walking the games list one page at a time with the cursor
+        """
+        response = self.client.get('/games', {'limit': 1})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(1, len(response.data['results']))
+        self.assertIsNone(response.data['prev'])
+        first_id = response.data['results'][0]['id']
+
+        # follow the opaque next link to get the second page
+        response = self.client.get(response.data['next'])
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(1, len(response.data['results']))
+        self.assertGreater(response.data['results'][0]['id'], first_id)
+        self.assertIsNone(response.data['next'])
+        self.assertIsNotNone(response.data['prev'])
+
+    def test_search_games(self):
+        """Test the ranked full text search, words match as prefixes anywhere in the title
+        or maker, and newly saved games are searchable right away
+        """
+        response = self.client.get('/games', {'q': 'mar'})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(['Super Mario RPG'], [game['title'] for game in response.data])
+
+        game = Game.objects.get(title='Super Mario RPG')
+        game.title = 'Paper Mario'
+        game.save()
+
+        response = self.client.get('/games', {'q': 'nintendo pap'})
+        self.assertEqual(['Paper Mario'], [game['title'] for game in response.data])
+
+        response = self.client.get('/games', {'q': 'super'})
+        self.assertEqual([], response.data)
+
+    def test_bulk_create_games(self):
+        """Test creating a list of games in one request
+        """
+        games = [
+            {"title": "Clue", "maker": "Milton Bradley", "skill_level": 5,
+             "number_of_players": 6, "game_type": 1},
+            {"title": "Risk", "maker": "Hasbro", "skill_level": 3,
+             "number_of_players": 5, "game_type": 1},
+        ]
+        before = Game.objects.count()
+
+        response = self.client.post('/games/bulk', games, format='json')
+
+        self.assertEqual(status.HTTP_201_CREATED, response.status_code)
+        self.assertEqual(before + 2, Game.objects.count())
+        self.assertEqual(['Clue', 'Risk'], [game['title'] for game in response.data])
+        self.assertTrue(all(game['id'] for game in response.data))
+
+        # new games are searchable right away
+        response = self.client.get('/games', {'q': 'clue'})
+        self.assertEqual(['Clue'], [game['title'] for game in response.data])
+
+    def test_bulk_create_games_reports_item_errors(self):
+        """Test that one bad item rejects the whole batch, with the error lined up
+        """
+        games = [
+            {"title": "Clue", "maker": "Milton Bradley", "skill_level": 5,
+             "number_of_players": 6, "game_type": 1},
+            {"title": "Risk", "maker": "Hasbro", "skill_level": 3,
+             "number_of_players": 5, "game_type": 999},
+        ]
+        before = Game.objects.count()
+
+        response = self.client.post('/games/bulk', games, format='json')
+
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(before, Game.objects.count())
+        self.assertEqual({}, response.data[0])
+        self.assertIn('game_type', response.data[1])
+
+    def test_bulk_update_games(self):
+        """Test updating a list of games in one request
+        """
+        games = [
+            {"id": game.id, "title": f'{game.title} updated', "maker": game.maker,
+             "skill_level": game.skill_level, "number_of_players": game.number_of_players,
+             "game_type": game.game_type_id}
+            for game in Game.objects.all()
+        ]
+
+        response = self.client.put('/games/bulk', games, format='json')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        for game in Game.objects.all():
+            self.assertTrue(game.title.endswith(' updated'))
+
+    def test_list_games_not_modified(self):
+        """Test that polling with the ETag gets a 304 until a game is written
+        """
+        response = self.client.get('/games')
+        etag = response['ETag']
+
+        # the version read is the only query once the token is cached
+        with self.assertNumQueries(1):
+            response = self.client.get('/games', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+        game = Game.objects.first()
+        game.title = f'{game.title} updated'
+        game.save()
+
+        response = self.client.get('/games', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotEqual(etag, response['ETag'])
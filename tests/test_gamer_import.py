@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework import status
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi import import_jobs
+from levelupapi.authentication import token_cache
+from levelupapi.models import Gamer
+
+# the import runs in the request, a background thread would not see the test's transaction
+@override_settings(LEVELUP_IMPORT_IN_BACKGROUND=False)
+class GamerImportTests(APITestCase):
+    fixtures = ['users', 'tokens', 'gamers']
+
+    def setUp(self):
+        # the token's user is cached, with is_staff from whichever test read it first
+        token_cache.clear()
+
+    def test_import_gamers_command(self):
+        """Test that a CSV is imported in chunks and the bad rows are reported by line
+        """
+        existing = User.objects.first().username
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as upload:
+            upload.write('username,password,first_name,last_name,bio\n'
+                         'mario,itsame,Mario,Mario,Plumber\n'
+                         'luigi,itsame2,Luigi,Mario,Also a plumber\n'
+                         f'{existing},pw,Dupe,User,Taken\n'
+                         'peach,,Peach,Toadstool,Royalty\n'
+                         'toad,mushroom,Toad,Toad,Retainer\n')
+        self.addCleanup(os.remove, upload.name)
+
+        err = StringIO()
+        call_command('import_gamers', upload.name, chunk_size=2, workers=2,
+                     stdout=StringIO(), stderr=err)
+
+        for username in ('mario', 'luigi', 'toad'):
+            gamer = Gamer.objects.get(user__username=username)
+            self.assertTrue(Token.objects.filter(user=gamer.user).exists())
+        self.assertTrue(User.objects.get(username='mario').check_password('itsame'))
+        self.assertFalse(User.objects.filter(username='peach').exists())
+        self.assertIn('line 4:', err.getvalue())
+        self.assertIn('line 5:', err.getvalue())
+
+    def test_import_gamers_endpoint_is_staff_only(self):
+        """Test the upload endpoint with NDJSON, as staff and as a regular gamer
+        """
+        rows = [{'username': 'yoshi', 'password': 'egg', 'first_name': 'Yoshi',
+                 'last_name': 'Dino', 'bio': 'Green'}, 'not an object']
+        content = '\n'.join(json.dumps(row) for row in rows).encode()
+
+        gamer = Gamer.objects.first()
+        token = Token.objects.get(user=gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        response = self.client.post('/gamers/import', {
+            'file': SimpleUploadedFile('gamers.ndjson', content)
+        })
+        self.assertEqual(status.HTTP_403_FORBIDDEN, response.status_code)
+
+        gamer.user.is_staff = True
+        gamer.user.save()
+        response = self.client.post('/gamers/import', {
+            'file': SimpleUploadedFile('gamers.ndjson', content)
+        })
+        self.assertEqual(status.HTTP_202_ACCEPTED, response.status_code)
+
+        response = self.client.get(f"/gamers/import/{response.data['id']}")
+        self.assertEqual('done', response.data['state'])
+        self.assertEqual(1, response.data['created'])
+        self.assertEqual([2], [error['line'] for error in response.data['errors']])
+        self.assertTrue(Gamer.objects.filter(user__username='yoshi').exists())
+
+        response = self.client.get('/gamers/import/unknown')
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_import_gamers_endpoint_is_bounded(self):
+        """Test that an upload is turned away while every import slot is taken
+        """
+        gamer = Gamer.objects.first()
+        gamer.user.is_staff = True
+        gamer.user.save()
+        token = Token.objects.get(user=gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        import_jobs.running.acquire()
+        try:
+            response = self.client.post('/gamers/import', {
+                'file': SimpleUploadedFile('gamers.csv', b'username,password\n')
+            })
+        finally:
+            import_jobs.running.release()
+        self.assertEqual(status.HTTP_503_SERVICE_UNAVAILABLE, response.status_code)
+        self.assertIn('Retry-After', response)
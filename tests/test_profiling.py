@@ -0,0 +1,43 @@
+import os
+import shutil
+import tempfile
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi.models import Gamer
+
+class ProfilingTests(APITestCase):
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+
+    def setUp(self):
+        gamer = Gamer.objects.first()
+        token = Token.objects.get(user=gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir)
+
+    def test_profile_header_saves_stacks(self):
+        """Test that a request with the profile secret is profiled and saved under its route
+        """
+        with override_settings(LEVELUP_PROFILE_SECRET='letmein',
+                               LEVELUP_PROFILE_DIR=self.profile_dir):
+            response = self.client.get('/events', HTTP_X_LEVELUP_PROFILE='letmein')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        name = response['X-Levelup-Profile']
+        self.assertEqual([name], os.listdir(self.profile_dir))
+        self.assertIn('-GET-events-200-', name)
+        self.assertTrue(name.endswith('.collapsed'))
+
+    def test_wrong_secret_is_not_profiled(self):
+        """Test that requests without the right secret are left alone
+        """
+        with override_settings(LEVELUP_PROFILE_SECRET='letmein',
+                               LEVELUP_PROFILE_SAMPLE_RATE=0,
+                               LEVELUP_PROFILE_DIR=self.profile_dir):
+            response = self.client.get('/events', HTTP_X_LEVELUP_PROFILE='guess')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertFalse(response.has_header('X-Levelup-Profile'))
+        self.assertEqual([], os.listdir(self.profile_dir))
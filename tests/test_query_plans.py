@@ -0,0 +1,25 @@
+from io import StringIO
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+from levelupapi.management.commands.check_query_plans import Command
+
+class QueryPlanTests(APITestCase):
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+
+    def test_hot_paths_use_indexes(self):
+        """Test that none of the endpoint queries scan a whole table
+        """
+        out = StringIO()
+        call_command('check_query_plans', stdout=out)
+        self.assertIn('No full table scans', out.getvalue())
+        self.assertIn('Not checked, they return every row: /gametypes', out.getvalue())
+
+    def test_limit_does_not_hide_a_scan(self):
+        """Test that a LIMIT only excuses a scan that walks the rows in the query's order
+        """
+        command = Command(stdout=StringIO())
+        command.verbosity = 0
+        sql = 'SELECT id FROM levelupapi_event WHERE description = %s'
+        self.assertTrue(command.check('filter', f'{sql} LIMIT 5', ['x']))
+        self.assertFalse(command.check('page', 'SELECT id FROM levelupapi_event ORDER BY id '
+                                               'LIMIT 5', []))
@@ -0,0 +1,160 @@
+from importlib import import_module
+from types import SimpleNamespace
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from levelupapi.models import Event, Game, GameType, Gamer
+from levelupreports import snapshots
+from levelupreports.views.helpers import iter_rows, streaming_cursor
+from levelupreports.models import UserEventReport, UserGameReport
+
+# the snapshots are rebuilt in the request, a background thread would not see the test's
+# transaction
+@override_settings(LEVELUP_REPORT_REFRESH_IN_BACKGROUND=False)
+class ReportTests(TestCase):
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+
+    def setUp(self):
+        # fixtures are loaded with raw saves, which the report tables do not follow
+        call_command('rebuild_reports', verbosity=0)
+        cache.clear()
+
+    def report(self, url):
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        return response.getvalue().decode()
+
+    def test_user_games_report(self):
+        """Test that every game is listed once, under its gamer
+        """
+        html = self.report('/reports/usergames')
+
+        self.assertEqual(1, html.count('<h1>User Games</h1>'))
+        for game in Game.objects.all():
+            self.assertEqual(1, html.count(f'Title: {game.title}'))
+        self.assertTrue(html.rstrip().endswith('</html>'))
+
+    def test_user_events_report(self):
+        """Test that each organizer is listed once with all of their events
+        """
+        html = self.report('/reports/userevents')
+
+        organizers = Event.objects.values('organizer').distinct().count()
+        self.assertEqual(organizers, html.count('<h2>'))
+        self.assertEqual(Event.objects.count(), html.count('Game for Event:'))
+
+    def test_migration_fills_reports(self):
+        """Test that migrating an existing database builds the same report rows as
+        rebuild_reports
+        """
+        fill = import_module('levelupreports.migrations.0002_fill_report_tables')
+        built = {model: [(report.gamer_id, report.as_group()) for report in
+                         model.objects.order_by('gamer_id')]
+                 for model in (UserGameReport, UserEventReport)}
+        UserGameReport.objects.all().delete()
+        UserEventReport.objects.all().delete()
+
+        fill.fill_reports(apps, SimpleNamespace(connection=connection))
+        for model, reports in built.items():
+            self.assertEqual(reports, [(report.gamer_id, report.as_group()) for report in
+                                       model.objects.order_by('gamer_id')])
+
+    def test_report_follows_game_changes(self):
+        """Test that saving and deleting games updates the gamer's report row
+        """
+        gamer = Gamer.objects.last()
+        self.assertFalse(UserGameReport.objects.filter(gamer=gamer).exists())
+
+        game = Game.objects.create(title='Clue', maker='Milton Bradley', gamer=gamer,
+                                   game_type=GameType.objects.first())
+        report = UserGameReport.objects.get(gamer=gamer)
+        self.assertEqual(['Clue'], [game['title'] for game in report.games])
+
+        game.delete()
+        self.assertFalse(UserGameReport.objects.filter(gamer=gamer).exists())
+
+    def test_report_snapshot(self):
+        """Test that the page is served from its snapshot until a write marks it dirty,
+        and that a rebuild already running is not started twice
+        """
+        html = self.report('/reports/usergames')
+        gamer = Gamer.objects.last()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Game.objects.create(title='Clue', maker='Milton Bradley', gamer=gamer,
+                                game_type=GameType.objects.first())
+        # the snapshot is stale, but a rebuild holds the lock so it is still served
+        cache.add(snapshots.lock_key('usergames'), True)
+        self.assertEqual(html, self.report('/reports/usergames'))
+
+        cache.delete(snapshots.lock_key('usergames'))
+        self.assertIn('Title: Clue', self.report('/reports/usergames'))
+        with self.assertNumQueries(0):
+            self.assertIn('Title: Clue', self.report('/reports/usergames'))
+
+        with self.settings(LEVELUP_REPORT_SNAPSHOT_TTL=-1):
+            Game.objects.filter(title='Clue').update(title='Cluedo')
+            call_command('rebuild_reports', verbosity=0)
+            self.assertIn('Title: Cluedo', self.report('/reports/usergames'))
+
+    def test_filtered_report(self):
+        """Test that the filters and the page size are applied in the query, and that the
+        JSON pages follow each other with their cursor
+        """
+        gamer = Game.objects.values_list('gamer', flat=True).first()
+        html = self.report(f'/reports/usergames?gamer={gamer}')
+        self.assertEqual(1, html.count('<h2>'))
+        for game in Game.objects.filter(gamer=gamer):
+            self.assertIn(f'Title: {game.title}', html)
+
+        game_type = Game.objects.values_list('game_type', flat=True).first()
+        response = self.client.get(f'/reports/usergames?format=json&type={game_type}')
+        titles = [game['title'] for group in response.json()['results']
+                  for game in group['games']]
+        self.assertCountEqual(
+            Game.objects.filter(game_type=game_type).values_list('title', flat=True), titles)
+
+        organizers = []
+        url = '/reports/userevents?format=json&limit=1'
+        while url:
+            page = self.client.get(url).json()
+            self.assertLessEqual(len(page['results']), 1)
+            organizers += [group['gamer_id'] for group in page['results']]
+            url = page['next']
+        self.assertEqual(
+            sorted(Event.objects.values_list('organizer', flat=True).distinct()), organizers)
+
+    def test_filtered_report_window(self):
+        """Test that the events report only lists events in the date range, and that a
+        range that is not valid is a 400
+        """
+        event = Event.objects.order_by('starts_at').first()
+        day = event.starts_at.date()
+        page = self.client.get(f'/reports/userevents?format=json&from={day}&to={day}').json()
+        ids = [item['id'] for group in page['results'] for item in group['events']]
+        self.assertIn(event.id, ids)
+        self.assertTrue(all(Event.objects.get(pk=pk).starts_at.date() == day for pk in ids))
+
+        response = self.client.get('/reports/userevents?from=soon&limit=-1')
+        self.assertEqual(400, response.status_code)
+        self.assertIn('limit', response.json())
+
+    def test_iter_rows(self):
+        """Test that the rows come back in order across chunks, as tuples or namedtuples
+        """
+        titles = list(Game.objects.order_by('id').values_list('id', 'title'))
+        sql = 'SELECT id, title, count(*) FROM levelupapi_game GROUP BY id ORDER BY id'
+        with streaming_cursor() as db_cursor:
+            db_cursor.execute(sql)
+            rows = list(iter_rows(db_cursor, named=True, chunk_size=1))
+        self.assertEqual(titles, [(row.id, row.title) for row in rows])
+        self.assertEqual([1] * len(titles), [row._2 for row in rows])
+
+        with streaming_cursor() as db_cursor:
+            db_cursor.execute(sql + ' LIMIT 0')
+            self.assertEqual([], list(iter_rows(db_cursor, named=True)))
+        with streaming_cursor() as db_cursor:
+            db_cursor.execute(sql)
+            self.assertEqual(titles, [row[:2] for row in iter_rows(db_cursor)])
@@ -0,0 +1,41 @@
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APITestCase
+from levelupapi.models import Event, EventGamer, Game, Gamer
+from levelupapi.seeding import password_for, seed_gamers
+from levelupreports.models import UserEventReport
+
+class SeedingTests(APITestCase):
+
+    def test_seed_levelup(self):
+        """Test that the generated rows are consistent and the seeded gamers can log in
+        """
+        call_command('seed_levelup', gamers=30, games=40, events=20, signups=100,
+                     password_pool=2, stdout=StringIO())
+
+        self.assertEqual(30, Gamer.objects.count())
+        self.assertEqual(40, Game.objects.count())
+        self.assertEqual(20, Event.objects.count())
+        self.assertLessEqual(EventGamer.objects.count(), 100)
+        # the reports are rebuilt from the bulk loaded rows
+        self.assertEqual(Event.objects.values('organizer').distinct().count(),
+                         UserEventReport.objects.count())
+
+        username = Gamer.objects.select_related('user').first().user.username
+        response = self.client.post('/login', {'username': username,
+                                               'password': password_for(username, 2)},
+                                    format='json')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertTrue(response.data['valid'])
+
+    def test_seed_gamers_after_deletes(self):
+        """Test that seeding again after a user was deleted does not reuse a username
+        """
+        seed_gamers(3, password_pool=1)
+        User.objects.get(username='gamer0').delete()
+
+        seed_gamers(2, password_pool=1)
+        self.assertEqual(['gamer1', 'gamer2', 'gamer3', 'gamer4'], sorted(
+            Gamer.objects.values_list('user__username', flat=True)))
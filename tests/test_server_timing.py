@@ -0,0 +1,35 @@
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework.authtoken.models import Token
+from levelupapi.models import Gamer
+
+class ServerTimingTests(APITestCase):
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+
+    def setUp(self):
+        gamer = Gamer.objects.first()
+        token = Token.objects.get(user=gamer.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+    @override_settings(LEVELUP_TIMING_SAMPLE_RATE=1)
+    def test_sampled_request_reports_timings(self):
+        """Test that a sampled request gets a Server-Timing header and a log line
+        """
+        with self.assertLogs('levelupapi.timing', level='INFO') as logs:
+            response = self.client.get('/events', {'expand': 'game'})
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        metrics = [metric.split(';')[0] for metric in response['Server-Timing'].split(', ')]
+        self.assertEqual(['db', 'serialize', 'render', 'total'], metrics)
+        self.assertIn('"path": "/events"', logs.output[0])
+        self.assertNotIn('"queries": 0,', logs.output[0])
+
+    @override_settings(LEVELUP_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_request_has_no_header(self):
+        """Test that nothing is added when the sample rate is 0
+        """
+        response = self.client.get('/events')
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertFalse(response.has_header('Server-Timing'))
@@ -0,0 +1,50 @@
+import os
+import tempfile
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, override_settings
+
+# the production profile's values, see LEVELUP_SQLITE_PRAGMAS in levelup.settings
+PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 5000,
+}
+
+class SqlitePragmaTests(SimpleTestCase):
+
+    def pragmas(self, *names):
+        """Opens a new connection to a file database and reads the PRAGMAs back
+        """
+        # the test database is in memory, which has no WAL, so a file is opened instead
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'pragmas.sqlite3')
+        wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': path}, alias='pragmas')
+        try:
+            with wrapper.cursor() as db_cursor:
+                values = []
+                for name in names:
+                    db_cursor.execute(f'PRAGMA {name}')
+                    values.append(db_cursor.fetchone()[0])
+                return values
+        finally:
+            wrapper.close()
+            for name in os.listdir(directory):
+                os.remove(os.path.join(directory, name))
+            os.rmdir(directory)
+
+    @override_settings(LEVELUP_SQLITE_PRAGMAS=PRODUCTION_PRAGMAS)
+    def test_new_connections_are_tuned(self):
+        """Test that a new SQLite connection gets the PRAGMAs from LEVELUP_SQLITE_PRAGMAS
+        """
+        self.assertEqual(['wal', 1, 5000],
+                         self.pragmas('journal_mode', 'synchronous', 'busy_timeout'))
+
+    @override_settings(LEVELUP_SQLITE_PRAGMAS={})
+    def test_default_profile_leaves_sqlite_alone(self):
+        """Test that without the production profile SQLite keeps its own journal and sync
+        modes
+        """
+        # 2 is FULL
+        self.assertEqual(['delete', 2], self.pragmas('journal_mode', 'synchronous'))
@@ -0,0 +1,53 @@
+from django.contrib.auth.models import Group, Permission
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+from django.db.models import Value
+from levelupapi.models import Event, Game, Gamer, GameType
+from levelupapi.views import EventSerializer, GameSerializer, GameTypeSerializer
+from levelupapi.views.values_serializer import compile_for
+
+class ValuesSerializerTests(TestCase):
+    fixtures = ['users', 'tokens', 'gamers', 'game_types', 'games', 'events']
+
+    def assertSameJson(self, serializer_class, queryset, fields=None, expand=None):
+        compiled = compile_for(serializer_class, queryset, fields, expand)
+        self.assertIsNotNone(compiled)
+
+        if fields is None and expand is None:
+            expected = serializer_class(queryset, many=True).data
+        else:
+            queryset = serializer_class.eager_load(queryset, fields, expand)
+            expected = serializer_class(queryset, many=True, fields=fields, expand=expand).data
+        self.assertEqual(JSONRenderer().render(expected),
+                         JSONRenderer().render(compiled.serialize(queryset)))
+
+    def test_same_json_as_serializers(self):
+        """Test that the compiled serializers render byte for byte the same JSON
+        """
+        # a group and permissions on one of the attendees, so their lists are not empty
+        user = Gamer.objects.first().user
+        user.groups.add(Group.objects.create(name='Organizers'))
+        user.user_permissions.add(*Permission.objects.order_by('-id')[:3])
+        games = Game.objects.all()
+        events = Event.objects.annotate(joined=Value(0))
+
+        for fields, expand in [(None, None), (('id', 'title', 'gamer'), None),
+                               (None, ('game_type',)), (None, ())]:
+            with self.subTest(model='game', fields=fields, expand=expand):
+                self.assertSameJson(GameSerializer, games, fields, expand)
+
+        for fields, expand in [(None, None), (('id', 'date', 'time', 'game'), ('game',)),
+                               (None, ('organizer', 'attendees')), (None, ())]:
+            with self.subTest(model='event', fields=fields, expand=expand):
+                self.assertSameJson(EventSerializer, events, fields, expand)
+
+        self.assertSameJson(GameTypeSerializer, GameType.objects.all())
+
+    def test_game_types_list_is_not_paged(self):
+        """Test that /gametypes still returns every game type as a plain list
+        """
+        token = Gamer.objects.first().user.auth_token
+        response = self.client.get('/gametypes', {'limit': 1},
+                                   HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.assertEqual(JSONRenderer().render(
+            GameTypeSerializer(GameType.objects.all(), many=True).data), response.content)